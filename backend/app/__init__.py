@@ -2,17 +2,27 @@ import os
 from flask import Flask
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
-from werkzeug.security import generate_password_hash
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 # Import your SQLAlchemy handle and models once (no duplicates)
 from .models import db, User
+from .schema import capabilities
+# Registers the leased+redis:// limiter storage
+from .rate_limit import storage_uri as ratelimit_storage_uri
+from .passwords import hash_password
 
 migrate = Migrate()
 jwt = JWTManager()
 
+
+@jwt.token_in_blocklist_loader
+def token_revoked(jwt_header, jwt_payload):
+    # Account deleted, role changed or token_version bumped (cached identity lookup)
+    from .identity import is_revoked
+    return is_revoked(jwt_payload)
+
 # ============================================================
 # PRODUCTION-GRADE RATE LIMITING
 # Optimized for 50 concurrent users
@@ -23,7 +33,12 @@ limiter = Limiter(
     # 10,000 per day = ~7 requests/min sustained
     # 2,000 per hour = ~33 requests/min burst capacity
     default_limits=["10000 per day", "2000 per hour"],
-    storage_uri="memory://",  # In-memory rate limiting (works without Redis)
+    # Counters shared by all workers on Redis (sliding windows, local token
+    # lease); memory:// without REDIS_URL. While Redis is unreachable each
+    # process falls back to its own in-memory counters.
+    storage_uri=ratelimit_storage_uri(),
+    strategy="moving-window",
+    in_memory_fallback_enabled=True,
 )
 
 def create_app():
@@ -63,6 +78,9 @@ def create_app():
         # Production: only allow configured frontend URL
         allowed_origins = [frontend_url] if frontend_url else []
     
+    # Reused by the ASGI entry point (asgi.py) for its own routes
+    app.config["CORS_ALLOWED_ORIGINS"] = allowed_origins
+
     # Log CORS configuration for debugging
     print(f"🔐 CORS Configuration:")
     print(f"   - Environment: {'Development' if is_dev else 'Production'}")
@@ -170,7 +188,7 @@ def create_app():
                     name=name,
                     email=email,
                     mobile=mobile,
-                    password_hash=generate_password_hash(password),
+                    password_hash=hash_password(password),
                     role="admin",
                 )
                 db.session.add(admin)
@@ -182,13 +200,14 @@ def create_app():
             if "does not exist" in str(e).lower() or "no such table" in str(e).lower():
                 app.logger.info("Tables not found, creating them...")
                 db.create_all()
+                capabilities.refresh()
                 # Retry admin creation
                 if not User.query.filter_by(email=email).first():
                     admin = User(
                         name=name,
                         email=email,
                         mobile=mobile,
-                        password_hash=generate_password_hash(password),
+                        password_hash=hash_password(password),
                         role="admin",
                     )
                     db.session.add(admin)
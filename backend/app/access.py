@@ -0,0 +1,102 @@
+# backend/app/access.py
+"""
+Which candidates a user may work on: the ones they created plus the ones
+assigned to them.
+
+Single-candidate checks (owns_or_404, field mapping) look the candidate up in
+the user's accessible-id set, loaded with one indexed query and kept in the
+identity cache (see app/identity.py) under "access:<user id>". Writes that
+change a candidate's creator or assignments, or delete it, call
+invalidate_access() after committing, which drops the set in every API
+process. A set loaded while it is being invalidated is not stored, and sets
+live for ACCESS_CACHE_TTL only (much shorter than identities), which bounds
+how long a missed invalidation can grant access.
+
+Listings filter with accessible_clause(), a creator test OR an EXISTS on the
+assignment table, so a page is one query whatever the set size.
+
+Configuration (environment):
+  ACCESS_CACHE_TTL  seconds an access set may be served (default 5)
+"""
+import os
+
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import exists, or_, select, union
+
+from .identity import cached, candidate_id_from_subject, invalidate
+from .models import db, Candidate, CandidateJob, ResumeGenerationJob, candidate_assigned_users
+from .schema import capabilities
+
+ACCESS_CACHE_TTL = float(os.getenv("ACCESS_CACHE_TTL", "5"))
+
+
+def _access_key(user_id):
+    return f"access:{user_id}"
+
+
+def accessible_clause(user_id):
+    """WHERE clause for candidates the user created or is assigned to"""
+    created = Candidate.created_by_user_id == user_id
+    if not capabilities.has_assignments:
+        return created
+    assigned = exists().where(
+        candidate_assigned_users.c.user_id == user_id,
+        candidate_assigned_users.c.candidate_id == Candidate.id,
+    )
+    return or_(created, assigned)
+
+
+def _load_accessible_ids(user_id):
+    query = select(Candidate.id).where(Candidate.created_by_user_id == user_id)
+    if capabilities.has_assignments:
+        query = union(query, select(candidate_assigned_users.c.candidate_id)
+                      .where(candidate_assigned_users.c.user_id == user_id))
+    return frozenset(db.session.execute(query).scalars())
+
+
+def accessible_candidate_ids(user_id):
+    """Cached frozenset of candidate ids the user created or is assigned to"""
+    return cached(_access_key(user_id), lambda: _load_accessible_ids(user_id), ttl=ACCESS_CACHE_TTL)
+
+
+def can_access(user_id, candidate_id):
+    return candidate_id in accessible_candidate_ids(user_id)
+
+
+def caller_can_access(candidate_id):
+    """
+    Whether the JWT of the current request may work on `candidate_id`
+
+    Admins may use any candidate, a candidate login only itself, and a user
+    the candidates in its access set.
+    """
+    claims = get_jwt()
+    if claims.get("role") == "admin":
+        return True
+    if claims.get("role") == "candidate":
+        return candidate_id_from_subject(get_jwt_identity()) == candidate_id
+    return can_access(int(get_jwt_identity()), candidate_id)
+
+
+def access_user_ids(candidate):
+    """Users whose access sets include `candidate` (creator and assignees, as committed)"""
+    user_ids = {candidate.created_by_user_id}
+    if capabilities.has_assignments:
+        user_ids.update(db.session.execute(
+            select(candidate_assigned_users.c.user_id)
+            .where(candidate_assigned_users.c.candidate_id == candidate.id)
+        ).scalars())
+    return user_ids
+
+
+def invalidate_access(user_ids):
+    """Drop the access sets of `user_ids` after committing a change"""
+    invalidate(*(_access_key(uid) for uid in user_ids if uid is not None))
+
+
+def artifact_candidate_ids(key):
+    """Candidates whose saved resume or generation job points at artifact `key`"""
+    return set(db.session.execute(union(
+        select(CandidateJob.candidate_id).where(CandidateJob.docx_path == key),
+        select(ResumeGenerationJob.candidate_id).where(ResumeGenerationJob.result_url == key),
+    )).scalars())
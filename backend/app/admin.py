@@ -1,7 +1,13 @@
+from datetime import datetime, timedelta
 from flask import Blueprint, request, abort
 from flask_jwt_extended import jwt_required, get_jwt
-from werkzeug.security import generate_password_hash
-from .models import db, User, Candidate
+from sqlalchemy import func, literal
+from .models import db, User, Candidate, CandidateJob, candidate_assigned_users
+from .schema import capabilities
+from .loaders import load_candidates
+from .passwords import hash_password
+from .identity import invalidate_account, revoke_tokens
+from .access import access_user_ids, invalidate_access
 
 bp = Blueprint("admin", __name__)
 
@@ -11,26 +17,105 @@ def require_admin():
         abort(403, description="Admin only")
 
 # ---- Users ----
+# ?sort= keys accepted by GET /users
+USER_SORT_KEYS = {"id", "name", "email", "created_at",
+                  "candidate_count", "assigned_candidate_count", "recent_resume_count"}
+
 @bp.get("/users")
 @jwt_required()
 def list_users():
+    """
+    List users with per-user aggregates computed in a single grouped query.
+
+    Query params (all optional):
+      sort     - one of USER_SORT_KEYS (default "id")
+      order    - "asc" (default) or "desc"
+      page     - 1-based page number; paginates when given together with per_page
+      per_page - page size (max 200)
+      days     - window for recent_resume_count (default 7)
+
+    recent_resume_count counts job rows whose resume was generated within the
+    window (CandidateJob.resume_generated_at, set by every generation path),
+    for candidates the user created. Jobs do not record who requested the
+    generation, so resumes are attributed to the candidate's creator, also
+    when an assigned user or an admin generated them.
+    """
     require_admin()
     try:
-        users = User.query.order_by(User.id.asc()).all()
+        sort = request.args.get("sort", "id")
+        order = request.args.get("order", "asc").lower()
+        if sort not in USER_SORT_KEYS or order not in ("asc", "desc"):
+            return {"message": "Invalid sort or order"}, 400
+        try:
+            days = int(request.args.get("days", 7))
+            page = int(request.args["page"]) if request.args.get("page") else None
+            per_page = int(request.args["per_page"]) if request.args.get("per_page") else None
+        except ValueError:
+            return {"message": "days, page and per_page must be integers"}, 400
+        if (page is not None and page < 1) or (per_page is not None and not 1 <= per_page <= 200):
+            return {"message": "Invalid page or per_page"}, 400
+
+        since = datetime.utcnow() - timedelta(days=days)
+
+        created = (
+            db.session.query(Candidate.created_by_user_id.label("user_id"),
+                             func.count(Candidate.id).label("n"))
+            .group_by(Candidate.created_by_user_id)
+            .subquery()
+        )
+        recent = (
+            db.session.query(Candidate.created_by_user_id.label("user_id"),
+                             func.count(CandidateJob.id).label("n"))
+            .join(CandidateJob, CandidateJob.candidate_id == Candidate.id)
+            .filter(CandidateJob.resume_generated_at >= since)
+            .group_by(Candidate.created_by_user_id)
+            .subquery()
+        )
+        aggregates = {
+            "candidate_count": func.coalesce(created.c.n, 0),
+            "recent_resume_count": func.coalesce(recent.c.n, 0),
+        }
+        q = (
+            db.session.query(User)
+            .outerjoin(created, created.c.user_id == User.id)
+            .outerjoin(recent, recent.c.user_id == User.id)
+        )
+        if capabilities.has_assignments:
+            assigned = (
+                db.session.query(candidate_assigned_users.c.user_id.label("user_id"),
+                                 func.count(candidate_assigned_users.c.candidate_id).label("n"))
+                .group_by(candidate_assigned_users.c.user_id)
+                .subquery()
+            )
+            q = q.outerjoin(assigned, assigned.c.user_id == User.id)
+            aggregates["assigned_candidate_count"] = func.coalesce(assigned.c.n, 0)
+        else:
+            # Table doesn't exist yet (migration not run)
+            aggregates["assigned_candidate_count"] = literal(0)
+
+        names = ("candidate_count", "assigned_candidate_count", "recent_resume_count")
+        q = q.add_columns(*[aggregates[n].label(n) for n in names])
+
+        sort_expr = aggregates[sort] if sort in aggregates else getattr(User, sort)
+        sort_expr = sort_expr.desc() if order == "desc" else sort_expr.asc()
+        q = q.order_by(sort_expr, User.id.asc())
+
+        total = None
+        if page is not None and per_page is not None:
+            total = q.order_by(None).count()
+            q = q.offset((page - 1) * per_page).limit(per_page)
+
         users_data = []
-        for u in users:
-            user_dict = u.to_dict()
-            try:
-                # Count candidates created by this user
-                candidate_count = Candidate.query.filter_by(created_by_user_id=u.id).count()
-                user_dict['candidate_count'] = candidate_count
-            except Exception as e:
-                # If counting fails, just set to 0
-                import logging
-                logging.warning(f"Could not count candidates for user {u.id}: {e}")
-                user_dict['candidate_count'] = 0
+        for row in q.all():
+            user_dict = row[0].to_dict()
+            for n in names:
+                user_dict[n] = int(getattr(row, n) or 0)
             users_data.append(user_dict)
-        return {"users": users_data}
+
+        result = {"users": users_data}
+        if total is not None:
+            result.update({"total": total, "page": page, "per_page": per_page})
+        return result
     except Exception as e:
         import logging
         logging.error(f"Error listing users: {e}")
@@ -68,7 +153,7 @@ def create_user():
         return {"message": "Mobile number already exists"}, 409
     
     user = User(name=name, email=email, mobile=mobile,
-                password_hash=generate_password_hash(password), role=role)
+                password_hash=hash_password(password), role=role)
     db.session.add(user); db.session.commit()
     return {"message":"User created", "id": user.id}, 201
 
@@ -99,14 +184,18 @@ def update_user(user_id):
         u.mobile = new_mobile
     
     if "name" in data: u.name = data["name"].strip()
-    if "role" in data and data["role"] in {"user","admin"}: u.role = data["role"]
+    if "role" in data and data["role"] in {"user","admin"} and data["role"] != u.role:
+        u.role = data["role"]
+        revoke_tokens(u)
     if "password" in data and data["password"]:
         new_password = data["password"]
         # Validate password length - minimum 6 characters
         if len(new_password) < 6:
             return {"message": "Password must be at least 6 characters"}, 400
-        u.password_hash = generate_password_hash(new_password)
+        u.password_hash = hash_password(new_password)
+        revoke_tokens(u)
     db.session.commit()
+    invalidate_account(u)
     return {"message":"User updated"}
 
 @bp.delete("/users/<int:user_id>")
@@ -115,8 +204,21 @@ def delete_user(user_id):
     require_admin()
     u = User.query.get_or_404(user_id)
     db.session.delete(u); db.session.commit()
+    invalidate_account(u)
+    invalidate_access([user_id])
     return {"message":"User deleted"}
 
+@bp.post("/users/<int:user_id>/revoke-tokens")
+@jwt_required()
+def revoke_user_tokens(user_id):
+    """Sign the user out everywhere: every access token issued so far stops working."""
+    require_admin()
+    u = User.query.get_or_404(user_id)
+    revoke_tokens(u)
+    db.session.commit()
+    invalidate_account(u)
+    return {"message":"Tokens revoked"}
+
 @bp.get("/users/<int:user_id>/candidates")
 @jwt_required()
 def get_user_candidates(user_id):
@@ -124,7 +226,10 @@ def get_user_candidates(user_id):
     # Verify user exists
     u = User.query.get_or_404(user_id)
     # Get all candidates created by this user
-    candidates = Candidate.query.filter_by(created_by_user_id=user_id).order_by(Candidate.id.desc()).all()
+    candidates = load_candidates(
+        Candidate.query.filter_by(created_by_user_id=user_id).order_by(Candidate.id.desc()),
+        include_jobs=True,
+    )
     return {"user": u.to_dict(), "candidates": [c.to_dict(include_jobs=True) for c in candidates]}
 
 # ---- Candidates (admin view) ----
@@ -132,7 +237,8 @@ def get_user_candidates(user_id):
 @jwt_required()
 def list_all_candidates():
     require_admin()
-    cs = Candidate.query.order_by(Candidate.id.desc()).all()
+    cs = load_candidates(Candidate.query.order_by(Candidate.id.desc()),
+                         include_creator=True, include_jobs=True)
     return {"candidates":[c.to_dict(include_creator=True, include_jobs=True) for c in cs]}
 
 @bp.put("/candidates/<int:cand_id>")
@@ -143,14 +249,14 @@ def admin_update_candidate(cand_id):
     data = request.get_json() or {}
     
     try:
-        return _update_candidate_fields(c, data, cand_id)
+        return _update_candidate_fields(c, data, cand_id, access_user_ids(c))
     except Exception as e:
         db.session.rollback()
         import logging
         logging.error(f"Error updating candidate {cand_id}: {e}")
         return {"message": f"Failed to update candidate: {str(e)}"}, 500
 
-def _update_candidate_fields(c, data, cand_id):
+def _update_candidate_fields(c, data, cand_id, access_users):
     
     # Validate and update creator if provided
     if "created_by_user_id" in data:
@@ -165,9 +271,7 @@ def _update_candidate_fields(c, data, cand_id):
     if "assigned_user_ids" in data:
         try:
             # Check if the association table exists before trying to modify relationships
-            from sqlalchemy import inspect
-            inspector = inspect(db.engine)
-            if 'candidate_assigned_users' in inspector.get_table_names():
+            if capabilities.has_assignments:
                 assigned_user_ids = data.get("assigned_user_ids", [])
                 import logging
                 logging.info(f"Admin updating candidate {cand_id} with assigned_user_ids: {assigned_user_ids}")
@@ -228,7 +332,7 @@ def _update_candidate_fields(c, data, cand_id):
             return {"message": "Password must be at least 6 characters"}, 400
     
     for field in [
-        "first_name","last_name","email","phone","password","gender","nationality","citizenship_status",
+        "first_name","last_name","email","phone","gender","nationality","citizenship_status",
         "visa_status","f1_type","work_authorization","veteran_status","race_ethnicity","address_line1",
         "address_line2","city","state","postal_code","country","personal_website","linkedin",
         "github","technical_skills","work_experience","subscription_type",
@@ -239,6 +343,9 @@ def _update_candidate_fields(c, data, cand_id):
         "needs_visa_sponsorship","family_in_org","availability","education","certificates"
     ]:
         if field in data: setattr(c, field, data[field])
+    if data.get("password"):
+        c.password = hash_password(data["password"])
+        revoke_tokens(c)
         
     # booleans - convert Yes/No to boolean
     def to_bool(val):
@@ -279,6 +386,9 @@ def _update_candidate_fields(c, data, cand_id):
             return {"message": f"Invalid birthdate format. Use YYYY-MM-DD or MM/DD/YYYY"}, 400
     
     db.session.commit()
+    invalidate_account(c)
+    # Previous and new creator/assignees
+    invalidate_access(access_users | access_user_ids(c))
     return {"message":"Candidate updated"}
 
 @bp.delete("/candidates/<int:cand_id>")
@@ -286,5 +396,54 @@ def _update_candidate_fields(c, data, cand_id):
 def admin_delete_candidate(cand_id):
     require_admin()
     c = Candidate.query.get_or_404(cand_id)
+    access_users = access_user_ids(c)
     db.session.delete(c); db.session.commit()
+    invalidate_account(c)
+    invalidate_access(access_users)
     return {"message":"Candidate deleted"}
+
+# ---- Metrics ----
+@bp.get("/metrics/openai-pool")
+@jwt_required()
+def openai_pool_metrics():
+    """Shared OpenAI connection pool stats for the worker process serving this request."""
+    require_admin()
+    from .openai_client import pool_stats
+    return pool_stats()
+
+@bp.get("/metrics/llm-cache")
+@jwt_required()
+def llm_cache_metrics():
+    """LLM section cache hit/miss counters (this process, plus shared totals on Redis)."""
+    require_admin()
+    from .llm_cache import cache_stats
+    return cache_stats()
+
+@bp.get("/metrics/queues")
+@jwt_required()
+def queue_metrics():
+    """Celery queue depths and the longest wait of an unstarted interactive job per queue."""
+    require_admin()
+    from celery_config import queue_depths
+    from .models import ResumeGenerationJob
+    try:
+        depths = queue_depths()
+    except Exception as e:
+        return {"message": f"Broker unavailable: {e}"}, 503
+
+    now = datetime.utcnow()
+    oldest = (
+        db.session.query(ResumeGenerationJob.queue, func.min(ResumeGenerationJob.dispatched_at))
+        .filter(
+            ResumeGenerationJob.mode == 'interactive',
+            ResumeGenerationJob.status == 'PENDING',
+            ResumeGenerationJob.started_at.is_(None),
+            ResumeGenerationJob.dispatched_at.isnot(None),
+        )
+        .group_by(ResumeGenerationJob.queue)
+        .all()
+    )
+    for queue, dispatched_at in oldest:
+        if queue in depths:
+            depths[queue]["oldest_wait_seconds"] = round((now - dispatched_at).total_seconds())
+    return depths
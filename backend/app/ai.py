@@ -1,11 +1,12 @@
 # app/ai.py
-import os, json, re
+import json, re, traceback
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from openai import OpenAI
 from .models import Candidate
 from .utils import model_to_dict
+from .access import can_access
 from . import limiter
+from .openai_client import get_openai_client
 
 bp = Blueprint("ai", __name__)
 
@@ -19,10 +20,7 @@ def current_user_id():
     return int(get_jwt_identity())
 
 def _client():
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    return OpenAI(api_key=api_key)
+    return get_openai_client()
 
 def _naive_map(form: dict, cand: dict) -> dict:
     """Fallback when no OPENAI_API_KEY: do a tiny heuristic mapping."""
@@ -90,39 +88,10 @@ def _naive_map(form: dict, cand: dict) -> dict:
 
     return mapping
 
-@bp.post("/map-fields")
-@jwt_required()
-@limiter.limit("20 per minute")  # Limit AI requests to prevent abuse and cost overruns
-def map_fields():
-    uid = current_user_id()
-    payload = request.get_json() or {}
-    form = payload.get("form")         # dict of { field_key: {type,label,...} }
-    cand_id = payload.get("candidate_id")
-    candidate = payload.get("candidate")
-
-    if not isinstance(form, dict):
-        return {"message": "form must be an object"}, 400
+MAP_FIELDS_MODEL = "gpt-4.1-mini"
 
-    # Load candidate if only id was provided
-    if candidate is None and cand_id:
-        cobj = Candidate.query.get_or_404(int(cand_id))
-        
-        # Authorization: users can only map their own candidates
-        if not is_admin() and cobj.created_by_user_id != uid:
-            return {"message": "Access denied"}, 403
-        
-        candidate = model_to_dict(cobj, exclude=set())
-
-    if not isinstance(candidate, dict):
-        return {"message": "candidate or candidate_id is required"}, 400
-
-    # Prefer GPT if key is present
-    client = _client()
-    if not client:
-        return jsonify({"model": "naive", "mapping": _naive_map(form, candidate)}), 200
-
-    # Build prompt (very explicit)
-    rules = """
+# Prompt rules (very explicit)
+MAP_FIELDS_RULES = """
     You will receive:
     1) FORM_SCHEMA: an object whose keys are the form field identifiers (prefer `name`, else `id`).
     2) CANDIDATE: a candidate profile with fields such as first_name, last_name, email, phone, birthdate, nationality, country, technical_skills, work_experience, etc.
@@ -166,29 +135,82 @@ def map_fields():
     - Only return the final JSON mapping — no explanations, comments, or extra data
     """.strip()
 
+def _resolve_map_request():
+    """
+    Validate the request body and load the candidate.
+
+    Returns (form, candidate, None) or (None, None, error_response).
+    """
+    uid = current_user_id()
+    payload = request.get_json() or {}
+    form = payload.get("form")         # dict of { field_key: {type,label,...} }
+    cand_id = payload.get("candidate_id")
+    candidate = payload.get("candidate")
+
+    if not isinstance(form, dict):
+        return None, None, ({"message": "form must be an object"}, 400)
+
+    # Load candidate if only id was provided
+    if candidate is None and cand_id:
+        cobj = Candidate.query.get_or_404(int(cand_id))
+        
+        # Authorization: users can map candidates they created or are assigned to
+        if not is_admin() and not can_access(uid, cobj.id):
+            return None, None, ({"message": "Access denied"}, 403)
+        
+        candidate = model_to_dict(cobj, exclude={"password"})
+
+    if not isinstance(candidate, dict):
+        return None, None, ({"message": "candidate or candidate_id is required"}, 400)
+
+    return form, candidate, None
+
+def map_fields_messages(form: dict, candidate: dict) -> list:
     user = {
         "FORM_SCHEMA": form,
         "CANDIDATE": candidate
     }
-
-    msg = [
+    return [
         {"role": "system", "content": "You translate candidate data into website form values and return JSON only."},
-        {"role": "user", "content": rules + "\n\n" + json.dumps(user, ensure_ascii=False)}
+        {"role": "user", "content": MAP_FIELDS_RULES + "\n\n" + json.dumps(user, ensure_ascii=False)}
     ]
 
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=msg,
-        temperature=0.2,
-        max_tokens=700
-    )
-
-    text = (resp.choices[0].message.content or "").strip()
+def parse_mapping(text: str) -> dict:
+    text = (text or "").strip()
     # Try to parse JSON robustly
     try:
-        mapping = json.loads(text)
+        return json.loads(text)
     except Exception:
         m = re.search(r"\{.*\}", text, re.S)
-        mapping = json.loads(m.group(0)) if m else {}
+        return json.loads(m.group(0)) if m else {}
+
+# Limit AI requests to prevent abuse and cost overruns; shared so the WSGI
+# and ASGI endpoints draw from the same budget
+map_fields_limit = limiter.shared_limit("20 per minute", scope="ai_map_fields")
+
+@bp.post("/map-fields")
+@jwt_required()
+@map_fields_limit
+def map_fields():
+    form, candidate, error = _resolve_map_request()
+    if error:
+        return error
 
-    return jsonify({"model": "gpt-4.1-mini", "mapping": mapping}), 200
+    # Prefer GPT if key is present
+    client = _client()
+    if not client:
+        return jsonify({"model": "naive", "mapping": _naive_map(form, candidate)}), 200
+
+    try:
+        resp = client.chat.completions.create(
+            model=MAP_FIELDS_MODEL,
+            messages=map_fields_messages(form, candidate),
+            temperature=0.2,
+            max_tokens=700
+        )
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"message": f"OpenAI error: {e}"}), 500
+
+    mapping = parse_mapping(resp.choices[0].message.content)
+    return jsonify({"model": MAP_FIELDS_MODEL, "mapping": mapping}), 200
@@ -0,0 +1,112 @@
+# backend/app/artifacts.py
+"""
+Artifact store for generated resume files.
+
+Files are written once and keyed by the SHA-256 of their content
+("<sha256>.<ext>"); CandidateJob.docx_path and ResumeGenerationJob.result_url
+hold that key. The local filesystem store is the default. Object storage can
+be plugged in by pointing ARTIFACT_STORE_BACKEND at a "module:ClassName"
+implementing ArtifactStore.
+
+Note: the API and the Celery worker must see the same store, so separate
+hosts need a shared volume or an object-storage backend.
+"""
+import os
+import re
+import hashlib
+import tempfile
+import importlib
+from pathlib import Path
+
+ARTIFACT_STORE_BACKEND = os.getenv("ARTIFACT_STORE_BACKEND", "local")
+ARTIFACT_STORE_ROOT = os.getenv(
+    "ARTIFACT_STORE_ROOT",
+    str(Path(__file__).resolve().parent.parent / "instance" / "artifacts"),
+)
+
+MIMETYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}\.(docx|pdf)$")
+
+
+def is_artifact_key(value) -> bool:
+    return bool(value) and _KEY_RE.match(value) is not None
+
+
+def artifact_key(data: bytes, extension: str) -> str:
+    return f"{hashlib.sha256(data).hexdigest()}.{extension}"
+
+
+class ArtifactStore:
+    """Interface for artifact backends."""
+
+    def put(self, data: bytes, extension: str) -> str:
+        """Store data (idempotent) and return its key."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def open(self, key: str):
+        """Return a readable binary file object."""
+        raise NotImplementedError
+
+    def local_path(self, key: str):
+        """Filesystem path for key, or None if the backend is not local."""
+        return None
+
+
+class LocalArtifactStore(ArtifactStore):
+    def __init__(self, root: str = ARTIFACT_STORE_ROOT):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        if not is_artifact_key(key):
+            raise ValueError(f"Invalid artifact key: {key!r}")
+        # Shard by hash prefix to keep directories small
+        return self.root / key[:2] / key
+
+    def put(self, data: bytes, extension: str) -> str:
+        key = artifact_key(data, extension)
+        path = self._path(key)
+        if path.exists():
+            return key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def exists(self, key: str) -> bool:
+        return is_artifact_key(key) and self._path(key).exists()
+
+    def open(self, key: str):
+        return open(self._path(key), "rb")
+
+    def local_path(self, key: str):
+        return str(self._path(key))
+
+
+_store = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Process-wide store selected by ARTIFACT_STORE_BACKEND."""
+    global _store
+    if _store is None:
+        if ARTIFACT_STORE_BACKEND == "local":
+            _store = LocalArtifactStore()
+        else:
+            module_name, _, class_name = ARTIFACT_STORE_BACKEND.partition(":")
+            _store = getattr(importlib.import_module(module_name), class_name)()
+    return _store
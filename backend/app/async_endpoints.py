@@ -0,0 +1,388 @@
+# backend/app/async_endpoints.py
+"""
+Asyncio versions of the OpenAI-bound endpoints, served by asgi.py.
+
+  POST /api/resume/generate         (same contract as the Flask view)
+  POST /api/resume/generate-stream  (same Server-Sent Events as the Flask view)
+  POST /api/ai/map-fields           (same contract as the Flask view)
+  GET  /api/resume-async/job-stream/<job_id>
+                                    (resume job progress as Server-Sent Events)
+
+OpenAI calls run on the event loop with AsyncOpenAI, so an in-flight LLM call
+holds no thread; the job progress stream waits on redis.asyncio pub/sub the
+same way, so open streams do not use up the threads serving the Flask app. Everything else (JWT checks, rate limits, database, file
+rendering) reuses the Flask code unchanged: it runs in a worker thread inside
+a Flask request context built from the ASGI request.
+"""
+import asyncio
+import json
+import time
+import traceback
+
+import redis
+
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app import job_events, llm_cache
+from app.llm_cache import cached_completion_async
+from app.openai_client import get_async_openai_client
+from app.resume_prompts import (
+    RESUME_MODEL, RESUME_TEMPERATURE, resume_section_messages,
+)
+
+STREAM_HEARTBEAT_SECONDS = 15       # keep-alive comment (+ DB re-sync for job streams)
+JOB_STREAM_MAX_SECONDS = 600        # clients reconnect after this
+JOB_STREAM_FALLBACK_POLL_SECONDS = 3  # DB polling interval when Redis is down
+
+
+def get_async_openai():
+    """Process-wide AsyncOpenAI client, or None without OPENAI_API_KEY."""
+    return get_async_openai_client()
+
+
+class FlaskBridge:
+    """Run synchronous Flask code for an ASGI request in a worker thread."""
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+
+    def _to_response(self, rv):
+        resp = self.app.make_response(rv)
+        return Response(resp.get_data(), status_code=resp.status_code, headers=dict(resp.headers))
+
+    async def call(self, request: Request, body: bytes, fn, *args):
+        """
+        fn(*args) runs inside a request context mirroring `request`.
+
+        Returns (value, None), or (None, starlette Response) when fn raised an
+        exception Flask has a handler for (abort(), JWT errors, rate limits).
+        """
+        def run():
+            with self.app.test_request_context(
+                request.url.path,
+                method=request.method,
+                headers=list(request.headers.items()),
+                data=body,
+                query_string=request.url.query,
+                environ_base={"REMOTE_ADDR": request.client.host if request.client else "127.0.0.1"},
+            ):
+                try:
+                    return fn(*args), None
+                except Exception as e:
+                    try:
+                        return None, self._to_response(self.app.handle_user_exception(e))
+                    except Exception:
+                        traceback.print_exc()
+                        return None, JSONResponse({"message": f"Internal error: {e}"}, status_code=500)
+
+        return await run_in_threadpool(run)
+
+    async def error_response(self, rv):
+        def run():
+            with self.app.app_context():
+                return self._to_response(rv)
+
+        return await run_in_threadpool(run)
+
+    async def in_app_context(self, fn, *args):
+        def run():
+            with self.app.app_context():
+                return fn(*args)
+
+        return await run_in_threadpool(run)
+
+
+async def _complete(client, messages):
+    async def call():
+        resp = await client.chat.completions.create(
+            model=RESUME_MODEL,
+            messages=messages,
+            temperature=RESUME_TEMPERATURE,
+        )
+        return resp.choices[0].message.content or ""
+
+    return await cached_completion_async(RESUME_MODEL, RESUME_TEMPERATURE, messages, call)
+
+
+def _sections(params):
+    return resume_section_messages(params["job_desc"], params["candidate_info"], params["work_exp_str"])
+
+
+def build_routes(flask_app, middleware=None):
+    from app.ai import _naive_map, _resolve_map_request, map_fields_limit, map_fields_messages, parse_mapping, MAP_FIELDS_MODEL
+    from app.candidateresumebuilder import (
+        _parse_generate_request, _store_generated_resume, assemble_resume, resume_header_text, resume_download_name,
+        FILE_EXTENSIONS, _sse,
+    )
+    from app.artifacts import MIMETYPES
+    from app.models import db, ResumeGenerationJob
+    from app.office_pool import OfficePoolBusy
+    from app.resume_async import TERMINAL_STATUSES
+    from flask import abort
+    from flask_jwt_extended import verify_jwt_in_request
+
+    bridge = FlaskBridge(flask_app)
+
+    async def generate_resume(request: Request):
+        body = await request.body()
+        result, bridge_error = await bridge.call(request, body, _parse_generate_request)
+        if bridge_error:
+            return bridge_error
+        params, error = result
+        if error:
+            return await bridge.error_response(error)
+
+        try:
+            return await _generate_resume_file(params)
+        finally:
+            # Refunds the daily quota slot unless the resume was stored
+            await asyncio.to_thread(params["quota"].release)
+
+    async def _generate_resume_file(params):
+        client = get_async_openai()
+        sections = _sections(params)
+        try:
+            texts = await asyncio.gather(*(_complete(client, messages) for messages in sections.values()))
+        except Exception as e:
+            traceback.print_exc()
+            return JSONResponse({"message": f"OpenAI error: {e}"}, status_code=500)
+
+        merged_text = assemble_resume(params["candidate_info"], dict(zip(sections, texts)))
+        if not merged_text:
+            return JSONResponse({"message": "Resume generation failed: Empty response"}, status_code=500)
+
+        try:
+            file_data, _ = await bridge.in_app_context(_store_generated_resume, merged_text, params)
+        except OfficePoolBusy as e:
+            return JSONResponse({"message": f"PDF conversion is busy, please retry: {e}"}, status_code=503)
+        except Exception as e:
+            traceback.print_exc()
+            return JSONResponse({"message": f"File generation error: {e}"}, status_code=500)
+        params["quota"].confirm()
+
+        file_type = params["file_type"]
+        filename = resume_download_name(merged_text, file_type)
+        return Response(
+            file_data,
+            media_type=MIMETYPES[FILE_EXTENSIONS[file_type]],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    async def generate_resume_stream(request: Request):
+        body = await request.body()
+        result, bridge_error = await bridge.call(request, body, _parse_generate_request)
+        if bridge_error:
+            return bridge_error
+        params, error = result
+        if error:
+            return await bridge.error_response(error)
+
+        client = get_async_openai()
+        events = asyncio.Queue()
+
+        async def stream_section(section, messages):
+            parts = []
+            try:
+                key, cached = await asyncio.to_thread(llm_cache.lookup, RESUME_MODEL, RESUME_TEMPERATURE, messages)
+                if cached is not None:
+                    await events.put(("delta", section, cached))
+                    await events.put(("complete", section, cached))
+                    return
+                stream = await client.chat.completions.create(
+                    model=RESUME_MODEL,
+                    messages=messages,
+                    temperature=RESUME_TEMPERATURE,
+                    stream=True,
+                )
+                async with stream:
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            await events.put(("delta", section, delta))
+                await asyncio.to_thread(llm_cache.store, key, "".join(parts))
+                await events.put(("complete", section, "".join(parts)))
+            except Exception as e:
+                traceback.print_exc()
+                await events.put(("error", section, str(e)))
+
+        async def generate():
+            sections = _sections(params)
+            tasks = [asyncio.create_task(stream_section(name, msgs)) for name, msgs in sections.items()]
+            try:
+                header = resume_header_text(params["candidate_info"])
+                if header:
+                    yield _sse("delta", {"section": "header", "text": header})
+                results = {}
+                while len(results) < len(sections):
+                    try:
+                        kind, section, text = await asyncio.wait_for(events.get(), STREAM_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    if kind == "delta":
+                        yield _sse("delta", {"section": section, "text": text})
+                    elif kind == "complete":
+                        results[section] = text
+                    else:
+                        yield _sse("error", {"message": f"OpenAI error: {text}"})
+                        return
+
+                merged_text = assemble_resume(params["candidate_info"], results)
+                if not merged_text:
+                    yield _sse("error", {"message": "Resume generation failed: Empty response"})
+                    return
+
+                try:
+                    _, artifact = await bridge.in_app_context(_store_generated_resume, merged_text, params)
+                except OfficePoolBusy as e:
+                    yield _sse("error", {"message": f"PDF conversion is busy, please retry: {e}"})
+                    return
+                except Exception as e:
+                    traceback.print_exc()
+                    yield _sse("error", {"message": f"File generation error: {e}"})
+                    return
+                params["quota"].confirm()
+
+                filename = resume_download_name(merged_text, params["file_type"])
+                yield _sse("done", {
+                    "artifact": artifact,
+                    "filename": filename,
+                    "file_type": params["file_type"],
+                    "download_url": f"/api/resume/artifacts/{artifact}?name={filename}",
+                    "resume_text": merged_text,
+                })
+            finally:
+                # Client went away or we finished: stop the OpenAI streams
+                for task in tasks:
+                    task.cancel()
+
+        # Refund the quota slot unless the resume was stored; a background
+        # task runs after the stream ends, including on disconnect
+        return StreamingResponse(
+            generate(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            background=BackgroundTask(params["quota"].release),
+        )
+
+    def _authorize_map_fields():
+        verify_jwt_in_request()
+        with map_fields_limit:
+            return _resolve_map_request()
+
+    async def map_fields(request: Request):
+        body = await request.body()
+        result, bridge_error = await bridge.call(request, body, _authorize_map_fields)
+        if bridge_error:
+            return bridge_error
+        form, candidate, error = result
+        if error:
+            return await bridge.error_response(error)
+
+        client = get_async_openai()
+        if not client:
+            return JSONResponse({"model": "naive", "mapping": _naive_map(form, candidate)})
+
+        try:
+            resp = await client.chat.completions.create(
+                model=MAP_FIELDS_MODEL,
+                messages=map_fields_messages(form, candidate),
+                temperature=0.2,
+                max_tokens=700,
+            )
+        except Exception as e:
+            traceback.print_exc()
+            return JSONResponse({"message": f"OpenAI error: {e}"}, status_code=500)
+        mapping = parse_mapping(resp.choices[0].message.content)
+        return JSONResponse({"model": MAP_FIELDS_MODEL, "mapping": mapping})
+
+    def _read_job(job_id):
+        job = db.session.get(ResumeGenerationJob, job_id)
+        return job.to_dict() if job else None
+
+    def _authorize_job_stream(job_id):
+        verify_jwt_in_request()
+        payload = _read_job(job_id)
+        if payload is None:
+            abort(404)
+        return payload
+
+    async def stream_job_status(request: Request):
+        """
+        Status changes of a resume generation job as Server-Sent Events
+
+        Each event carries the same JSON as /job-status/<job_id>. The stream
+        ends once the job reaches a terminal status. When Redis is unavailable
+        the stream falls back to reading the job row every few seconds.
+        """
+        job_id = request.path_params["job_id"]
+        initial, bridge_error = await bridge.call(request, b"", _authorize_job_stream, job_id)
+        if bridge_error:
+            return bridge_error
+
+        def job_sse(payload):
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            last = initial
+            yield job_sse(last)
+            if last["status"] in TERMINAL_STATUSES:
+                return
+
+            try:
+                pubsub = await job_events.subscribe_async(job_id)
+            except redis.RedisError:
+                pubsub = None
+
+            try:
+                # Catch anything published before the subscription was active
+                payload = await bridge.in_app_context(_read_job, job_id)
+                deadline = time.monotonic() + JOB_STREAM_MAX_SECONDS
+                while time.monotonic() < deadline:
+                    if payload is not None and payload != last:
+                        last = payload
+                        yield job_sse(last)
+                        if last["status"] in TERMINAL_STATUSES:
+                            return
+                    payload = None
+
+                    if pubsub is not None:
+                        try:
+                            message = await pubsub.get_message(
+                                ignore_subscribe_messages=True, timeout=STREAM_HEARTBEAT_SECONDS
+                            )
+                        except redis.RedisError:
+                            pubsub, message = None, None
+                        if message:
+                            # Workers publish only the changed fields
+                            payload = {**last, **json.loads(message["data"])}
+                            continue
+                    else:
+                        await asyncio.sleep(JOB_STREAM_FALLBACK_POLL_SECONDS)
+
+                    # Heartbeat: keeps proxies from closing the connection and
+                    # re-syncs from the database in case a message was missed
+                    yield ": keep-alive\n\n"
+                    payload = await bridge.in_app_context(_read_job, job_id)
+            finally:
+                if pubsub is not None:
+                    await pubsub.aclose()
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    # OPTIONS is routed here too so the CORS middleware can answer preflights
+    return [
+        Route("/api/resume/generate", generate_resume, methods=["POST", "OPTIONS"], middleware=middleware),
+        Route("/api/resume/generate-stream", generate_resume_stream, methods=["POST", "OPTIONS"], middleware=middleware),
+        Route("/api/ai/map-fields", map_fields, methods=["POST", "OPTIONS"], middleware=middleware),
+        Route("/api/resume-async/job-stream/{job_id}", stream_job_status, methods=["GET", "OPTIONS"], middleware=middleware),
+    ]
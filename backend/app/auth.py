@@ -1,14 +1,29 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import (
-    create_access_token, set_access_cookies, unset_jwt_cookies,
-    jwt_required, get_jwt, get_jwt_identity
+    set_access_cookies, unset_jwt_cookies,
+    jwt_required, get_jwt_identity
 )
 from .models import db, User, Candidate
+from .identity import create_token, get_identity
+from .passwords import PasswordHashBusy, verify_password
 from . import limiter
 
 bp = Blueprint("auth", __name__)
 
+
+@bp.errorhandler(PasswordHashBusy)
+def password_hash_busy(e):
+    return {"message": "Too many logins right now, please try again"}, 503
+
+
+def check_password(account, field, password):
+    """Verify `password` against account.<field>, upgrading the stored hash if needed"""
+    ok, new_hash = verify_password(getattr(account, field), password)
+    if new_hash:
+        setattr(account, field, new_hash)
+        db.session.commit()
+    return ok
+
 # Admin login (email + password)
 @bp.post("/login-admin")
 @limiter.limit("5 per minute")  # Stricter rate limit for login
@@ -17,11 +32,10 @@ def login_admin():
     email = (data.get("email") or "").lower().strip()
     password = data.get("password")
     user = User.query.filter_by(email=email).first()
-    if not user or not check_password_hash(user.password_hash, password) or user.role != "admin":
+    if not user or not check_password(user, "password_hash", password) or user.role != "admin":
         return {"message": "Bad credentials"}, 401
 
-    token = create_access_token(identity=str(user.id),
-                                additional_claims={"role": user.role, "email": user.email, "mobile": user.mobile, "name":user.name})
+    token = create_token(user)
     # Return token in body for iOS/Safari compatibility (localStorage)
     resp = jsonify({"message": "Logged in", "role": user.role, "access_token": token})
     # Also set cookie for backward compatibility
@@ -36,11 +50,10 @@ def login_user():
     mobile = (data.get("mobile") or "").strip()
     password = data.get("password")
     user = User.query.filter_by(mobile=mobile).first()
-    if not user or not check_password_hash(user.password_hash, password) or user.role != "user":
+    if not user or not check_password(user, "password_hash", password) or user.role != "user":
         return {"message": "Bad credentials"}, 401
 
-    token = create_access_token(identity=str(user.id),
-                                additional_claims={"role": user.role, "email": user.email, "mobile": user.mobile, "name":user.name})
+    token = create_token(user)
     # Return token in body for iOS/Safari compatibility (localStorage)
     resp = jsonify({"message": "Logged in", "role": user.role, "access_token": token})
     # Also set cookie for backward compatibility
@@ -56,19 +69,10 @@ def login_candidate():
     password = data.get("password")
     
     candidate = Candidate.query.filter_by(phone=phone).first()
-    if not candidate or candidate.password != password:
+    if not candidate or not check_password(candidate, "password", password):
         return {"message": "Invalid phone number or password"}, 401
 
-    token = create_access_token(
-        identity=f"candidate_{candidate.id}",
-        additional_claims={
-            "role": "candidate",
-            "candidate_id": candidate.id,
-            "name": f"{candidate.first_name} {candidate.last_name}",
-            "email": candidate.email,
-            "phone": candidate.phone
-        }
-    )
+    token = create_token(candidate)
     # Return token in body for iOS/Safari compatibility (localStorage)
     resp = jsonify({"message": "Logged in", "role": "candidate", "access_token": token})
     # Also set cookie for backward compatibility
@@ -86,31 +90,11 @@ def logout():
 @bp.get("/me")
 @jwt_required()
 def me():
-    claims = get_jwt()
-    uid = get_jwt_identity()
-    role = claims.get("role")
-    
-    # Handle different identity formats
-    if role == "candidate":
-        # For candidates, identity is "candidate_{id}"
-        user_data = {
-            "id": claims.get("candidate_id"),
-            "name": claims.get("name"),
-            "email": claims.get("email"),
-            "phone": claims.get("phone"),
-            "mobile": claims.get("phone"),  # Alias for compatibility
-            "role": role,
-        }
-    else:
-        # For users and admins, identity is the user ID
-        user_data = {
-            "id": int(uid),
-            "name": claims.get("name"),
-            "email": claims.get("email"),
-            "mobile": claims.get("mobile"),
-            "role": role,
-        }
-    
+    # Token holds only subject, role and version; profile fields come from the identity cache
+    identity = get_identity(get_jwt_identity())
+    if identity is None:
+        return {"message": "Account not found"}, 401
+    user_data = {k: v for k, v in identity.items() if k != "version"}
     return {"user": user_data}, 200
 
 #chrom extension code
@@ -121,13 +105,12 @@ def token_admin():
     email = (data.get("email") or "").lower().strip()
     password = data.get("password")
     user = User.query.filter_by(email=email).first()
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user or not check_password(user, "password_hash", password):
         return {"message": "Bad credentials"}, 401
     # Optional: enforce admin-only
     # if user.role != "admin": return {"message": "Admin only"}, 403
 
-    token = create_access_token(identity=str(user.id),
-                                additional_claims={"role": user.role, "email": user.email, "name": user.name, "mobile": user.mobile})
+    token = create_token(user)
     return {"access_token": token, "role": user.role}
 
 @bp.post("/token-user")
@@ -137,9 +120,8 @@ def token_user():
     mobile = (data.get("mobile") or "").strip()
     password = data.get("password")
     user = User.query.filter_by(mobile=mobile).first()
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user or not check_password(user, "password_hash", password):
         return {"message": "Bad credentials"}, 401
 
-    token = create_access_token(identity=str(user.id),
-                                additional_claims={"role": user.role, "email": user.email, "name": user.name, "mobile": user.mobile})
+    token = create_token(user)
     return {"access_token": token, "role": user.role}
@@ -1,50 +1,51 @@
 # resume_blueprint.py
-from flask import Blueprint, request, send_file, jsonify
-from openai import OpenAI
+from flask import Blueprint, Response, abort, request, send_file, jsonify, stream_with_context, url_for
+from flask_jwt_extended import get_jwt, jwt_required
+from werkzeug.utils import secure_filename
 from io import BytesIO
 import os
 import re
+import copy
+import json
+import queue
+import threading
 import traceback
-from datetime import datetime, timedelta
+from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
 # ------- Word (python-docx) -------
 from docx import Document
 from docx.shared import Pt, Inches
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 
 # ------- PDF (LibreOffice conversion) -------
-import tempfile
-import subprocess
-import platform
+from app.office_pool import convert_docx_to_pdf, OfficePoolBusy
+from app.resume_model import as_resume, is_section_title, parse_resume
+from app.resume_prompts import (
+    RESUME_MODEL, RESUME_TEMPERATURE, RESUME_SECTION_ORDER, RESUME_SECTION_TITLES,
+    resume_header, resume_section_messages, split_candidate_info,
+)
 
 # ------- Database imports -------
 from app.models import db, CandidateJob, Candidate
+from app.artifacts import get_artifact_store, is_artifact_key, MIMETYPES
+from app.access import artifact_candidate_ids, caller_can_access
+from app.openai_client import get_openai_client
+from app.llm_cache import cached_completion, lookup as llm_lookup, store as llm_store
+from app import quota
+from app.quota import Reservation
 
 bp = Blueprint("resume", __name__)
 
 # ---- Config: Load API key from environment variable ----
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# ---- Section detection ----
-SECTION_TITLES = {
-    "professional summary",
-    "summary",
-    "technical skills",
-    "skills",
-    "professional experience",
-    "experience",
-    "work experience",
-    "work history",
-    "education",
-    "certifications",
-    "projects",
-    "additional qualifications",
-    "additional information",
-    "references",
-}
+# ---- PDF renderer: "libreoffice" (DOCX -> PDF round-trip) or "native" (reportlab) ----
+PDF_RENDERERS = ("libreoffice", "native")
+PDF_RENDERER = os.getenv("PDF_RENDERER", "libreoffice").strip().lower()
 
 def clean_markdown(text: str) -> str:
     if not text:
@@ -58,27 +59,7 @@ def clean_markdown(text: str) -> str:
     text = re.sub(r"\n{3,}", "\n\n", text)
     return text.strip()
 
-def is_contact_line(line: str) -> bool:
-    if not line:
-        return False
-    l = line.lower()
-    return (
-        "email" in l
-        or "@" in l
-        or "phone" in l
-        or re.search(r"\b\d{10}\b", l) is not None
-        or re.search(r"\+\d", l) is not None
-    )
-
-def is_section_title(line: str) -> bool:
-    if not line:
-        return False
-    raw = line.strip().rstrip(":")
-    return raw.lower() in SECTION_TITLES
-
-def add_horizontal_rule(paragraph):
-    p = paragraph._p
-    pPr = p.get_or_add_pPr()
+def add_horizontal_rule(pPr):
     pBdr = OxmlElement('w:pBdr')
     bottom = OxmlElement('w:bottom')
     bottom.set(qn('w:val'), 'single')
@@ -88,175 +69,153 @@ def add_horizontal_rule(paragraph):
     pBdr.append(bottom)
     pPr.append(pBdr)
 
-# ---- Word building helpers ----
-def add_candidate_name(doc, lines, idx):
-    if idx < len(lines):
-        name_para = doc.add_paragraph(lines[idx])
-        name_para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-        run = name_para.runs[0]
-        run.bold = True
-        run.font.size = Pt(20)
-        idx += 1
-    return idx
-
-def add_contact_info(doc, lines, idx):
-    contact_email, contact_phone, contact_location = "", "", ""
-    while idx < len(lines) and is_contact_line(lines[idx]):
-        line = lines[idx]
-        email_match = re.search(r"[\w\.-]+@[\w\.-]+", line)
-        if email_match:
-            contact_email = email_match.group(0)
-        phone_match = re.search(r"(\+?\d[\d\s\-]{8,}\d)", line)
-        if phone_match:
-            contact_phone = phone_match.group(0).strip()
-        loc_match = re.search(r"Location\s*[:\-]?\s*(.*)", line, re.IGNORECASE)
-        if loc_match:
-            contact_location = loc_match.group(1).strip()
-        idx += 1
-
-    if contact_email or contact_phone or contact_location:
-        pieces = []
-        if contact_email:
-            pieces.append(f"Email: {contact_email}")
-        if contact_phone:
-            pieces.append(f"Mobile: {contact_phone}")
-        if contact_location:
-            pieces.append(f"Location: {contact_location}")
-        contact_line = "  |  ".join(pieces)
-        contact_para = doc.add_paragraph(contact_line)
-        contact_para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-        contact_para.runs[0].font.size = Pt(11)
-
-    return idx
-
-def add_section_title(doc, title, idx):
-    p = doc.add_paragraph(title.upper().rstrip(":"))
-    p.paragraph_format.space_before = Pt(12)
-    p.paragraph_format.space_after = Pt(4)
-    r = p.runs[0]
-    r.bold = True
-    r.font.size = Pt(12)
-    add_horizontal_rule(p)
-    return idx + 1
-
-def add_skills_section(doc, lines, idx):
-    idx = add_section_title(doc, lines[idx], idx)
-    category = None
-    skills = []
-    while idx < len(lines) and not is_section_title(lines[idx]):
-        line = lines[idx].strip()
-        if not line:
-            idx += 1
-            continue
+# ---- Word template: page setup + named styles, built once per process ----
+# Paragraphs reference these by style id, so per-paragraph formatting is a
+# single w:pStyle instead of run/paragraph property mutations.
+STYLE_NAME = "ResumeName"
+STYLE_CONTACT = "ResumeContact"
+STYLE_SECTION = "ResumeSection"
+STYLE_COMPANY = "ResumeCompany"
+STYLE_ROLE = "ResumeRole"
+STYLE_HEADING = "ResumeHeading"
+STYLE_TECHNOLOGIES = "ResumeTechnologies"
+STYLE_BULLET = "ResumeBullet"
+STYLE_LIST_BULLET = "ListBullet"
+
+# Built-in styles kept in the template; the rest of the default set is dropped
+_KEEP_STYLES = {"Normal", "DefaultParagraphFont", "TableNormal", "NoList", STYLE_LIST_BULLET}
+
+_template = None
+_template_lock = threading.Lock()
+
+def _add_paragraph_style(doc, style_id, size=None, bold=None, center=False,
+                         space_before=None, space_after=None, base=None):
+    style = doc.styles.add_style(style_id, WD_STYLE_TYPE.PARAGRAPH)
+    style.base_style = doc.styles[base or "Normal"]
+    style.quick_style = True
+    if size is not None:
+        style.font.size = Pt(size)
+    if bold is not None:
+        style.font.bold = bold
+    if center:
+        style.paragraph_format.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    if space_before is not None:
+        style.paragraph_format.space_before = Pt(space_before)
+    if space_after is not None:
+        style.paragraph_format.space_after = Pt(space_after)
+    return style
+
+def build_resume_template() -> Document:
+    doc = Document()
+    for section in doc.sections:
+        section.top_margin = Inches(0.5)
+        section.bottom_margin = Inches(0.5)
+        section.left_margin = Inches(0.5)
+        section.right_margin = Inches(0.5)
 
-        # Case 1: Inline list under an existing category
-        if category and not line.startswith("-") and "," in line:
-            skills = [s.strip() for s in line.split(",") if s.strip()]
-            p = doc.add_paragraph()
-            r1 = p.add_run(category + ": ")
-            r1.bold = True
-            p.add_run(", ".join(skills))
-            category, skills = None, []
-
-        # Case 2: New category line
-        elif not line.startswith("-"):
-            if category and skills:
-                p = doc.add_paragraph()
-                r1 = p.add_run(category + ": ")
-                r1.bold = True
-                p.add_run(", ".join(skills))
-            category = line
-            skills = []
-
-        # Case 3: Bulleted skill
-        else:
-            skills.append(line.lstrip("- ").strip())
-        idx += 1
-
-    # Flush last category
-    if category and skills:
-        p = doc.add_paragraph()
-        r1 = p.add_run(category + ": ")
-        r1.bold = True
-        p.add_run(", ".join(skills))
-    return idx
-
-def add_experience_section(doc, lines, idx):
-    idx = add_section_title(doc, lines[idx], idx)
-    company_seen = False
-    while idx < len(lines) and not is_section_title(lines[idx]):
-        line = lines[idx]
-
-        # Company – Location OR Role – Dates
-        if " – " in line and ":" not in line:
-            if " to " in line:  # role line
-                p = doc.add_paragraph(line)
-                run = p.runs[0]
-                run.bold = True
-                run.font.size = Pt(10)
-            else:  # company line
-                p = doc.add_paragraph(line)
-                run = p.runs[0]
-                run.bold = True
-                run.font.size = Pt(11)
-                if company_seen:
-                    p.paragraph_format.space_before = Pt(10)
-                company_seen = True
-
-        elif " – " in line and ":" in line:  # job + bullets in same line
-            job_title, rest = line.split(":", 1)
-            p = doc.add_paragraph(job_title.strip())
-            p.runs[0].bold = True
-            parts = re.split(r'\.\s+|,\s+', rest)
-            for part in parts:
-                if part.strip():
-                    bullet_para = doc.add_paragraph(part.strip(), style="List Bullet")
-                    bullet_para.paragraph_format.left_indent = Inches(0.25)
-
-        elif line.startswith("Technologies Used"):
-            heading, _, techs = line.partition(":")
-            p = doc.add_paragraph()
-            r1 = p.add_run(heading.strip() + ": ")
-            r1.bold = True
-            p.add_run(techs.strip())
-            p.paragraph_format.space_after = Pt(10)
-
-        elif line.startswith("- "):  # standard bullets
-            bullet_para = doc.add_paragraph(line[2:].strip(), style="List Bullet")
-            bullet_para.paragraph_format.left_indent = Inches(0.25)
+    styles_el = doc.styles.element
+    for style_el in list(styles_el.findall(qn("w:style"))):
+        if style_el.get(qn("w:styleId")) not in _KEEP_STYLES:
+            styles_el.remove(style_el)
+
+    style = doc.styles['Normal']
+    font = style.font
+    font.name = 'Calibri'
+    font.size = Pt(11)
+    para_format = style.paragraph_format
+    para_format.space_after = Pt(0)
+    para_format.space_before = Pt(0)
+    para_format.line_spacing = 1
+    para_format.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
+
+    _add_paragraph_style(doc, STYLE_NAME, size=20, bold=True, center=True)
+    _add_paragraph_style(doc, STYLE_CONTACT, size=11, center=True)
+    section_style = _add_paragraph_style(doc, STYLE_SECTION, size=12, bold=True, space_before=12, space_after=4)
+    add_horizontal_rule(section_style.element.get_or_add_pPr())
+    _add_paragraph_style(doc, STYLE_COMPANY, size=11, bold=True)
+    _add_paragraph_style(doc, STYLE_ROLE, size=10, bold=True)
+    _add_paragraph_style(doc, STYLE_HEADING, bold=True)
+    _add_paragraph_style(doc, STYLE_TECHNOLOGIES, space_after=10)
+    bullet = _add_paragraph_style(doc, STYLE_BULLET, base="List Bullet")
+    bullet.paragraph_format.left_indent = Inches(0.25)
+    return doc
+
+def new_resume_document() -> Document:
+    """Fresh copy of the process-wide template document."""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = build_resume_template()
+    return copy.deepcopy(_template)
+
+# ---- Word building helpers ----
+def add_styled_paragraph(doc, text, style_id):
+    p = doc.add_paragraph(text)
+    # Set the id directly; assigning by name makes python-docx scan every style
+    p._p.style = style_id
+    return p
+
+def add_candidate_name(doc, name):
+    add_styled_paragraph(doc, name, STYLE_NAME)
+
+def add_contact_info(doc, pieces):
+    add_styled_paragraph(doc, "  |  ".join(pieces), STYLE_CONTACT)
+
+def add_section_title(doc, title):
+    add_styled_paragraph(doc, title, STYLE_SECTION)
+
+def add_bullet(doc, text, indent=True):
+    return add_styled_paragraph(doc, text, STYLE_BULLET if indent else STYLE_LIST_BULLET)
+
+def add_labelled_paragraph(doc, label, text, style_id=None):
+    p = doc.add_paragraph()
+    if style_id:
+        p._p.style = style_id
+    p.add_run(label + ": ").bold = True
+    p.add_run(text)
+    return p
+
+def add_skills_section(doc, section):
+    for category in section.skills:
+        add_labelled_paragraph(doc, category.name, ", ".join(category.skills))
+
+def add_experience_section(doc, section):
+    for entry in section.entries:
+        if entry.kind == "role":
+            add_styled_paragraph(doc, entry.text, STYLE_ROLE)
+        elif entry.kind == "company":
+            p = add_styled_paragraph(doc, entry.text, STYLE_COMPANY)
+            if entry.spaced:
+                p.paragraph_format.space_before = Pt(10)
+        elif entry.kind == "heading":
+            add_styled_paragraph(doc, entry.text, STYLE_HEADING)
+        elif entry.kind == "technologies":
+            add_labelled_paragraph(doc, entry.label, entry.text, STYLE_TECHNOLOGIES)
+        elif entry.kind == "bullet":
+            add_bullet(doc, entry.text)
         else:
-            doc.add_paragraph(line)
-        idx += 1
-    return idx
-
-def add_certifications_section(doc, lines, idx):
-    idx = add_section_title(doc, lines[idx], idx)
-    while idx < len(lines) and not is_section_title(lines[idx]):
-        line = lines[idx].lstrip("- ").strip()
-        if line:
-            doc.add_paragraph(line, style="List Bullet")
-        idx += 1
-    return idx
-
-def add_education_section(doc, lines, idx):
-    idx = add_section_title(doc, lines[idx], idx)
-    while idx < len(lines) and not is_section_title(lines[idx]):
-        doc.add_paragraph(lines[idx])
-        idx += 1
-    return idx
-
-def add_summary_section(doc, lines, idx):
-    idx = add_section_title(doc, lines[idx], idx)
-    while idx < len(lines) and not is_section_title(lines[idx]):
-        line = lines[idx].strip()
-        if not line:
-            idx += 1
-            continue
-        text = line[2:].strip() if line.startswith("- ") else line
-        bullet_para = doc.add_paragraph(text, style="List Bullet")
-        bullet_para.paragraph_format.left_indent = Inches(0.25)
-        idx += 1
-    return idx
+            doc.add_paragraph(entry.text)
+
+def add_certifications_section(doc, section):
+    for text in section.bullets:
+        add_bullet(doc, text, indent=False)
+
+def add_education_section(doc, section):
+    for line in section.lines:
+        doc.add_paragraph(line)
+
+def add_summary_section(doc, section):
+    for text in section.bullets:
+        add_bullet(doc, text)
+
+SECTION_WRITERS = {
+    "summary": add_summary_section,
+    "skills": add_skills_section,
+    "experience": add_experience_section,
+    "certifications": add_certifications_section,
+    "education": add_education_section,
+}
 
 def extract_total_experience(candidate_info: str) -> str:
     candidate_info = candidate_info.replace("–", "-").replace("—", "-")
@@ -289,100 +248,125 @@ def extract_total_experience(candidate_info: str) -> str:
     return f"Total Experience: {years} years {m} months"
 
 # ---- Word generator ----
-def create_resume_word(content: str) -> Document:
-    doc = Document()
-    for section in doc.sections:
-        section.top_margin = Inches(0.5)
-        section.bottom_margin = Inches(0.5)
-        section.left_margin = Inches(0.5)
-        section.right_margin = Inches(0.5)
+def create_resume_word(content) -> Document:
+    """Build the .docx from resume text or a parsed ResumeDocument."""
+    doc = new_resume_document()
+
+    resume = as_resume(content)
+    if resume.name is not None:
+        add_candidate_name(doc, resume.name)
+    if resume.contact:
+        add_contact_info(doc, resume.contact)
+
+    for section in resume.sections:
+        add_section_title(doc, section.title)
+        writer = SECTION_WRITERS.get(section.kind)
+        if writer:
+            writer(doc, section)
+    return doc
 
-    style = doc.styles['Normal']
-    font = style.font
-    font.name = 'Calibri'
-    font.size = Pt(11)
-    para_format = style.paragraph_format
-    para_format.space_after = Pt(0)
-    para_format.space_before = Pt(0)
-    para_format.line_spacing = 1
-    para_format.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
+def resolve_pdf_renderer(value=None) -> str:
+    """Per-request renderer choice, falling back to PDF_RENDERER."""
+    renderer = (value or PDF_RENDERER).strip().lower()
+    if renderer not in PDF_RENDERERS:
+        raise ValueError(f"Invalid pdf_renderer. Use one of: {', '.join(PDF_RENDERERS)}.")
+    return renderer
 
-    lines = [ln.strip("• ").strip() for ln in content.splitlines() if ln and str(ln).strip()]
-    idx = 0
-
-    idx = add_candidate_name(doc, lines, idx)
-    idx = add_contact_info(doc, lines, idx)
-
-    while idx < len(lines):
-        if is_section_title(lines[idx]):
-            section_key = lines[idx].strip().rstrip(":").lower()
-            if section_key in ("professional summary", "summary"):
-                idx = add_summary_section(doc, lines, idx)
-            elif section_key in ("skills", "technical skills"):
-                idx = add_skills_section(doc, lines, idx)
-            elif section_key in ("work experience", "professional experience"):
-                idx = add_experience_section(doc, lines, idx)
-            elif section_key == "certifications":
-                idx = add_certifications_section(doc, lines, idx)
-            elif section_key == "education":
-                idx = add_education_section(doc, lines, idx)
-            else:
-                idx = add_section_title(doc, lines[idx], idx)
-        else:
-            idx += 1
-    return doc
+def create_resume_pdf(resume_text, renderer: str = None) -> BytesIO:
+    if resolve_pdf_renderer(renderer) == "native":
+        from app.resume_pdf import render_pdf
+        return BytesIO(render_pdf(resume_text))
 
-def create_resume_pdf(resume_text: str) -> BytesIO:
     # 1) Create a DOCX via the same builder
-    tmp_docx = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
-    doc = create_resume_word(resume_text)
-    doc.save(tmp_docx.name)
-
-    # 2) Choose LibreOffice executable
-    system = platform.system()
-    soffice_path = (
-        r"C:\Program Files\LibreOffice\program\soffice.exe" if system == "Windows" else "libreoffice"
-    )
-
-    # 3) Convert DOCX -> PDF
-    try:
-        subprocess.run(
-            [soffice_path, "--headless", "--convert-to", "pdf", tmp_docx.name, "--outdir", os.path.dirname(tmp_docx.name)],
-            check=True
-        )
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"LibreOffice PDF conversion failed: {e}")
-    except FileNotFoundError:
-        raise RuntimeError(f"LibreOffice not found at {soffice_path}. Install it or update the path.")
-
-    tmp_pdf_path = os.path.splitext(tmp_docx.name)[0] + ".pdf"
-    with open(tmp_pdf_path, "rb") as f:
-        pdf_bytes = BytesIO(f.read())
-
-    # 4) Cleanup temps
-    try:
-        os.remove(tmp_docx.name)
-        os.remove(tmp_pdf_path)
-    except OSError:
-        pass
+    docx_buffer = BytesIO()
+    create_resume_word(resume_text).save(docx_buffer)
 
+    # 2) Convert DOCX -> PDF on a pooled LibreOffice (one-shot if no pool)
+    pdf_bytes = BytesIO(convert_docx_to_pdf(docx_buffer.getvalue()))
     pdf_bytes.seek(0)
     return pdf_bytes
 
+# ---- File rendering shared by the sync endpoint and the Celery task ----
+FILE_EXTENSIONS = {"word": "docx", "pdf": "pdf"}
+
+def render_resume_file(merged_text, file_type: str, pdf_renderer: str = None) -> bytes:
+    """Render resume text (or its parsed ResumeDocument) to .docx or .pdf bytes."""
+    if file_type == "word":
+        buffer = BytesIO()
+        create_resume_word(merged_text).save(buffer)
+        return buffer.getvalue()
+    if file_type == "pdf":
+        return create_resume_pdf(merged_text, pdf_renderer).getvalue()
+    raise ValueError("Invalid file_type. Use 'word' or 'pdf'.")
+
+def resume_download_name(merged_text: str, file_type: str) -> str:
+    """Download filename derived from the candidate name on the first line."""
+    lines = (merged_text or "").strip().splitlines()
+    candidate_name = lines[0].strip() if lines else ""
+    safe_name = re.sub(r'[^A-Za-z0-9]+', '_', candidate_name) or "Candidate"
+    return f"{safe_name}_resume.{FILE_EXTENSIONS[file_type]}"
+
 # ----------------------------
 # Helpers for merging sections
 # ----------------------------
+def merge_resume_sections(raw_main: str, raw_exp: str) -> str:
+    """Clean both LLM outputs and append Work Experience after the main sections."""
+    main_content = clean_markdown(raw_main).strip()
+    work_exp_content = clean_markdown(raw_exp).strip()
+
+    if work_exp_content and not work_exp_content.upper().startswith("WORK EXPERIENCE"):
+        work_exp_content = "WORK EXPERIENCE\n" + work_exp_content
+
+    return (main_content + "\n\n" + work_exp_content).strip()
+
 def _ensure_title(text: str) -> str:
     return re.sub(r"\b(work experience)\b", "WORK EXPERIENCE", text, flags=re.IGNORECASE)
 
-# ---- API endpoint (Blueprint) ----
-@bp.post("/generate")
-def generate_resume():
-    # Inputs
+def resume_header_text(candidate_info: str) -> str:
+    """Name + contact lines built from structured candidate_info ("" for free-form input)."""
+    fields = split_candidate_info(candidate_info)
+    return resume_header(fields) if fields else ""
+
+def assemble_resume(candidate_info: str, outputs: dict) -> str:
+    """
+    Join the raw outputs of resume_section_messages() into the resume text.
+
+    Returns "" when every section came back empty.
+    """
+    if "main" in outputs:
+        return merge_resume_sections(outputs["main"], outputs.get("experience", ""))
+
+    parts = []
+    for name in RESUME_SECTION_ORDER:
+        text = clean_markdown(outputs.get(name, "")).strip()
+        if not text:
+            continue
+        if not is_section_title(text.split("\n", 1)[0]):
+            text = f"{RESUME_SECTION_TITLES[name]}\n{text}"
+        parts.append(text)
+    if not parts:
+        return ""
+    return "\n\n".join([resume_header_text(candidate_info)] + parts).strip()
+
+def generate_sections(sections: dict, complete) -> dict:
+    """Run complete(messages) for every section in parallel; returns {section: raw text}."""
+    with ThreadPoolExecutor(max_workers=max(1, len(sections))) as executor:
+        futures = {name: executor.submit(complete, messages) for name, messages in sections.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+# ---- Request handling shared by /generate and /generate-stream ----
+def _parse_generate_request():
+    """
+    Validate the generation request body and reserve a daily quota slot.
+
+    Returns (params, None) on success or (None, error_response). On success
+    params["quota"] is a Reservation the caller confirms once the resume is
+    stored, and releases in any case (a no-op after confirm).
+    """
     try:
         data = request.get_json(force=True, silent=False)
     except Exception:
-        return jsonify({"message": "Invalid JSON"}), 400
+        return None, (jsonify({"message": "Invalid JSON"}), 400)
 
     job_desc = (data or {}).get("job_desc", "").strip()
     candidate_info = (data or {}).get("candidate_info", "").strip()
@@ -391,267 +375,303 @@ def generate_resume():
     job_row_id = (data or {}).get("job_row_id")
 
     if not job_desc or not candidate_info:
-        return jsonify({"message": "Missing required fields"}), 400
+        return None, (jsonify({"message": "Missing required fields"}), 400)
+
+    if file_type not in FILE_EXTENSIONS:
+        return None, (jsonify({"message": "Invalid file_type. Use 'word' or 'pdf'."}), 400)
 
-    work_exp_str = extract_total_experience(candidate_info)
+    try:
+        pdf_renderer = resolve_pdf_renderer((data or {}).get("pdf_renderer"))
+    except ValueError as e:
+        return None, (jsonify({"message": str(e)}), 400)
 
-    # Daily limit: Silver subscribers can generate up to 50 resumes per UTC day
     candidate_record = None
     if candidate_id is not None:
         try:
             candidate_id = int(candidate_id)
         except (TypeError, ValueError):
-            return jsonify({"message": "Invalid candidate_id"}), 400
+            return None, (jsonify({"message": "Invalid candidate_id"}), 400)
 
         candidate_record = Candidate.query.get(candidate_id)
         if not candidate_record:
-            return jsonify({"message": "Candidate not found"}), 404
-
-        if (candidate_record.subscription_type or "").lower() == "silver":
-            start_of_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            next_day = start_of_day + timedelta(days=1)
-            generated_today = (
-                CandidateJob.query
-                .filter(
-                    CandidateJob.candidate_id == candidate_id,
-                    CandidateJob.resume_content.isnot(None),
-                    CandidateJob.created_at >= start_of_day,
-                    CandidateJob.created_at < next_day,
-                )
-                .count()
-            )
+            return None, (jsonify({"message": "Candidate not found"}), 404)
 
-            if generated_today >= 50:
-                return jsonify({"message": "Your daily resume limit has been exceeded. Please try again tomorrow."}), 429
+    # Parse everything that can fail before a quota slot is reserved
+    try:
+        work_exp_str = extract_total_experience(candidate_info)
+    except ValueError as e:
+        return None, (jsonify({"message": f"Invalid work experience duration: {e}"}), 400)
 
     # Validate OpenAI API key
     if not OPENAI_API_KEY:
-        return jsonify({"message": "OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."}), 500
-    
-    # OpenAI client with timeout
-    try:
-        client = OpenAI(api_key=OPENAI_API_KEY, timeout=120.0)
-    except Exception as e:
-        return jsonify({"message": f"OpenAI client init error: {e}"}), 500
-
-    # --- Prompts from the new script (main sections + experience), run in parallel ---
-    def generate_main_sections():
-        prompt = f"""
-            You are a professional resume writer. Using the Job Description and Candidate Information provided below, generate a clean, ATS-optimized resume that strictly follows the section order and formatting rules listed here:
-
-            ⚠️ IMPORTANT: Output must contain the **resume only** — do not include explanations, disclaimers, notes, or extra text outside of the resume.
-
-            SECTION ORDER:
-
-            1. **PROFESSIONAL SUMMARY** – Generate **6 to 8 bullet points**.  
-                - The **first bullet point** must always mention the candidate's **total years of professional experience**. If this information is present in the JOB DESCRIPTION, use the role mentioned there when framing the experience.  
-                    WORK EXPERIENCE: {work_exp_str}  
-                - Represent the total experience as **"X+ years of experience"** (e.g., *5+ years*, *6+ years*).  
-                - Each bullet point must be **at least 2 lines long**, providing rich, detailed information. Avoid short or generic bullets.  
-                - The **remaining bullet points** (6–8 total) should comprehensively highlight the candidate’s **key skills, achievements, career milestones, and qualifications** that align closely with the given Job Description.  
-                - Each bullet must **start with "- "** (a hyphen followed by a space).  
-  
-            2. **SKILLS** – Based on the Job Description and Candidate Information:
-
-                1. Identify the **most relevant role/position** (e.g., .NET Developer, Java Backend Engineer, Salesforce Developer, Data Engineer, DevOps Engineer).
-                2. Create a **resume-ready Skills section** with **10–12 subsections**, tailored to that role and the JD.
-
-                ⚠️ RULES:
-                - Subsections must be **category-based** and recruiter-friendly (e.g., Programming Languages, Frameworks & Libraries, Databases, Cloud Platforms, DevOps & CI/CD, Testing & QA, Security & Compliance, Monitoring & Observability, Collaboration Tools).
-                - Use concise, ATS-optimized, professional wording for subsection titles.
-                - Fill each subsection with **8–20 related technologies/tools**, directly matching the JD and candidate info.
-                - Where possible, **expand categories with specific services or tools** (e.g., list AWS services like EC2, S3, Glue, Lambda, CloudWatch — not just "AWS").
-                - Always mirror exact JD keywords (e.g., if JD says "GCP, Spark, BigQuery, Kafka" → those must appear under correct categories).
-                - Include versions where impactful (e.g., Java 11/17, .NET 6/7, Spring Boot 3.x, Hadoop 3.x).
-                - Do not invent irrelevant categories or mix unrelated technologies into the wrong subsection.
-                - Always include these **mandatory baseline categories**, even if not explicitly in the JD:
-                    - Programming Languages  
-                    - Operating Systems  
-                    - Cloud Platforms
-                    - DevOps & CI/CD Tools  
-                    - Development Tools                   
-
-                Example subsections (adjust dynamically per JD):  
-                - Programming Languages  
-                - Frameworks & Libraries  
-                - Databases & Data Warehousing  
-                - Big Data & Streaming  
-                - Cloud Platforms  
-                - DevOps & CI/CD Tools  
-                - Testing & QA  
-                - Security & Compliance  
-                - Monitoring & Observability  
-                - Collaboration Tools  
-                - Documentation Tools  
-                - Operating Systems  
-
-                ⚠️ Ensure each subsection is **fully loaded with at least 8 skills** and contains **16–20 skills where possible**.
-                ⚠️ All technologies listed here must also appear in the **Technologies Used** lines under the WORK EXPERIENCE section.
-
-
-
-            3. **CERTIFICATIONS**
-
-            4. **EDUCATION** 
-                Format the education section clearly and consistently using the structure shown below. 
-
-                Example Format:
-                    MS in Computer Science
-                    University of XYZ, USA | GPA: 3.8/4.0
-                    B.Tech in Computer Science Engineering
-                    JNTU Hyderabad | Percentage: 85%
-
-                Make sure the formatting follows this structure exactly:
-                [Degree] in [Field of Study]
-                [University Name] | [GPA or Percentage]
-
-                Do not include additional details like thesis titles, coursework, or graduation years unless specifically asked.
-            
-            ⚠️ IMPORTANT: Do NOT generate the WORK EXPERIENCE section. It will be added separately.
-
-            FORMATTING RULES:
-            - Display the candidate's **Name** at the top.
-            - Center **Email**, **Phone Number**, and **Candidate Location** on the same line directly below the name, using the format:  
-            Email: | Mobile: | Location:
-            - Use 0.5-inch page margins.
-            - Add a tab space before each bullet point.
-            - Do not use markdown or bullet characters like "-", "*", or "•".
-            - The **SKILLS** section must always follow the defined categories above—never as a plain list.
-            - Always ensure the final resume spans at least 2 full pages of Word or PDF output.
-
-            JOB DESCRIPTION:
-            {job_desc}
-
-            CANDIDATE INFORMATION:
-            {candidate_info}
-            """
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You write polished, ATS-friendly resumes."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.3,
-        )
-        return resp.choices[0].message.content or ""
-
-    def generate_work_experience():
-        exp_prompt = f"""
-            Generate ONLY the WORK EXPERIENCE section for this resume.
-
-            3. **WORK EXPERIENCE** – Merge **Work History** and **Work Experience** into a unified section. For each job role:
-                - ⚠️ IMPORTANT: Use WORK EXPERIENCE from the CANDIDATE INFORMATION only
-                - Include the Job Title, Company Name (bold), Job Location, and timeline using the format:
-                    [Company Name] – [Job Location]  
-                    [Job Title] – [Start Month Year] to [End Month Year]
-
-            - Add 10 to 15 high-impact bullet points per role. Each bullet point must:
-            - Each bullet point must be exactly 2 lines long, with rich and specific details — including technologies used, metrics, project outcomes, team collaboration, challenges faced, and business impact.
-            - "When generating points for each company, first identify the industry it operates in, and then tailor the points to be relevant to that specific industry projects.
-            - Start with a strong action verb (e.g., Spearheaded, Engineered, Optimized, Automated, Delivered).
-            - Focus on achievements, measurable outcomes, and business value rather than just responsibilities.
-            - Include quantifiable results wherever possible (e.g., improved ETL performance by 35%, reduced deployment time by 40%, cut costs by 20% annually).
-            - Highlight leadership, innovation, automation, and cross-functional collaboration.
-            - Showcase modern practices (e.g., Cloud Migration, DevOps, CI/CD automation, Data Engineering, AI/ML, Security, Scalability).
-            - Be specific, technical, and results-driven — not generic.
-            
-
-            - ⚠️ Validate technology usage against the job timeline:
-            - ONLY include technologies, tools, frameworks, or platforms that were **publicly available and in practical use** during the given employment period.
-            - Example: Do NOT include Generative AI, Azure OpenAI, MS Fabric, or other technologies launched post-2021 in roles dated 2020 or earlier.
-            - Ensure all technologies and practices mentioned are **realistically applicable** based on release year and industry adoption timeline.
-
-            - Total bullet points should follow this logic:
-            - For 1 company: 15 to 20 bullet points.
-            - For 2 companies: 15 to 20 bullet points each (total: 30-40 points).
-            - For 3 companies: 10 to 15 bullet points each (total: 30-45 points).
-            - For 4 companies: 10 to 15 bullet points each (total: 40-60 points).
-            - For 5 companies: 10 to 15 bullet points each (total: 60-70 points).
-            - For 6 companies: 10 to 15 bullet points each (total: 70-80 points).
-            - For 7 companies: 10 to 15 bullet points each (total: 70-80 points).
-
-            - No filler or repetition: Each bullet point must offer unique, concrete contributions or achievements.
-
-            - Write in professional resume tone, use strong action verbs, and focus on clarity, impact, and relevance to technical or engineering roles.
-
-            - End each job section with the line:  
-            Technologies Used: tech1, tech2, ..., tech15  
-                ⚠️ Ensure each role includes 10 to 15 technologies mapped directly from the SKILLS section.  
-                ⚠️ Across all roles, the union of technologies must comprehensively cover the entire SKILLS section.
-
-            JOB DESCRIPTION:
-            {job_desc}
-
-            CANDIDATE INFORMATION:
-            {candidate_info}
-            """
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You write only the Work Experience section for ATS resumes."},
-                {"role": "user", "content": exp_prompt},
-            ],
-            temperature=0.3,
-        )
-        return resp.choices[0].message.content or ""
-
-    try:
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            main_future = executor.submit(generate_main_sections)
-            exp_future = executor.submit(generate_work_experience)
-            raw_main = main_future.result()
-            raw_exp = exp_future.result()
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify({"message": f"OpenAI error: {e}"}), 500
-
-    # Merge like new script (append Work Experience at the end), with cleanup
-    main_content = clean_markdown(raw_main).strip()
-    work_exp_content = clean_markdown(raw_exp).strip()
+        return None, (jsonify({"message": "OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."}), 500)
 
-    if work_exp_content and not work_exp_content.upper().startswith("WORK EXPERIENCE"):
-        work_exp_content = "WORK EXPERIENCE\n" + work_exp_content
-
-    merged_text = (main_content + "\n\n" + work_exp_content).strip()
-    if not merged_text:
-        return jsonify({"message": "Resume generation failed: Empty response"}), 500
+    # Daily limit: reserve this generation's slot last, once nothing else can
+    # reject the request; the caller confirms or releases it
+    reservation = Reservation()
+    if candidate_record:
+        try:
+            reservation = Reservation(candidate_id, quota.reserve(candidate_record))
+        except quota.QuotaExceeded as e:
+            return None, (jsonify({"message": str(e)}), 429)
+
+    return {
+        "job_desc": job_desc,
+        "candidate_info": candidate_info,
+        "file_type": file_type,
+        "pdf_renderer": pdf_renderer,
+        "candidate_id": candidate_id,
+        "job_row_id": job_row_id,
+        "work_exp_str": work_exp_str,
+        "quota": reservation,
+    }, None
+
+def _store_generated_resume(merged_text, params):
+    """Render, store the artifact and save the text on the job row; returns (file_data, artifact)."""
+    file_type = params["file_type"]
+
+    # Parse once; the document is rendered here and stored for later re-renders
+    resume = parse_resume(merged_text)
+
+    # File assembly; the rendered file goes to the artifact store so it can
+    # be downloaded again without regenerating
+    file_data = render_resume_file(resume, file_type, params["pdf_renderer"])
+    artifact = get_artifact_store().put(file_data, FILE_EXTENSIONS[file_type])
 
     # Save resume content to database
+    candidate_id, job_row_id = params["candidate_id"], params["job_row_id"]
     if candidate_id and job_row_id:
         try:
             job_row = CandidateJob.query.filter_by(id=job_row_id, candidate_id=candidate_id).first()
             if job_row:
                 job_row.resume_content = merged_text
+                job_row.resume_generated_at = datetime.utcnow()
+                job_row.resume_document = resume.to_json()
+                job_row.docx_path = artifact
                 db.session.commit()
         except Exception as e:
             print(f"Warning: Failed to save resume content to database: {e}")
+    return file_data, artifact
 
-    # File assembly
-    candidate_name = merged_text.splitlines()[0].strip()
-    safe_name = re.sub(r'[^A-Za-z0-9]+', '_', candidate_name) or "Candidate"
-
+# ---- API endpoint (Blueprint) ----
+@bp.post("/generate")
+def generate_resume():
+    params, error = _parse_generate_request()
+    if error:
+        return error
     try:
-        if file_type == "word":
-            buffer = BytesIO()
-            doc = create_resume_word(merged_text)
-            doc.save(buffer)
-            buffer.seek(0)
-            return send_file(
-                buffer,
-                as_attachment=True,
-                download_name=f"{safe_name}_resume.docx",
-                mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            )
-        elif file_type == "pdf":
-            buffer = create_resume_pdf(merged_text)
-            return send_file(
-                buffer,
-                as_attachment=True,
-                download_name=f"{safe_name}_resume.pdf",
-                mimetype="application/pdf"
+        return _generate_resume_file(params)
+    finally:
+        # Refunds the daily quota slot unless the resume was stored
+        params["quota"].release()
+
+def _generate_resume_file(params):
+    job_desc = params["job_desc"]
+    candidate_info = params["candidate_info"]
+    file_type = params["file_type"]
+    work_exp_str = params["work_exp_str"]
+
+    # Shared, pooled OpenAI client (see app/openai_client.py)
+    try:
+        client = get_openai_client()
+    except Exception as e:
+        return jsonify({"message": f"OpenAI client init error: {e}"}), 500
+
+    # --- Resume sections, run in parallel (raw outputs cached by prompt) ---
+    def complete(messages):
+        def call():
+            resp = client.chat.completions.create(
+                model=RESUME_MODEL,
+                messages=messages,
+                temperature=RESUME_TEMPERATURE,
             )
-        else:
-            return jsonify({"message": "Invalid file_type. Use 'word' or 'pdf'."}), 400
+            return resp.choices[0].message.content or ""
+        return cached_completion(RESUME_MODEL, RESUME_TEMPERATURE, messages, call)
+
+    # Each section is its own cached call, so only sections whose inputs
+    # changed since an earlier resume reach OpenAI
+    try:
+        outputs = generate_sections(resume_section_messages(job_desc, candidate_info, work_exp_str), complete)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"message": f"OpenAI error: {e}"}), 500
+
+    merged_text = assemble_resume(candidate_info, outputs)
+    if not merged_text:
+        return jsonify({"message": "Resume generation failed: Empty response"}), 500
+
+    try:
+        file_data, _ = _store_generated_resume(merged_text, params)
+    except OfficePoolBusy as e:
+        return jsonify({"message": f"PDF conversion is busy, please retry: {e}"}), 503
     except Exception as e:
         traceback.print_exc()
         return jsonify({"message": f"File generation error: {e}"}), 500
+    params["quota"].confirm()
+
+    return send_file(
+        BytesIO(file_data),
+        as_attachment=True,
+        download_name=resume_download_name(merged_text, file_type),
+        mimetype=MIMETYPES[FILE_EXTENSIONS[file_type]]
+    )
+
+
+# ---- Streaming variant: forward OpenAI deltas as Server-Sent Events ----
+STREAM_HEARTBEAT_SECONDS = 15
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@bp.post("/generate-stream")
+def generate_resume_stream():
+    """
+    Same request body as /generate, answered as text/event-stream:
+
+      event: delta   {"section": <section>, "text": "..."}
+      event: done    {"artifact", "filename", "file_type", "download_url", "resume_text"}
+      event: error   {"message": "..."}
+
+    <section> is "header" or a key of resume_section_messages() ("summary",
+    "skills", "certifications", "education", "experience", or "main" for
+    free-form candidate_info). All sections stream in parallel; the file is
+    rendered and stored once all are complete, and fetched from download_url.
+    """
+    params, error = _parse_generate_request()
+    if error:
+        return error
+
+    try:
+        client = get_openai_client()
+    except Exception as e:
+        params["quota"].release()
+        return jsonify({"message": f"OpenAI client init error: {e}"}), 500
+
+    events = queue.Queue()
+    cancelled = threading.Event()
+
+    def stream_section(section, messages):
+        parts = []
+        try:
+            key, cached = llm_lookup(RESUME_MODEL, RESUME_TEMPERATURE, messages)
+            if cached is not None:
+                events.put(("delta", section, cached))
+                events.put(("complete", section, cached))
+                return
+            stream = client.chat.completions.create(
+                model=RESUME_MODEL,
+                messages=messages,
+                temperature=RESUME_TEMPERATURE,
+                stream=True,
+            )
+            with stream:
+                for chunk in stream:
+                    if cancelled.is_set():
+                        return
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        events.put(("delta", section, delta))
+            llm_store(key, "".join(parts))
+            events.put(("complete", section, "".join(parts)))
+        except Exception as e:
+            traceback.print_exc()
+            events.put(("error", section, str(e)))
+
+    def generate():
+        sections = resume_section_messages(params["job_desc"], params["candidate_info"], params["work_exp_str"])
+        executor = ThreadPoolExecutor(max_workers=len(sections))
+        try:
+            header = resume_header_text(params["candidate_info"])
+            if header:
+                yield _sse("delta", {"section": "header", "text": header})
+            for section, messages in sections.items():
+                executor.submit(stream_section, section, messages)
+
+            results = {}
+            while len(results) < len(sections):
+                try:
+                    kind, section, text = events.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if kind == "delta":
+                    yield _sse("delta", {"section": section, "text": text})
+                elif kind == "complete":
+                    results[section] = text
+                else:
+                    yield _sse("error", {"message": f"OpenAI error: {text}"})
+                    return
+
+            merged_text = assemble_resume(params["candidate_info"], results)
+            if not merged_text:
+                yield _sse("error", {"message": "Resume generation failed: Empty response"})
+                return
+
+            try:
+                _, artifact = _store_generated_resume(merged_text, params)
+            except OfficePoolBusy as e:
+                yield _sse("error", {"message": f"PDF conversion is busy, please retry: {e}"})
+                return
+            except Exception as e:
+                traceback.print_exc()
+                yield _sse("error", {"message": f"File generation error: {e}"})
+                return
+            params["quota"].confirm()
+
+            filename = resume_download_name(merged_text, params["file_type"])
+            yield _sse("done", {
+                "artifact": artifact,
+                "filename": filename,
+                "file_type": params["file_type"],
+                "download_url": url_for("resume.download_artifact", key=artifact, name=filename),
+                "resume_text": merged_text,
+            })
+        finally:
+            # Client went away or we finished: stop reading the OpenAI streams
+            cancelled.set()
+            executor.shutdown(wait=False)
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Refund the quota slot unless the resume was stored (also when the
+    # client disconnects before the stream starts)
+    response.call_on_close(params["quota"].release)
+    return response
+
+def _may_download(key):
+    """True when the caller can access a candidate the artifact was generated for"""
+    if get_jwt().get("role") == "admin":
+        return True
+    return any(caller_can_access(cand_id) for cand_id in artifact_candidate_ids(key))
+
+
+@bp.get("/artifacts/<key>")
+@jwt_required()
+def download_artifact(key):
+    """
+    Download a stored resume by artifact key (content hash, as returned by /generate-stream)
+
+    Only for admins and callers with access to a candidate whose job row or
+    generation job holds the key; anything else is a 404.
+    """
+    if not is_artifact_key(key) or not _may_download(key):
+        abort(404)
+    store = get_artifact_store()
+    if not store.exists(key):
+        abort(404)
+    extension = key.rsplit(".", 1)[-1]
+    download_name = secure_filename(request.args.get("name", "")) or f"resume.{extension}"
+    local_path = store.local_path(key)
+    return send_file(
+        local_path or store.open(key),
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=MIMETYPES[extension],
+        conditional=True,
+        etag=key.split(".")[0],
+        max_age=3600
+    )
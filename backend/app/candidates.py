@@ -1,10 +1,21 @@
 # server/candidates.py
-from flask import Blueprint, request, abort
+from flask import Blueprint, Response, request, abort, send_file
+from io import BytesIO
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
 from .models import db, Candidate, CandidateJob
+from .schema import capabilities
+from .loaders import candidate_options
+from .passwords import hash_password
+from .identity import candidate_id_from_subject, get_identity, invalidate_account, revoke_tokens
+from .access import access_user_ids, accessible_clause, can_access, invalidate_access
 
 bp = Blueprint("candidates", __name__)
 
+# Upper bound for ?limit= on the candidate listing
+MAX_PAGE_SIZE = 200
+
 def current_user_id():
     return int(get_jwt_identity())
 
@@ -12,7 +23,7 @@ def current_candidate_id():
     """Extract candidate ID from JWT for candidate logins"""
     claims = get_jwt()
     if claims.get("role") == "candidate":
-        return claims.get("candidate_id")
+        return candidate_id_from_subject(get_jwt_identity())
     return None
 
 def is_admin():
@@ -24,17 +35,10 @@ def owns_or_404(cand: Candidate, uid: int):
     # Admins can access any candidate
     if is_admin():
         return
-    # Check if user is creator OR assigned to this candidate
     if not cand:
         abort(404)
-    is_creator = cand.created_by_user_id == uid
-    # Check if user is assigned (backward compatible)
-    try:
-        is_assigned = any(u.id == uid for u in (cand.assigned_users or []))
-    except Exception:
-        # Table doesn't exist yet (migration not run)
-        is_assigned = False
-    if not (is_creator or is_assigned):
+    # Creator or assigned user: one lookup in the user's cached access set
+    if not can_access(uid, cand.id):
         abort(404)
 
 # Helper function to convert Yes/No strings to boolean
@@ -50,29 +54,65 @@ def to_bool(val):
 @bp.get("")
 @jwt_required()
 def list_my_candidates():
+    """
+    List candidates created by or assigned to the current user, newest first.
+
+    Query params (all optional):
+      limit  - page size; enables keyset pagination on id DESC
+      cursor - "next_cursor" value from the previous page
+      fields - "summary" leaves out jobs and the large text columns;
+               load jobs per candidate via GET /api/candidates/<id>/jobs
+    """
     uid = current_user_id()
-    from .models import User
-    user = User.query.get(uid)
-    if not user:
+    if get_identity(str(uid)) is None:
         abort(404, description="User not found")
-    
-    # Get candidates created by user
-    created_candidates = Candidate.query.filter_by(created_by_user_id=uid).all()
-    
-    # Get candidates assigned to user (backward compatible)
+
+    summary = (request.args.get("fields") or "").lower() == "summary"
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
     try:
-        assigned_candidates = user.assigned_candidates.all()
-    except Exception:
-        # Table doesn't exist yet (migration not run)
-        assigned_candidates = []
-    
-    # Combine and remove duplicates (in case user is both creator and assigned)
-    all_candidates = {c.id: c for c in created_candidates + assigned_candidates}
-    
-    # Sort by ID descending
-    sorted_candidates = sorted(all_candidates.values(), key=lambda x: x.id, reverse=True)
-    
-    return {"candidates": [c.to_dict(include_jobs=True) for c in sorted_candidates]}
+        limit = int(limit) if limit else None
+        cursor = int(cursor) if cursor else None
+    except (TypeError, ValueError):
+        return {"message": "limit and cursor must be integers"}, 400
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        return {"message": f"limit must be between 1 and {MAX_PAGE_SIZE}"}, 400
+
+    # Created or assigned (EXISTS on the assignment table), one query per page
+    page = _candidate_page(accessible_clause(uid), cursor, limit, summary)
+
+    next_cursor = None
+    if limit is not None and len(page) > limit:
+        page = page[:limit]
+        next_cursor = page[-1].id
+
+    if summary:
+        job_counts = dict(
+            db.session.query(CandidateJob.candidate_id, func.count(CandidateJob.id))
+            .filter(CandidateJob.candidate_id.in_([c.id for c in page]))
+            .group_by(CandidateJob.candidate_id)
+            .all()
+        ) if page else {}
+        items = [c.to_summary_dict(job_count=job_counts.get(c.id, 0)) for c in page]
+    else:
+        items = [c.to_dict(include_jobs=True) for c in page]
+
+    return {"candidates": items, "next_cursor": next_cursor}
+
+def _candidate_page(access, cursor, limit, summary):
+    """Fetch one page of candidates (id DESC) matching the access clause."""
+    q = Candidate.query.filter(access)
+    if cursor is not None:
+        q = q.filter(Candidate.id < cursor)
+    if summary:
+        q = q.options(load_only(*[getattr(Candidate, k) for k in Candidate.SUMMARY_COLUMNS]))
+    else:
+        q = q.options(*candidate_options(include_jobs=True))
+    q = q.order_by(Candidate.id.desc())
+    if limit is not None:
+        # One extra row tells us whether another page exists
+        q = q.limit(limit + 1)
+    return q.all()
 
 @bp.post("")
 @jwt_required()
@@ -156,7 +196,7 @@ def create_candidate():
             email=data.get("email"),
             phone=data.get("phone"),
             subscription_type=data.get("subscription_type"),
-            password=data.get("password"),
+            password=hash_password(data.get("password")),
             role=data.get("role"),
             ssn=data.get("ssn"),
             gender=data.get("gender"),
@@ -229,9 +269,7 @@ def create_candidate():
         # Handle assigned users (admin only) - with defensive check
         if is_admin() and "assigned_user_ids" in data:
             try:
-                from sqlalchemy import inspect as sql_inspect
-                inspector = sql_inspect(db.engine)
-                if 'candidate_assigned_users' in inspector.get_table_names():
+                if capabilities.has_assignments:
                     assigned_user_ids = data.get("assigned_user_ids", [])
                     import logging
                     logging.info(f"Creating candidate with assigned_user_ids: {assigned_user_ids}")
@@ -255,6 +293,7 @@ def create_candidate():
                 logging.error(traceback.format_exc())
         
         db.session.commit()
+        invalidate_access(access_user_ids(c))
         return {"message": "Candidate created", "id": c.id}, 201
     except Exception as e:
         db.session.rollback()
@@ -270,6 +309,7 @@ def update_candidate(cand_id):
         c = Candidate.query.get_or_404(cand_id)
         owns_or_404(c, uid)
         data = request.get_json() or {}
+        access_users = access_user_ids(c) if "assigned_user_ids" in data else set()
         
         # Validate email if being updated
         if "email" in data:
@@ -338,7 +378,8 @@ def update_candidate(cand_id):
         
         # Handle password separately - only update if provided and not empty
         if "password" in data and data.get("password") and data.get("password").strip():
-            c.password = data.get("password")
+            c.password = hash_password(data.get("password"))
+            revoke_tokens(c)
 
         for field in ["willing_relocate", "willing_travel", "disability_status", "military_experience"]:
             if field in data:
@@ -376,9 +417,7 @@ def update_candidate(cand_id):
         # Handle assigned users (admin only) - with defensive check
         if is_admin() and "assigned_user_ids" in data:
             try:
-                from sqlalchemy import inspect as sql_inspect
-                inspector = sql_inspect(db.engine)
-                if 'candidate_assigned_users' in inspector.get_table_names():
+                if capabilities.has_assignments:
                     assigned_user_ids = data.get("assigned_user_ids", [])
                     import logging
                     logging.info(f"Updating candidate {cand_id} with assigned_user_ids: {assigned_user_ids}")
@@ -405,6 +444,10 @@ def update_candidate(cand_id):
                 logging.error(traceback.format_exc())
 
         db.session.commit()
+        invalidate_account(c)
+        if access_users:
+            # Previous and new creator/assignees
+            invalidate_access(access_users | access_user_ids(c))
         return {"message": "Candidate updated"}
     except Exception as e:
         db.session.rollback()
@@ -418,8 +461,11 @@ def delete_candidate(cand_id):
     uid = current_user_id()
     c = Candidate.query.get_or_404(cand_id)
     owns_or_404(c, uid)
+    access_users = access_user_ids(c)
     db.session.delete(c)
     db.session.commit()
+    invalidate_account(c)
+    invalidate_access(access_users)
     return {"message": "Candidate deleted"}
 
 # --------- DETAIL + JOBS SUBRESOURCE (the missing bits) ---------
@@ -463,7 +509,7 @@ def add_job(cand_id):
     
     if role == "candidate":
         # Candidate can only add jobs to their own profile
-        candidate_id = claims.get("candidate_id")
+        candidate_id = current_candidate_id()
         if candidate_id != cand_id:
             abort(403)  # Forbidden
     else:
@@ -493,7 +539,7 @@ def update_job(cand_id, row_id):
     
     if role == "candidate":
         # Candidate can only update their own jobs
-        candidate_id = claims.get("candidate_id")
+        candidate_id = current_candidate_id()
         if candidate_id != cand_id:
             abort(403)
     else:
@@ -528,7 +574,7 @@ def delete_job(cand_id, row_id):
     
     if role == "candidate":
         # Candidate can only delete their own jobs
-        candidate_id = claims.get("candidate_id")
+        candidate_id = current_candidate_id()
         if candidate_id != cand_id:
             abort(403)
     else:
@@ -541,6 +587,69 @@ def delete_job(cand_id, row_id):
     db.session.commit()
     return {"message": "deleted"}
 
+@bp.get("/<int:cand_id>/jobs/<int:row_id>/resume")
+@jwt_required()
+def render_job_resume(cand_id, row_id):
+    """
+    Render the generated resume for a job row from its stored document.
+
+    ?format=html | text | word | pdf (default html); ?pdf_renderer= for pdf.
+    Rows generated before documents were stored are parsed once and backfilled.
+    """
+    from .resume_model import ResumeDocument, parse_resume
+    from .resume_preview import PREVIEW_FORMATS, render_html, render_text
+    from .candidateresumebuilder import (
+        FILE_EXTENSIONS, render_resume_file, resolve_pdf_renderer, resume_download_name,
+    )
+    from .artifacts import MIMETYPES
+    from .office_pool import OfficePoolBusy
+
+    claims = get_jwt()
+    c = Candidate.query.get_or_404(cand_id)
+    if claims.get("role") == "candidate":
+        if current_candidate_id() != cand_id:
+            abort(403)
+    else:
+        owns_or_404(c, current_user_id())
+
+    fmt = (request.args.get("format") or "html").strip().lower()
+    if fmt not in PREVIEW_FORMATS and fmt not in FILE_EXTENSIONS:
+        return {"message": "Invalid format. Use 'html', 'text', 'word' or 'pdf'."}, 400
+
+    row = (
+        CandidateJob.query
+        .options(load_only(CandidateJob.id, CandidateJob.resume_content, CandidateJob.resume_document))
+        .filter_by(id=row_id, candidate_id=c.id)
+        .first_or_404()
+    )
+    if not row.resume_content:
+        return {"message": "No resume generated for this job yet"}, 404
+
+    resume = ResumeDocument.from_json(row.resume_document)
+    if resume is None:
+        resume = parse_resume(row.resume_content)
+        row.resume_document = resume.to_json()
+        db.session.commit()
+
+    if fmt == "html":
+        return Response(render_html(resume), mimetype=PREVIEW_FORMATS[fmt])
+    if fmt == "text":
+        return Response(render_text(resume), mimetype=PREVIEW_FORMATS[fmt])
+
+    try:
+        pdf_renderer = resolve_pdf_renderer(request.args.get("pdf_renderer"))
+        file_data = render_resume_file(resume, fmt, pdf_renderer)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    except OfficePoolBusy as e:
+        return {"message": f"PDF conversion is busy, please retry: {e}"}, 503
+    return send_file(
+        BytesIO(file_data),
+        as_attachment=True,
+        download_name=resume_download_name(row.resume_content, fmt),
+        mimetype=MIMETYPES[FILE_EXTENSIONS[fmt]],
+    )
+
 # --------- CANDIDATE SELF-SERVICE (for candidate login) ---------
 
 @bp.get("/me")
@@ -622,4 +731,5 @@ def update_my_profile():
             return {"message": "Invalid birthdate format. Use YYYY-MM-DD or MM/DD/YYYY"}, 400
     
     db.session.commit()
+    invalidate_account(candidate)
     return {"message": "Profile updated successfully", "candidate": candidate.to_dict(include_creator=False, include_jobs=True)}
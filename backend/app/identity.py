@@ -0,0 +1,281 @@
+# backend/app/identity.py
+"""
+Compact access tokens and a per-process identity cache.
+
+Access tokens carry only the subject ("<user id>" or "candidate_<id>"), the
+role and the account's token_version. Everything else an endpoint needs about
+the caller (name, email, phone) is looked up here, from a small LRU with a
+short TTL, so a request does not reload the User/Candidate row.
+
+Every token is checked against the cached identity (see the blocklist loader
+in app/__init__.py): a token is refused when its account is gone, its role
+changed or its version is behind the account's. Bumping token_version
+therefore revokes all of an account's tokens.
+
+When an account changes, invalidate() drops its entry in this process and
+publishes the key on a Redis channel; every other API process listens on it
+and drops its copy too. A value loaded while its key is invalidated is not
+stored, so a revocation racing a cache fill is not lost.
+
+While the listener is not subscribed (Redis down, or before the first
+connect) other processes' invalidations are missed, so new entries are kept
+for IDENTITY_CACHE_DEGRADED_TTL only. The listener retries every
+REDIS_RETRY_SECONDS and, once back, clears the whole cache: it cannot tell
+which keys changed meanwhile, and one reload per active account is cheaper
+than serving a revoked token until its entry expires.
+
+Configuration (environment):
+  IDENTITY_CACHE_TTL           seconds an entry may be served (default 30)
+  IDENTITY_CACHE_DEGRADED_TTL  the same while invalidations cannot be
+                               received (default 2)
+  IDENTITY_CACHE_SIZE          LRU bound on the number of entries (default 10000)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from flask_jwt_extended import create_access_token
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "30"))
+IDENTITY_CACHE_DEGRADED_TTL = float(os.getenv("IDENTITY_CACHE_DEGRADED_TTL", "2"))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+
+INVALIDATE_CHANNEL = "identity:invalidate"
+INVALIDATE_ALL = "*"
+REDIS_RETRY_SECONDS = 5              # wait this long before resubscribing after an error
+CANDIDATE_PREFIX = "candidate_"
+
+
+class TTLCache:
+    """
+    Thread-safe LRU whose entries expire after `ttl` seconds
+
+    pop() and clear() also advance a generation, so a value loaded while its
+    key was being invalidated is not stored (see cached()).
+    """
+
+    def __init__(self, ttl=IDENTITY_CACHE_TTL, max_entries=IDENTITY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()    # key -> (expires_at, value)
+        self._counter = 0                # bumped on every pop/clear
+        self._invalidated = OrderedDict()  # key -> counter at its last pop
+        self._floor = 0                  # generation of keys not in _invalidated
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """(found, value)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def generation(self, key):
+        with self._lock:
+            return self._invalidated.get(key, self._floor)
+
+    def set(self, key, value, ttl=None, generation=None):
+        """Store `value`; skipped (False) when `key` was invalidated since `generation`"""
+        with self._lock:
+            if generation is not None and self._invalidated.get(key, self._floor) != generation:
+                return False
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._counter += 1
+            self._invalidated[key] = self._counter
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.max_entries:
+                # Forgotten keys report the newest generation dropped, so a
+                # load that started before it still sees a change
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counter += 1
+            self._invalidated.clear()
+            self._floor = self._counter
+
+    def size(self):
+        return len(self._entries)
+
+
+cache = TTLCache()
+
+_client = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+_subscribed = threading.Event()      # set while invalidations are being received
+
+
+def _redis():
+    global _client
+    if _client is None:
+        _client = redis.from_url(REDIS_URL, decode_responses=True, socket_connect_timeout=2)
+    return _client
+
+
+def _listen():
+    """Drop entries other processes invalidate; runs in a daemon thread per process"""
+    resubscribe = False
+    while True:
+        try:
+            pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATE_CHANNEL)
+            if resubscribe:
+                # Messages may have been missed while disconnected
+                cache.clear()
+            resubscribe = True
+            _subscribed.set()
+            for message in pubsub.listen():
+                if message["data"] == INVALIDATE_ALL:
+                    cache.clear()
+                else:
+                    cache.pop(message["data"])
+        except redis.RedisError as e:
+            _subscribed.clear()
+            print(f"Warning: Identity cache invalidation unavailable: {e}")
+            time.sleep(REDIS_RETRY_SECONDS)
+
+
+def _ensure_listener():
+    """Start the listener in this process (again after a fork)"""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid != os.getpid():
+            _listener_pid = os.getpid()
+            threading.Thread(target=_listen, name="identity-invalidate", daemon=True).start()
+
+
+def cached(key, load, ttl=None):
+    """
+    Value for `key` from the cache, calling load() on a miss (None results are cached too)
+
+    If `key` is invalidated while load() runs, the loaded value may predate
+    the change, so it is returned but not stored.
+    """
+    _ensure_listener()
+    found, value = cache.get(key)
+    if not found:
+        generation = cache.generation(key)
+        value = load()
+        if not _subscribed.is_set():
+            ttl = min(cache.ttl if ttl is None else ttl, IDENTITY_CACHE_DEGRADED_TTL)
+        cache.set(key, value, ttl=ttl, generation=generation)
+    return value
+
+
+def invalidate(*keys):
+    """Drop keys here and in every other process"""
+    for key in keys:
+        cache.pop(key)
+        try:
+            _redis().publish(INVALIDATE_CHANNEL, key)
+        except redis.RedisError as e:
+            print(f"Warning: Failed to publish identity invalidation for {key}: {e}")
+
+
+# ---- Subjects and tokens ----
+
+def subject_for(account):
+    from .models import Candidate
+
+    if isinstance(account, Candidate):
+        return f"{CANDIDATE_PREFIX}{account.id}"
+    return str(account.id)
+
+
+def candidate_id_from_subject(subject):
+    """Candidate id of a "candidate_<id>" subject, else None"""
+    if subject and subject.startswith(CANDIDATE_PREFIX):
+        return int(subject[len(CANDIDATE_PREFIX):])
+    return None
+
+
+def create_token(account):
+    """Access token with only subject, role and token version"""
+    identity = _identity_of(account)
+    return create_access_token(
+        identity=subject_for(account),
+        additional_claims={"role": identity["role"], "ver": identity["version"]},
+    )
+
+
+def _identity_of(account):
+    from .models import Candidate
+
+    if isinstance(account, Candidate):
+        return {
+            "id": account.id,
+            "name": f"{account.first_name} {account.last_name}",
+            "email": account.email,
+            "phone": account.phone,
+            "mobile": account.phone,  # Alias for compatibility
+            "role": "candidate",
+            "version": account.token_version or 0,
+        }
+    return {
+        "id": account.id,
+        "name": account.name,
+        "email": account.email,
+        "mobile": account.mobile,
+        "role": account.role,
+        "version": account.token_version or 0,
+    }
+
+
+def _load_identity(subject):
+    from .models import db, User, Candidate
+
+    cand_id = candidate_id_from_subject(subject)
+    if cand_id is not None:
+        account = db.session.get(Candidate, cand_id)
+    else:
+        account = db.session.get(User, int(subject))
+    return _identity_of(account) if account else None
+
+
+def get_identity(subject):
+    """Cached identity dict for a token subject, or None if the account no longer exists"""
+    return cached(f"identity:{subject}", lambda: _load_identity(subject))
+
+
+def is_revoked(jwt_payload):
+    """True when the token's account is gone or its role or version moved on"""
+    try:
+        identity = get_identity(jwt_payload["sub"])
+    except (KeyError, ValueError):
+        return True
+    return (
+        identity is None
+        or identity["role"] != jwt_payload.get("role")
+        or identity["version"] != jwt_payload.get("ver", 0)
+    )
+
+
+def revoke_tokens(account):
+    """Invalidate every token issued so far; call before committing"""
+    account.token_version = (account.token_version or 0) + 1
+
+
+def invalidate_account(account):
+    """Drop the cached identity after the account changed; call after committing"""
+    invalidate(f"identity:{subject_for(account)}")
@@ -0,0 +1,54 @@
+# backend/app/job_events.py
+"""
+Resume job progress events over Redis pub/sub.
+
+Celery workers publish every progress transition to a channel keyed by the
+task id; the API subscribes and streams them to the browser as
+Server-Sent Events (see async_endpoints.stream_job_status).
+"""
+import os
+import json
+import redis
+import redis.asyncio
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+CHANNEL_PREFIX = "resume_progress:"
+
+_client = None
+_async_client = None
+
+
+def _redis():
+    global _client
+    if _client is None:
+        _client = redis.from_url(REDIS_URL, decode_responses=True, socket_connect_timeout=2)
+    return _client
+
+
+def channel_for(task_id):
+    return f"{CHANNEL_PREFIX}{task_id}"
+
+
+def publish_progress(task_id, payload: dict):
+    """Publish a job status snapshot; never fails the caller."""
+    try:
+        _redis().publish(channel_for(task_id), json.dumps(payload))
+    except redis.RedisError as e:
+        print(f"Warning: Failed to publish progress for {task_id}: {e}")
+
+
+def subscribe(task_id):
+    """Return a PubSub subscribed to the job's channel (raises RedisError if down)."""
+    pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(channel_for(task_id))
+    return pubsub
+
+
+async def subscribe_async(task_id):
+    """redis.asyncio PubSub subscribed to the job's channel (raises RedisError if down)."""
+    global _async_client
+    if _async_client is None:
+        _async_client = redis.asyncio.from_url(REDIS_URL, decode_responses=True, socket_connect_timeout=2)
+    pubsub = _async_client.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(channel_for(task_id))
+    return pubsub
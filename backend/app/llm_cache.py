@@ -0,0 +1,244 @@
+# backend/app/llm_cache.py
+"""
+Content-addressed cache for raw LLM section outputs.
+
+Entries are keyed by SHA-256 of (model, temperature, normalized messages),
+so a resume generated as Word is reused verbatim when the same inputs are
+requested as PDF, and the sync, streaming, async and Celery paths all share
+one cache. Only the raw completion text is cached; merging, parsing and
+rendering always run.
+
+Entries are disposable, so the cache may live on an allkeys-lru instance,
+but not on the one holding the quota counters (see app/quota.py), which
+must never be evicted. An entry is one section's text, typically 1-8 KB, so
+LLM_CACHE_MAX_ENTRIES x 8 KB (40 MB at the default) should fit in the
+instance's maxmemory next to whatever else it holds; lower the bound (or
+the TTL) on small plans rather than letting Redis evict broker data.
+
+Configuration (environment):
+  LLM_CACHE_BACKEND      "redis" (default, shared by API and workers),
+                         "memory" (per process) or "off"
+  LLM_CACHE_REDIS_URL    Redis for the cache (default REDIS_URL)
+  LLM_CACHE_TTL          seconds an entry lives (default 86400)
+  LLM_CACHE_MAX_ENTRIES  LRU bound on the number of entries (default 5000)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+LLM_CACHE_REDIS_URL = os.getenv('LLM_CACHE_REDIS_URL') or REDIS_URL
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "redis").strip().lower()
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+KEY_PREFIX = "llm_cache:v1:"
+INDEX_KEY = "llm_cache:index"        # sorted set: key -> last access time (LRU order)
+STATS_KEY = "llm_cache:stats"        # hash: hits / misses / stores across processes
+REDIS_RETRY_SECONDS = 30             # skip Redis this long after a connection error
+
+_BLANK_RUNS = re.compile(r"\n{3,}")
+
+
+def normalize_prompt(text: str) -> str:
+    """Whitespace-insensitive form of a prompt: unified newlines, no trailing spaces or blank-line runs."""
+    text = (text or "").replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return _BLANK_RUNS.sub("\n\n", text).strip()
+
+
+def cache_key(model: str, temperature: float, messages: list) -> str:
+    payload = {
+        "model": model,
+        "temperature": round(float(temperature), 4),
+        "messages": [
+            {"role": m.get("role"), "content": normalize_prompt(m.get("content"))}
+            for m in messages
+        ],
+    }
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}{digest}"
+
+
+class MemoryLLMCache:
+    """Per-process LRU with a TTL."""
+
+    def __init__(self, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()    # key -> (expires_at, text)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, text):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisLLMCache:
+    """Redis entries with a TTL; a sorted-set index keeps the entry count within an LRU bound."""
+
+    def __init__(self, url=LLM_CACHE_REDIS_URL, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.client = redis.from_url(url, decode_responses=True, socket_connect_timeout=2, socket_timeout=2)
+
+    def get(self, key):
+        text = self.client.get(key)
+        if text is not None:
+            self.client.zadd(INDEX_KEY, {key: time.time()})
+        return text
+
+    def set(self, key, text):
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.setex(key, self.ttl, text)
+        pipe.zadd(INDEX_KEY, {key: now})
+        # Entries older than the TTL have already expired; drop them from the index
+        pipe.zremrangebyscore(INDEX_KEY, "-inf", now - self.ttl)
+        pipe.zcard(INDEX_KEY)
+        count = pipe.execute()[-1]
+        if count > self.max_entries:
+            evicted = self.client.zrange(INDEX_KEY, 0, count - self.max_entries - 1)
+            if evicted:
+                pipe = self.client.pipeline()
+                pipe.delete(*evicted)
+                pipe.zrem(INDEX_KEY, *evicted)
+                pipe.execute()
+        return True
+
+    def incr_stat(self, field):
+        self.client.hincrby(STATS_KEY, field, 1)
+
+    def shared_stats(self):
+        return {k: int(v) for k, v in self.client.hgetall(STATS_KEY).items()}
+
+    def size(self):
+        return self.client.zcard(INDEX_KEY)
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def incr(self, field):
+        with self._lock:
+            self.values[field] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_redis_down_until = 0.0
+counters = _Counters()
+
+
+def _get_backend():
+    global _backend
+    if _backend is None and LLM_CACHE_BACKEND != "off":
+        with _backend_lock:
+            if _backend is None:
+                _backend = RedisLLMCache() if LLM_CACHE_BACKEND == "redis" else MemoryLLMCache()
+    return _backend
+
+
+def _call(op, *args):
+    """Run a backend operation; cache failures never fail generation."""
+    global _redis_down_until
+    backend = _get_backend()
+    if backend is None or time.time() < _redis_down_until:
+        return None
+    try:
+        return getattr(backend, op)(*args)
+    except redis.RedisError as e:
+        counters.incr("errors")
+        _redis_down_until = time.time() + REDIS_RETRY_SECONDS
+        print(f"Warning: LLM cache unavailable ({op}): {e}")
+        return None
+
+
+def _count(field):
+    counters.incr(field)
+    if isinstance(_get_backend(), RedisLLMCache):
+        _call("incr_stat", field)
+
+
+def lookup(model, temperature, messages):
+    """Return (key, cached text or None), counting the hit or miss."""
+    key = cache_key(model, temperature, messages)
+    if _get_backend() is None:
+        return key, None
+    text = _call("get", key)
+    _count("hits" if text is not None else "misses")
+    return key, text
+
+
+def store(key, text):
+    """Cache a completion; empty outputs are never cached."""
+    if not text or not text.strip() or _get_backend() is None:
+        return
+    if _call("set", key, text):
+        _count("stores")
+
+
+def cached_completion(model, temperature, messages, complete):
+    """complete() -> str is only called on a cache miss."""
+    key, text = lookup(model, temperature, messages)
+    if text is None:
+        text = complete()
+        store(key, text)
+    return text
+
+
+async def cached_completion_async(model, temperature, messages, complete):
+    """Async variant: complete is a coroutine function; cache I/O runs in a thread."""
+    key, text = await asyncio.to_thread(lookup, model, temperature, messages)
+    if text is None:
+        text = await complete()
+        await asyncio.to_thread(store, key, text)
+    return text
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for this process, plus shared totals when backed by Redis."""
+    local = counters.snapshot()
+    lookups = local["hits"] + local["misses"]
+    stats = {
+        "pid": os.getpid(),
+        "backend": LLM_CACHE_BACKEND,
+        "ttl": LLM_CACHE_TTL,
+        "max_entries": LLM_CACHE_MAX_ENTRIES,
+        "process": {**local, "hit_rate": round(local["hits"] / lookups, 3) if lookups else None},
+        "entries": _call("size"),
+    }
+    if isinstance(_get_backend(), RedisLLMCache):
+        stats["shared"] = _call("shared_stats")
+    return stats
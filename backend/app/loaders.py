@@ -0,0 +1,31 @@
+# backend/app/loaders.py
+"""
+Eager-loading strategies for candidate serialization.
+
+Candidate.to_dict(include_creator=True, include_jobs=True) touches
+creator, assigned_users and jobs. Left to lazy loading, that is several
+queries per candidate. These helpers attach loader options so a whole
+page is fetched in a fixed number of queries regardless of its size.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+from .models import Candidate
+from .schema import capabilities
+
+
+def candidate_options(include_creator: bool = False, include_jobs: bool = False):
+    """Loader options matching the relationships Candidate.to_dict will read."""
+    options = []
+    if include_creator:
+        # Many-to-one: join it into the main query
+        options.append(joinedload(Candidate.creator))
+        if capabilities.has_assignments:
+            options.append(selectinload(Candidate.assigned_users))
+    if include_jobs:
+        # One-to-many: a single IN (...) query for the whole page
+        options.append(selectinload(Candidate.jobs))
+    return options
+
+
+def load_candidates(query, include_creator: bool = False, include_jobs: bool = False):
+    """Run a Candidate query with the eager loads needed for to_dict()."""
+    return query.options(*candidate_options(include_creator, include_jobs)).all()
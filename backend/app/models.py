@@ -1,7 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from sqlalchemy.orm import relationship
-from sqlalchemy import inspect
+from sqlalchemy.orm import relationship, deferred
 
 db = SQLAlchemy()
 
@@ -10,7 +9,9 @@ db = SQLAlchemy()
 candidate_assigned_users = db.Table('candidate_assigned_users',
     db.Column('candidate_id', db.Integer, db.ForeignKey('candidate.id'), primary_key=True),
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('assigned_at', db.DateTime, default=datetime.utcnow)
+    db.Column('assigned_at', db.DateTime, default=datetime.utcnow),
+    # Primary key serves lookups by candidate; access checks look up by user
+    db.Index('ix_candidate_assigned_users_user_id', 'user_id', 'candidate_id'),
 )
 
 
@@ -21,6 +22,8 @@ class User(db.Model):
     mobile = db.Column(db.String(30), unique=True, index=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), default="user")  # "admin" | "user"
+    # Bumped to revoke every access token issued so far (see app.identity)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -46,6 +49,8 @@ class Candidate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     # ownership
     created_by_user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # Candidates a user created, newest first (access checks and listings)
+    __table_args__ = (db.Index("ix_candidate_created_by_user_id", "created_by_user_id", "id"),)
 
     # Personal Information
     first_name = db.Column(db.String(120), nullable=False)
@@ -53,7 +58,8 @@ class Candidate(db.Model):
     email = db.Column(db.String(255))
     phone = db.Column(db.String(50))
     subscription_type = db.Column(db.String(50))  # Gold or Silver
-    password = db.Column(db.String(255))  # Candidate password (minimum 6 characters)
+    password = db.Column(db.String(255))  # Candidate password hash (see app.passwords)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     role = db.Column(db.String(255))  # Role/Position
     ssn = db.Column(db.String(10), unique=True, index=True)  # Social Security Number (unique)
     birthdate = db.Column(db.Date)
@@ -112,6 +118,20 @@ class Candidate(db.Model):
         cascade="all, delete-orphan"
     )
 
+    # Columns served by the lightweight list projection (?fields=summary).
+    # Leaves out the large free-text columns; jobs are fetched per candidate.
+    SUMMARY_COLUMNS = (
+        "id", "created_by_user_id", "first_name", "last_name", "email", "phone",
+        "subscription_type", "role", "visa_status", "city", "state", "country",
+        "created_at",
+    )
+
+    def to_summary_dict(self, job_count: int = 0):
+        d = {key: getattr(self, key) for key in self.SUMMARY_COLUMNS}
+        d["created_at"] = self.created_at.isoformat() if self.created_at else None
+        d["job_count"] = job_count
+        return d
+
     def to_dict(self, include_creator: bool = False, include_jobs: bool = False):
         # Helper to convert boolean to Yes/No for frontend
         def to_yes_no(val):
@@ -169,10 +189,9 @@ class Candidate(db.Model):
                 "name": self.creator.name,
             }
             # Include assigned users (backward compatible - handle if table doesn't exist)
+            from .schema import capabilities
             try:
-                # Check if the association table exists before querying
-                inspector_obj = inspect(db.engine)
-                if 'candidate_assigned_users' in inspector_obj.get_table_names():
+                if capabilities.has_assignments:
                     d["assigned_users"] = [
                         {
                             "id": u.id,
@@ -211,7 +230,12 @@ class CandidateJob(db.Model):
 
     # NEW: what we generate + where we saved the .docx
     resume_content = db.Column(db.Text)
-    docx_path = db.Column(db.String(512))
+    # Parsed ResumeDocument (JSON) for resume_content; deferred so job lists
+    # don't load it
+    resume_document = deferred(db.Column(db.Text))
+    docx_path = db.Column(db.String(512), index=True)  # artifact key (see app/artifacts.py)
+    # When resume_content was last generated (not when the job row was added)
+    resume_generated_at = db.Column(db.DateTime, index=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
@@ -231,15 +255,29 @@ class ResumeGenerationJob(db.Model):
     
     # Input parameters
     file_type = db.Column(db.String(20), default='word')  # word or pdf
+    pdf_renderer = db.Column(db.String(20))  # libreoffice or native (NULL = PDF_RENDERER)
+    batch_id = db.Column(db.String(36), index=True)  # set for jobs created by /generate-batch
+    # "interactive" (Celery task) or "deferred" (OpenAI Batch API, see batch_tasks.py)
+    mode = db.Column(db.String(20), nullable=False, default='interactive', server_default='interactive')
+    llm_batch_id = db.Column(db.String(64), index=True)  # OpenAI batch holding a deferred job's prompts
+    # Celery routing of the latest publish (see celery_config.resume_route)
+    queue = db.Column(db.String(32))
+    priority = db.Column(db.Integer)
+    # Incremented on every publish; the task only runs for the latest one
+    dispatch_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # UTC day (YYYY-MM-DD) of the daily quota slot this job holds; cleared when refunded
+    quota_day = db.Column(db.String(10))
     
     # Results
-    result_url = db.Column(db.String(512))  # URL to download the resume (if stored)
+    result_url = db.Column(db.String(512), index=True)  # artifact key of the stored resume
     error_message = db.Column(db.Text)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     started_at = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
+    # Set once the Celery message is published (NULL = still in the outbox)
+    dispatched_at = db.Column(db.DateTime)
     
     # Relationships
     candidate = relationship("Candidate", backref="resume_jobs", lazy=True)
@@ -253,6 +291,10 @@ class ResumeGenerationJob(db.Model):
             "status": self.status,
             "progress": self.progress,
             "file_type": self.file_type,
+            "pdf_renderer": self.pdf_renderer,
+            "batch_id": self.batch_id,
+            "mode": self.mode,
+            "queue": self.queue,
             "result_url": self.result_url,
             "error_message": self.error_message,
             "created_at": self.created_at.isoformat() if self.created_at else None,
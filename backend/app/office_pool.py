@@ -0,0 +1,268 @@
+# backend/app/office_pool.py
+"""
+DOCX -> PDF conversion through long-lived headless LibreOffice processes.
+
+Each converter is a `unoserver` listener (XML-RPC in front of a headless
+soffice with its own user profile), so conversions skip the LibreOffice cold
+start and never share a profile directory. The pool bounds concurrency,
+lets a limited number of requests wait for a free converter, applies a
+per-conversion timeout, health-checks converters before use and restarts
+any that died or hung.
+
+Configuration (environment):
+  OFFICE_POOL_SIZE         converters spawned by this process (0 = no pool)
+  OFFICE_SERVERS           comma-separated host:port list of externally
+                           managed unoserver listeners; used instead of
+                           spawning when set
+  OFFICE_POOL_MAX_WAITERS  requests allowed to queue for a free converter
+  OFFICE_ACQUIRE_TIMEOUT   seconds to wait for a free converter
+  OFFICE_CONVERT_TIMEOUT   seconds allowed per conversion
+  UNOSERVER_BIN            unoserver executable
+
+Without a pool, each conversion falls back to a one-shot
+`soffice --convert-to pdf` with an isolated profile directory.
+"""
+import os
+import atexit
+import queue
+import shutil
+import socket
+import platform
+import tempfile
+import threading
+import subprocess
+import time
+import xmlrpc.client
+from pathlib import Path
+
+OFFICE_POOL_SIZE = int(os.getenv("OFFICE_POOL_SIZE", "0"))
+OFFICE_SERVERS = os.getenv("OFFICE_SERVERS", "")
+OFFICE_POOL_MAX_WAITERS = int(os.getenv("OFFICE_POOL_MAX_WAITERS", "16"))
+OFFICE_ACQUIRE_TIMEOUT = float(os.getenv("OFFICE_ACQUIRE_TIMEOUT", "30"))
+OFFICE_CONVERT_TIMEOUT = float(os.getenv("OFFICE_CONVERT_TIMEOUT", "60"))
+OFFICE_STARTUP_TIMEOUT = float(os.getenv("OFFICE_STARTUP_TIMEOUT", "30"))
+UNOSERVER_BIN = os.getenv("UNOSERVER_BIN", "unoserver")
+
+
+class OfficePoolBusy(RuntimeError):
+    """No converter became free in time, or too many requests are queued."""
+
+
+class _TimeoutTransport(xmlrpc.client.Transport):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        conn = super().make_connection(host)
+        conn.timeout = self.timeout
+        return conn
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class OfficeConverter:
+    """One unoserver listener; spawned and supervised when managed=True."""
+
+    def __init__(self, host="127.0.0.1", port=None, managed=True):
+        self.host = host
+        self.port = port
+        self.managed = managed
+        self.process = None
+        self.profile_dir = None
+
+    def start(self):
+        if not self.managed:
+            return
+        self.port = _free_port()
+        self.profile_dir = tempfile.mkdtemp(prefix="lo_profile_")
+        self.process = subprocess.Popen(
+            [
+                UNOSERVER_BIN,
+                "--interface", self.host,
+                "--port", str(self.port),
+                "--uno-port", str(_free_port()),
+                "--user-installation", Path(self.profile_dir).as_uri(),
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + OFFICE_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.healthy():
+                return
+            time.sleep(0.5)
+        self.stop()
+        raise RuntimeError(f"LibreOffice converter did not start within {OFFICE_STARTUP_TIMEOUT:.0f}s")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def healthy(self) -> bool:
+        if self.managed and (self.process is None or self.process.poll() is not None):
+            return False
+        try:
+            with socket.create_connection((self.host, self.port), timeout=1):
+                return True
+        except OSError:
+            return False
+
+    def convert(self, docx_bytes: bytes, timeout: float) -> bytes:
+        proxy = xmlrpc.client.ServerProxy(
+            f"http://{self.host}:{self.port}",
+            allow_none=True,
+            transport=_TimeoutTransport(timeout),
+        )
+        # unoserver: convert(inpath, indata, outpath, convert_to, filtername,
+        #                    filter_options, update_index)
+        result = proxy.convert(None, docx_bytes, None, "pdf", None, [], True)
+        return result.data
+
+
+class OfficePool:
+    def __init__(self, converters, max_waiters=OFFICE_POOL_MAX_WAITERS,
+                 acquire_timeout=OFFICE_ACQUIRE_TIMEOUT, convert_timeout=OFFICE_CONVERT_TIMEOUT):
+        self.converters = list(converters)
+        self.acquire_timeout = acquire_timeout
+        self.convert_timeout = convert_timeout
+        self._idle = queue.Queue()
+        # Bounded queue: converters in use + requests allowed to wait
+        self._admission = threading.BoundedSemaphore(len(self.converters) + max_waiters)
+        self._started = False
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            for conv in self.converters:
+                try:
+                    conv.start()
+                except Exception as e:
+                    # Retried by the health check on first checkout
+                    print(f"Warning: LibreOffice converter failed to start: {e}")
+                self._idle.put(conv)
+            self._started = True
+
+    def convert(self, docx_bytes: bytes) -> bytes:
+        if not self._admission.acquire(blocking=False):
+            raise OfficePoolBusy("PDF conversion queue is full")
+        try:
+            self._ensure_started()
+            try:
+                conv = self._idle.get(timeout=self.acquire_timeout)
+            except queue.Empty:
+                raise OfficePoolBusy("Timed out waiting for a PDF converter")
+            try:
+                if not conv.healthy():
+                    conv.restart()
+                return conv.convert(docx_bytes, self.convert_timeout)
+            except Exception:
+                # Crashed or hung mid-conversion: replace the process
+                try:
+                    conv.restart()
+                except Exception as e:
+                    print(f"Warning: LibreOffice converter restart failed: {e}")
+                raise
+            finally:
+                self._idle.put(conv)
+        finally:
+            self._admission.release()
+
+    def shutdown(self):
+        for conv in self.converters:
+            conv.stop()
+
+
+def convert_oneshot(docx_bytes: bytes, timeout: float = OFFICE_CONVERT_TIMEOUT) -> bytes:
+    """Cold-start soffice for one conversion, with its own profile directory."""
+    system = platform.system()
+    soffice_path = (
+        r"C:\Program Files\LibreOffice\program\soffice.exe" if system == "Windows" else "libreoffice"
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        docx_path = os.path.join(workdir, "resume.docx")
+        with open(docx_path, "wb") as f:
+            f.write(docx_bytes)
+        profile_uri = Path(workdir, "profile").as_uri()
+        try:
+            subprocess.run(
+                [soffice_path, f"-env:UserInstallation={profile_uri}", "--headless",
+                 "--convert-to", "pdf", docx_path, "--outdir", workdir],
+                check=True,
+                timeout=timeout,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"LibreOffice PDF conversion failed: {e}")
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"LibreOffice PDF conversion timed out after {timeout:.0f}s")
+        except FileNotFoundError:
+            raise RuntimeError(f"LibreOffice not found at {soffice_path}. Install it or update the path.")
+        with open(os.path.join(workdir, "resume.pdf"), "rb") as f:
+            return f.read()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_office_pool():
+    """Process-wide pool, or None when neither OFFICE_SERVERS nor OFFICE_POOL_SIZE is set."""
+    global _pool
+    if _pool is None and (OFFICE_SERVERS or OFFICE_POOL_SIZE > 0):
+        with _pool_lock:
+            if _pool is None:
+                if OFFICE_SERVERS:
+                    converters = []
+                    for server in OFFICE_SERVERS.split(","):
+                        host, _, port = server.strip().rpartition(":")
+                        converters.append(OfficeConverter(host or "127.0.0.1", int(port), managed=False))
+                else:
+                    converters = [OfficeConverter() for _ in range(OFFICE_POOL_SIZE)]
+                _pool = OfficePool(converters)
+    return _pool
+
+
+def convert_docx_to_pdf(docx_bytes: bytes) -> bytes:
+    pool = get_office_pool()
+    if pool is not None:
+        return pool.convert(docx_bytes)
+    return convert_oneshot(docx_bytes)
+
+
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown()
+
+
+def _reset_after_fork():
+    # Converter processes belong to the parent; children start their own
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+atexit.register(_shutdown_pool)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
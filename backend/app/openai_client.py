@@ -0,0 +1,210 @@
+# backend/app/openai_client.py
+"""
+Process-wide OpenAI clients on a tuned, shared httpx connection pool.
+
+Every OpenAI call in a process goes through the same client, so TLS sessions
+and keep-alive connections are reused instead of re-established per request
+or per Celery task. Clients are created lazily and dropped in forked
+children (gunicorn and Celery prefork workers), which then build their own.
+
+Configuration (environment):
+  OPENAI_MAX_CONNECTIONS     pool size per client (default 20)
+  OPENAI_MAX_KEEPALIVE       idle connections kept open (default 10)
+  OPENAI_KEEPALIVE_EXPIRY    seconds an idle connection is kept (default 60)
+  OPENAI_TIMEOUT             read/write timeout in seconds (default 120)
+  OPENAI_CONNECT_TIMEOUT     connect timeout in seconds (default 10)
+  OPENAI_POOL_TIMEOUT        seconds to wait for a free connection (default 30)
+  OPENAI_HTTP2               "auto" (default: on when h2 is installed), "1", "0"
+  OPENAI_MAX_RETRIES         SDK-level retries (default 2)
+"""
+import importlib.util
+import os
+import threading
+import time
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_POOL_TIMEOUT = float(os.getenv("OPENAI_POOL_TIMEOUT", "30"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "auto").strip().lower()
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+
+def _http2_enabled() -> bool:
+    if OPENAI_HTTP2 in ("0", "false", "no"):
+        return False
+    # httpx only speaks HTTP/2 with the optional h2 package installed
+    return importlib.util.find_spec("h2") is not None
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout():
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT, pool=OPENAI_POOL_TIMEOUT)
+
+
+class _Counters:
+    """Request/response counters fed by httpx event hooks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.responses = 0
+        self.errors = 0          # responses with status >= 400
+        self.created_at = time.time()
+
+    def on_request(self, request):
+        with self._lock:
+            self.requests += 1
+
+    def on_response(self, response):
+        with self._lock:
+            self.responses += 1
+            if response.status_code >= 400:
+                self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "responses": self.responses,
+                "error_responses": self.errors,
+                "in_flight": self.requests - self.responses,
+                "age_seconds": round(time.time() - self.created_at, 1),
+            }
+
+
+_lock = threading.Lock()
+_sync = None          # (OpenAI, httpx.Client, _Counters)
+_async = None         # (AsyncOpenAI, httpx.AsyncClient, _Counters)
+
+
+def get_openai_client():
+    """Shared sync client, or None when OPENAI_API_KEY is not set."""
+    global _sync
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    if _sync is None:
+        with _lock:
+            if _sync is None:
+                counters = _Counters()
+                http_client = httpx.Client(
+                    limits=_limits(),
+                    timeout=_timeout(),
+                    http2=_http2_enabled(),
+                    event_hooks={"request": [counters.on_request], "response": [counters.on_response]},
+                )
+                client = OpenAI(
+                    api_key=api_key,
+                    http_client=http_client,
+                    timeout=_timeout(),
+                    max_retries=OPENAI_MAX_RETRIES,
+                )
+                _sync = (client, http_client, counters)
+    return _sync[0]
+
+
+def get_async_openai_client():
+    """Shared AsyncOpenAI client (one event loop per process), or None without a key."""
+    global _async
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    if _async is None:
+        with _lock:
+            if _async is None:
+                counters = _Counters()
+
+                async def on_request(request):
+                    counters.on_request(request)
+
+                async def on_response(response):
+                    counters.on_response(response)
+
+                http_client = httpx.AsyncClient(
+                    limits=_limits(),
+                    timeout=_timeout(),
+                    http2=_http2_enabled(),
+                    event_hooks={"request": [on_request], "response": [on_response]},
+                )
+                client = AsyncOpenAI(
+                    api_key=api_key,
+                    http_client=http_client,
+                    timeout=_timeout(),
+                    max_retries=OPENAI_MAX_RETRIES,
+                )
+                _async = (client, http_client, counters)
+    return _async[0]
+
+
+def _pool_connections(http_client):
+    # httpx does not expose its pool publicly; read httpcore's state defensively
+    pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+    if pool is None:
+        return None
+    connections = list(getattr(pool, "connections", []))
+    stats = {"connections": len(connections), "idle": 0, "active": 0, "http2": 0}
+    for conn in connections:
+        try:
+            if conn.is_idle():
+                stats["idle"] += 1
+            elif not conn.is_closed():
+                stats["active"] += 1
+            info = conn.info()
+            if "HTTP/2" in info:
+                stats["http2"] += 1
+        except Exception:
+            continue
+    stats["queued_requests"] = max(0, len(getattr(pool, "_requests", [])) - stats["active"])
+    return stats
+
+
+def _client_stats(entry):
+    if entry is None:
+        return None
+    _, http_client, counters = entry
+    return {**counters.snapshot(), "pool": _pool_connections(http_client)}
+
+
+def pool_stats() -> dict:
+    """Connection pool and request counters for this process."""
+    return {
+        "pid": os.getpid(),
+        "config": {
+            "max_connections": OPENAI_MAX_CONNECTIONS,
+            "max_keepalive_connections": OPENAI_MAX_KEEPALIVE,
+            "keepalive_expiry": OPENAI_KEEPALIVE_EXPIRY,
+            "timeout": OPENAI_TIMEOUT,
+            "connect_timeout": OPENAI_CONNECT_TIMEOUT,
+            "pool_timeout": OPENAI_POOL_TIMEOUT,
+            "http2": _http2_enabled(),
+            "max_retries": OPENAI_MAX_RETRIES,
+        },
+        "sync": _client_stats(_sync),
+        "async": _client_stats(_async),
+    }
+
+
+def _reset_after_fork():
+    # Sockets belong to the parent; drop the references without closing them
+    # (closing would shut down the parent's TLS sessions) and rebuild lazily
+    global _sync, _async, _lock
+    _sync = None
+    _async = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,95 @@
+# backend/app/passwords.py
+"""
+Password hashing for users, admins and candidates.
+
+Hashes are werkzeug's "method$salt$hash" strings, so existing User hashes keep
+working. The method (and with it the cost) is configurable; a hash made with
+any other method still verifies, and needs_rehash() tells the login views to
+store a fresh hash with the current setting once the password is known to be
+right. Candidate passwords written before they were hashed are accepted as
+plaintext the same way and replaced on login.
+
+Verification runs on a small dedicated thread pool (hashlib's scrypt and
+pbkdf2 release the GIL), so a login burst uses at most PASSWORD_HASH_WORKERS
+cores for hashing instead of every request thread, and other endpoints keep
+their threads. A login that cannot get a hashing slot in time is refused
+with PasswordHashBusy.
+
+Configuration (environment):
+  PASSWORD_HASH_METHOD    werkzeug method with cost, e.g. "scrypt:32768:8:1"
+                          (default) or "pbkdf2:sha256:600000"
+  PASSWORD_HASH_WORKERS   concurrent hash computations per process (default 2)
+  PASSWORD_HASH_TIMEOUT   seconds a login waits for its hash (default 10)
+
+Run benchmarks/bench_password_hash.py to pick a cost.
+"""
+import hmac
+import os
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+HASH_PREFIXES = ("scrypt:", "pbkdf2:")
+
+
+class PasswordHashBusy(Exception):
+    """No hashing slot became free within PASSWORD_HASH_TIMEOUT"""
+
+
+_executor = ThreadPoolExecutor(max_workers=max(1, PASSWORD_HASH_WORKERS), thread_name_prefix="password-hash")
+
+
+def hash_password(password, method=None):
+    return generate_password_hash(password, method=method or PASSWORD_HASH_METHOD)
+
+
+def is_hashed(value):
+    """True for a werkzeug hash, False for a legacy plaintext candidate password"""
+    return bool(value) and value.startswith(HASH_PREFIXES) and value.count("$") >= 2
+
+
+@lru_cache(maxsize=1)
+def _current_method():
+    """PASSWORD_HASH_METHOD as werkzeug writes it ("scrypt" -> "scrypt:32768:8:1")"""
+    return hash_password("").split("$", 1)[0]
+
+
+def needs_rehash(stored):
+    """True when `stored` is plaintext or was hashed with another method or cost"""
+    return not is_hashed(stored) or stored.split("$", 1)[0] != _current_method()
+
+
+def _check(stored, password):
+    if is_hashed(stored):
+        return check_password_hash(stored, password)
+    return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+
+
+def _run(fn, *args):
+    future = _executor.submit(fn, *args)
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+    except FutureTimeout:
+        future.cancel()
+        raise PasswordHashBusy()
+
+
+def verify_password(stored, password):
+    """
+    Check `password` against a stored hash (or legacy plaintext)
+
+    Returns (ok, new_hash): new_hash is set when the password was right and
+    the stored value should be replaced. Raises PasswordHashBusy.
+    """
+    if not stored or not isinstance(password, str) or not password:
+        return False, None
+    if not _run(_check, stored, password):
+        return False, None
+    if needs_rehash(stored):
+        return True, _run(hash_password, password)
+    return True, None
@@ -43,7 +43,7 @@ def public_candidates():
         cands = Candidate.query.filter_by(created_by_user_id=uid).order_by(Candidate.id.desc()).all()
     
     def brief(c):
-        d = model_to_dict(c, exclude=set())
+        d = model_to_dict(c, exclude={"password"})
         creator_id = getattr(c, "created_by_user_id", None)
         d["created_by"] = {"id": creator_id}
         return d
@@ -61,7 +61,7 @@ def public_candidate_one(cand_id):
     if not is_admin() and c.created_by_user_id != uid:
         return {"message": "Access denied"}, 403
     
-    d = model_to_dict(c)
+    d = model_to_dict(c, exclude={"password"})
     # Add creator detail if relationship is available
     if getattr(c, "created_by", None):
         d["created_by"] = model_to_dict(c.created_by, exclude={"password_hash"})
@@ -0,0 +1,227 @@
+# backend/app/quota.py
+"""
+Daily resume generation quota per candidate.
+
+A slot is reserved when a generation starts (sync request, async job or batch
+job), not counted when it finishes, with an atomic Redis counter per
+candidate and UTC day. Concurrent requests cannot all pass a limit check
+that only one of them should, and failed or cancelled generations give their
+slot back.
+
+A day's counter is seeded from that day's generated resumes the first time it
+is used, so switching to it (or losing Redis data) does not reset anyone's
+quota. While Redis is unreachable the limit falls back to counting generated
+resumes in the database, without reservations.
+
+Counters must not be evicted: a counter that disappears is reseeded from
+finished resumes only, forgetting the reservations of running generations,
+so the limit could be exceeded. Point QUOTA_REDIS_URL at an instance with
+maxmemory-policy noeviction (the broker's allkeys-lru instance is not safe).
+Counters expire at the end of their UTC day, so that instance holds about
+100 bytes per candidate active today.
+
+Configuration (environment):
+  RESUME_DAILY_LIMITS  per-tier limits, e.g. "silver:50,gold:200" (default
+                       "silver:50"); tiers not listed are unlimited
+  QUOTA_REDIS_URL      Redis for the counters (default REDIS_URL)
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+import redis
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+QUOTA_REDIS_URL = os.getenv("QUOTA_REDIS_URL") or REDIS_URL
+REDIS_RETRY_SECONDS = 30             # skip Redis this long after a connection error
+KEY_PREFIX = "quota:resume:"
+
+DAILY_LIMIT_MESSAGE = "Your daily resume limit has been exceeded. Please try again tomorrow."
+
+
+def _parse_limits(value):
+    """'silver:50,gold:200' -> {'silver': 50, 'gold': 200}"""
+    limits = {}
+    for item in value.split(","):
+        tier, _, limit = item.partition(":")
+        if tier.strip() and limit.strip():
+            limits[tier.strip().lower()] = int(limit)
+    return limits
+
+
+RESUME_DAILY_LIMITS = _parse_limits(os.getenv("RESUME_DAILY_LIMITS", "silver:50"))
+
+# KEYS: day counter; ARGV: slots, limit, expire-at (unix time), seed
+# Returns {1, remaining} when reserved, {0, remaining} when over the limit
+RESERVE_SCRIPT = """
+local count = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+if redis.call('exists', KEYS[1]) == 0 then
+    redis.call('set', KEYS[1], ARGV[4])
+    redis.call('expireat', KEYS[1], ARGV[3])
+end
+local used = tonumber(redis.call('get', KEYS[1]))
+if used + count > limit then
+    return {0, math.max(0, limit - used)}
+end
+used = redis.call('incrby', KEYS[1], count)
+return {1, limit - used}
+"""
+
+# KEYS: day counter; ARGV: slots. Never creates or drops below zero a counter.
+REFUND_SCRIPT = """
+local used = tonumber(redis.call('get', KEYS[1]) or '0')
+local refund = math.min(used, tonumber(ARGV[1]))
+if refund > 0 then
+    redis.call('decrby', KEYS[1], refund)
+end
+return refund
+"""
+
+
+class QuotaExceeded(Exception):
+    """Not enough daily quota left; `remaining` slots are still free."""
+
+    def __init__(self, remaining):
+        super().__init__(DAILY_LIMIT_MESSAGE)
+        self.remaining = remaining
+
+
+_client = None
+_scripts = None
+_redis_down_until = 0.0
+
+
+def _redis():
+    """(client, reserve script, refund script), or None while Redis is considered down"""
+    global _client, _scripts
+    if time.time() < _redis_down_until:
+        return None
+    if _client is None:
+        _client = redis.from_url(QUOTA_REDIS_URL, decode_responses=True, socket_connect_timeout=2, socket_timeout=2)
+        _scripts = (_client.register_script(RESERVE_SCRIPT), _client.register_script(REFUND_SCRIPT))
+    return _client, *_scripts
+
+
+def _redis_failed(op, e):
+    global _redis_down_until
+    _redis_down_until = time.time() + REDIS_RETRY_SECONDS
+    print(f"Warning: Quota counter unavailable ({op}): {e}")
+
+
+def daily_limit(candidate):
+    """Daily resume limit for the candidate's tier (None = unlimited)"""
+    return RESUME_DAILY_LIMITS.get((candidate.subscription_type or "").strip().lower())
+
+
+def quota_day(now=None):
+    return (now or datetime.utcnow()).strftime("%Y-%m-%d")
+
+
+def _counter_key(candidate_id, day):
+    return f"{KEY_PREFIX}{candidate_id}:{day}"
+
+
+def _generated_today(candidate_id):
+    """Resumes generated today according to the database (same measure as the admin listing)"""
+    from app.models import CandidateJob
+
+    start_of_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return (
+        CandidateJob.query
+        .filter(
+            CandidateJob.candidate_id == candidate_id,
+            CandidateJob.resume_generated_at >= start_of_day,
+            CandidateJob.resume_generated_at < start_of_day + timedelta(days=1),
+        )
+        .count()
+    )
+
+
+def reserve(candidate, count=1):
+    """
+    Reserve `count` slots for today, all or nothing
+
+    Returns the quota day the slots were taken from (pass it to refund()), or
+    None when nothing was reserved: unlimited tier, or Redis unavailable and
+    the database count allowed it. Raises QuotaExceeded.
+    """
+    limit = daily_limit(candidate)
+    if limit is None:
+        return None
+    now = datetime.utcnow()
+    day = quota_day(now)
+    conn = _redis()
+    if conn:
+        client, reserve_script, _ = conn
+        key = _counter_key(candidate.id, day)
+        try:
+            seed = 0 if client.exists(key) else _generated_today(candidate.id)
+            # Keep the counter an hour past midnight so late refunds still land
+            next_day = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1, hours=1)
+            expire_at = int((next_day - datetime(1970, 1, 1)).total_seconds())
+            reserved, left = reserve_script([key], [count, limit, expire_at, seed])
+            if not reserved:
+                raise QuotaExceeded(int(left))
+            return day
+        except redis.RedisError as e:
+            _redis_failed("reserve", e)
+
+    left = max(0, limit - _generated_today(candidate.id))
+    if count > left:
+        raise QuotaExceeded(left)
+    return None
+
+
+def refund(candidate_id, day, count=1):
+    """Give back slots reserved on `day` (no-op for day None)"""
+    if not day or count <= 0:
+        return
+    conn = _redis()
+    if not conn:
+        return
+    try:
+        conn[2]([_counter_key(candidate_id, day)], [count])
+    except redis.RedisError as e:
+        _redis_failed("refund", e)
+
+
+def refund_job(job_id):
+    """
+    Refund a ResumeGenerationJob's slot, at most once
+
+    Clearing quota_day with a conditional UPDATE makes concurrent or repeated
+    calls (failure after cancel, redelivered tasks) refund a single time.
+    """
+    from sqlalchemy import select, update
+    from app.models import db, ResumeGenerationJob
+
+    row = db.session.execute(
+        select(ResumeGenerationJob.candidate_id, ResumeGenerationJob.quota_day)
+        .where(ResumeGenerationJob.id == job_id)
+    ).first()
+    if not row or not row.quota_day:
+        return
+    result = db.session.execute(
+        update(ResumeGenerationJob)
+        .where(ResumeGenerationJob.id == job_id, ResumeGenerationJob.quota_day == row.quota_day)
+        .values(quota_day=None)
+    )
+    db.session.commit()
+    if result.rowcount == 1:
+        refund(row.candidate_id, row.quota_day)
+
+
+class Reservation:
+    """One synchronous generation's slot: refunded by release() unless confirm()ed first."""
+
+    def __init__(self, candidate_id=None, day=None):
+        self.candidate_id = candidate_id
+        self.day = day
+
+    def confirm(self):
+        self.day = None
+
+    def release(self):
+        day, self.day = self.day, None
+        refund(self.candidate_id, day)
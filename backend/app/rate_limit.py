@@ -0,0 +1,204 @@
+# backend/app/rate_limit.py
+"""
+Shared Flask-Limiter storage on Redis with a per-process token lease.
+
+Limits are counted in Redis, so every gunicorn worker (and every restart)
+sees the same counters. Each limit is a sliding window: a counter for the
+current fixed window plus the previous one weighted by how much of it still
+overlaps, checked and incremented atomically in one Lua script.
+
+To keep the common path off the network, a process leases a small batch of
+tokens in that same script and spends them locally until the lease expires.
+Leased tokens are counted in Redis the moment they are granted and unused
+ones are handed back, so all processes together never admit more than the
+limit. Strict limits (where a lease would be under two tokens, e.g.
+"5 per minute") always go to Redis.
+
+Selected with a `leased+redis://` (or `leased+rediss://`) storage URI and the
+"moving-window" strategy. Configuration (environment):
+  RATELIMIT_STORAGE_URI     overrides the storage (default: leased+REDIS_URL,
+                            or memory:// when REDIS_URL is unset)
+  RATELIMIT_LEASE_FRACTION  share of a limit leased at once (default 0.02)
+  RATELIMIT_LEASE_MAX       largest lease (default 50)
+  RATELIMIT_LEASE_SECONDS   lease lifetime before unused tokens go back (default 5)
+"""
+import os
+import threading
+import time
+
+from limits.storage import RedisStorage
+
+REDIS_URL = os.getenv("REDIS_URL")
+RATELIMIT_LEASE_FRACTION = float(os.getenv("RATELIMIT_LEASE_FRACTION", "0.02"))
+RATELIMIT_LEASE_MAX = int(os.getenv("RATELIMIT_LEASE_MAX", "50"))
+RATELIMIT_LEASE_SECONDS = float(os.getenv("RATELIMIT_LEASE_SECONDS", "5"))
+
+LEASED_PREFIX = "leased+"
+
+
+def storage_uri():
+    """Storage URI for the global limiter"""
+    uri = os.getenv("RATELIMIT_STORAGE_URI")
+    if uri:
+        return uri
+    return LEASED_PREFIX + REDIS_URL if REDIS_URL else "memory://"
+
+
+# KEYS: current window counter, previous window counter
+# ARGV: limit, window seconds, elapsed share of the current window, wanted, needed
+# Grants between `needed` and `wanted` tokens, or 0 if fewer than `needed` remain.
+ACQUIRE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local wanted = tonumber(ARGV[4])
+local needed = tonumber(ARGV[5])
+
+local current = tonumber(redis.call('get', KEYS[1]) or '0')
+local previous = tonumber(redis.call('get', KEYS[2]) or '0')
+local used = math.floor(previous * (1 - elapsed)) + current
+local available = limit - used
+if available < needed then
+    return {0, used}
+end
+
+local granted = math.min(wanted, available)
+redis.call('incrby', KEYS[1], granted)
+if redis.call('ttl', KEYS[1]) < 0 then
+    redis.call('expire', KEYS[1], window * 2)
+end
+return {granted, used + granted}
+"""
+
+# KEYS: window counter the tokens were granted from; ARGV: unused tokens
+RELEASE_SCRIPT = """
+local current = tonumber(redis.call('get', KEYS[1]) or '0')
+local release = math.min(current, tonumber(ARGV[1]))
+if release > 0 then
+    redis.call('decrby', KEYS[1], release)
+end
+return release
+"""
+
+# KEYS: current window counter, previous window counter
+# ARGV: elapsed share of the current window
+WINDOW_SCRIPT = """
+local elapsed = tonumber(ARGV[1])
+local current = tonumber(redis.call('get', KEYS[1]) or '0')
+local previous = tonumber(redis.call('get', KEYS[2]) or '0')
+return math.floor(previous * (1 - elapsed)) + current
+"""
+
+
+class _Lease:
+    __slots__ = ("window", "tokens", "expires_at")
+
+    def __init__(self, window, tokens, expires_at):
+        self.window = window
+        self.tokens = tokens
+        self.expires_at = expires_at
+
+
+class LeasedRedisStorage(RedisStorage):
+    """RedisStorage whose moving-window calls use leased sliding-window counters"""
+
+    STORAGE_SCHEME = ["leased+redis", "leased+rediss"]
+
+    def __init__(self, uri, **options):
+        super().__init__(uri[len(LEASED_PREFIX):], **options)
+        self._leases = {}                    # limit key -> _Lease
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def initialize_storage(self, uri):
+        super().initialize_storage(uri)
+        conn = self.get_connection()
+        self.lua_acquire_leased = conn.register_script(ACQUIRE_SCRIPT)
+        self.lua_release_leased = conn.register_script(RELEASE_SCRIPT)
+        self.lua_leased_window = conn.register_script(WINDOW_SCRIPT)
+
+    def _window_key(self, key, window):
+        return self.prefixed_key(f"{key}/sw/{window}")
+
+    @staticmethod
+    def _window(expiry, now):
+        window, offset = divmod(now, expiry)
+        return int(window), offset / expiry
+
+    @staticmethod
+    def _lease_size(limit, amount):
+        size = min(RATELIMIT_LEASE_MAX, int(limit * RATELIMIT_LEASE_FRACTION))
+        return amount if size < 2 else max(size, amount)
+
+    def _release(self, key, lease):
+        if lease.tokens > 0:
+            self.lua_release_leased([self._window_key(key, lease.window)], [lease.tokens])
+
+    def _sweep(self, now):
+        """Hand back unused tokens of expired leases (at most once per lease lifetime)"""
+        if now < self._next_sweep:
+            return
+        with self._lock:
+            self._next_sweep = now + RATELIMIT_LEASE_SECONDS
+            expired = [(k, v) for k, v in self._leases.items() if v.expires_at <= now]
+            for key, _ in expired:
+                del self._leases[key]
+        for key, lease in expired:
+            self._release(key, lease)
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        now = time.time()
+        window, elapsed = self._window(expiry, now)
+
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease and lease.window == window and lease.expires_at > now and lease.tokens >= amount:
+                lease.tokens -= amount
+                return True
+            stale = self._leases.pop(key, None)
+
+        if stale:
+            self._release(key, stale)
+        self._sweep(now)
+
+        granted, _ = self.lua_acquire_leased(
+            [self._window_key(key, window), self._window_key(key, window - 1)],
+            [limit, expiry, elapsed, self._lease_size(limit, amount), amount],
+        )
+        granted = int(granted)
+        if granted < amount:
+            return False
+        if granted > amount:
+            # Lease never outlives the window its tokens were counted in
+            expires_at = min(now + RATELIMIT_LEASE_SECONDS, (window + 1) * expiry)
+            with self._lock:
+                previous = self._leases.get(key)
+                self._leases[key] = _Lease(window, granted - amount, expires_at)
+            if previous:
+                self._release(key, previous)
+        return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        window, elapsed = self._window(expiry, now)
+        used = int(self.lua_leased_window(
+            [self._window_key(key, window), self._window_key(key, window - 1)], [elapsed]
+        ))
+        with self._lock:
+            lease = self._leases.get(key)
+            unused = lease.tokens if lease and lease.window == window else 0
+        # Reset is reported at the end of the current fixed window
+        return window * expiry, max(0, used - unused)
+
+    def clear(self, key):
+        with self._lock:
+            self._leases.pop(key, None)
+        super().clear(key)
+        conn = self.get_connection()
+        for name in conn.scan_iter(match=self.prefixed_key(f"{key}/sw/*")):
+            conn.delete(name)
+
+    def reset(self):
+        with self._lock:
+            self._leases.clear()
+        return super().reset()
@@ -3,13 +3,31 @@ Async resume generation endpoints
 """
 from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
+from datetime import datetime
 from app.models import db, Candidate, CandidateJob, ResumeGenerationJob
+from app import job_events, quota
+from app.access import caller_can_access
+from app.artifacts import get_artifact_store, is_artifact_key
+from app.candidateresumebuilder import resume_download_name, resolve_pdf_renderer
 from io import BytesIO
+from collections import Counter
 import base64
+import os
+import uuid
+import click
 
 bp = Blueprint("resume_async", __name__)
 
+TERMINAL_STATUSES = ('SUCCESS', 'FAILURE', 'CANCELLED')
+ACTIVE_STATUSES = ('PENDING', 'PROCESSING')
+
+# "interactive": one Celery task per job; "deferred": collected into OpenAI
+# Batch API submissions by batch_tasks.py (cheaper, completes within 24h)
+GENERATION_MODES = ('interactive', 'deferred')
+
+# Largest number of job rows accepted by one /generate-batch request
+BATCH_MAX_JOBS = int(os.getenv("RESUME_BATCH_MAX_JOBS", "50"))
+
 
 def format_candidate_info(candidate):
     """Format candidate data for resume generation"""
@@ -35,6 +53,88 @@ def format_candidate_info(candidate):
     return info
 
 
+def resume_job_signature(job, candidate_info, job_description):
+    """
+    Celery signature for a ResumeGenerationJob (the task id is the job id)
+
+    Routed to the job's queue and priority; `dispatch` lets the task ignore
+    messages superseded by a later publish of the same job.
+    """
+    from celery_tasks import generate_resume_async as celery_task
+
+    options = {"task_id": job.id}
+    if job.queue:
+        options["queue"] = job.queue
+    if job.priority is not None:
+        options["priority"] = job.priority
+    return celery_task.s(
+        task_id=job.id,
+        job_desc=job_description,
+        candidate_info=candidate_info,
+        file_type=job.file_type,
+        pdf_renderer=job.pdf_renderer,
+        candidate_id=job.candidate_id,
+        job_row_id=job.job_row_id,
+        dispatch=job.dispatch_count,
+    ).set(**options)
+
+
+def route_resume_job(job, candidate, bulk=False):
+    """Assign the job's queue and priority for its next publish"""
+    from celery_config import resume_route
+
+    job.queue, job.priority = resume_route(candidate.subscription_type if candidate else None, bulk)
+    job.dispatch_count = (job.dispatch_count or 0) + 1
+
+
+def publish_resume_job(job, candidate=None, job_description=None):
+    """Publish the Celery message for the job's current route and mark it dispatched"""
+    candidate = candidate or db.session.get(Candidate, job.candidate_id)
+    if job_description is None:
+        job_row = db.session.get(CandidateJob, job.job_row_id) if job.job_row_id else None
+        job_description = job_row.job_description if job_row else ""
+    
+    resume_job_signature(job, format_candidate_info(candidate), job_description).apply_async()
+    job.dispatched_at = datetime.utcnow()
+    db.session.commit()
+
+
+@bp.cli.command("dispatch-pending")
+@click.option("--min-age", default=None, type=int,
+              help="Only jobs created at least this many seconds ago "
+                   "(default RESUME_DISPATCH_MIN_AGE_SECONDS)")
+def dispatch_pending_command(min_age):
+    """Publish resume jobs that were committed but never enqueued (beat runs this too)"""
+    from celery_tasks import dispatch_pending_jobs
+    dispatched = dispatch_pending_jobs(min_age)
+    for job_id in dispatched:
+        click.echo(f"Dispatched {job_id}")
+    click.echo(f"{len(dispatched)} job(s) dispatched")
+
+
+@bp.cli.command("submit-deferred")
+def submit_deferred_command():
+    """Submit pending deferred resume jobs as one OpenAI batch"""
+    from batch_tasks import submit_deferred_resumes
+    batch_id = submit_deferred_resumes()
+    click.echo(f"Batch: {batch_id}" if batch_id else "No batch submitted")
+
+
+@bp.cli.command("poll-deferred")
+def poll_deferred_command():
+    """Check submitted OpenAI batches and finish completed deferred jobs"""
+    from batch_tasks import poll_deferred_resumes
+    for batch_id, status in poll_deferred_resumes().items():
+        click.echo(f"{batch_id}: {status}")
+
+
+def _parse_mode(data):
+    mode = (data.get("mode") or "interactive").lower()
+    if mode not in GENERATION_MODES:
+        return None, (jsonify({"message": "Invalid mode. Use 'interactive' or 'deferred'"}), 400)
+    return mode, None
+
+
 @bp.post("/generate-async")
 @jwt_required()
 def generate_resume_async():
@@ -47,7 +147,9 @@ def generate_resume_async():
         "job_row_id": 456,  # optional, if job already created
         "job_id": "JOB-001",  # optional
         "job_description": "...",
-        "file_type": "word"  # or "pdf"
+        "file_type": "word",  # or "pdf"
+        "pdf_renderer": "native",  # optional: "libreoffice" or "native"
+        "mode": "interactive"  # optional: "deferred" = OpenAI Batch API, within 24h
     }
     
     Response:
@@ -68,8 +170,19 @@ def generate_resume_async():
         if not candidate_id or not job_description:
             return jsonify({"message": "Missing required fields"}), 400
         
+        mode, error = _parse_mode(data)
+        if error:
+            return error
+        
         if file_type not in ['word', 'pdf']:
             return jsonify({"message": "Invalid file_type. Use 'word' or 'pdf'"}), 400
+
+        pdf_renderer = None
+        if file_type == 'pdf':
+            try:
+                pdf_renderer = resolve_pdf_renderer(data.get("pdf_renderer"))
+            except ValueError as e:
+                return jsonify({"message": str(e)}), 400
         
         try:
             candidate_id = int(candidate_id)
@@ -78,22 +191,6 @@ def generate_resume_async():
 
         # Get candidate
         candidate = Candidate.query.get_or_404(candidate_id)
-        if (candidate.subscription_type or "").lower() == "silver":
-            start_of_day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            next_day = start_of_day + timedelta(days=1)
-            generated_today = (
-                CandidateJob.query
-                .filter(
-                    CandidateJob.candidate_id == candidate_id,
-                    CandidateJob.resume_content.isnot(None),
-                    CandidateJob.created_at >= start_of_day,
-                    CandidateJob.created_at < next_day,
-                )
-                .count()
-            )
-
-            if generated_today >= 50:
-                return jsonify({"message": "Your daily resume limit has been exceeded. Please try again tomorrow."}), 429
 
         if job_row_id is not None:
             try:
@@ -101,7 +198,14 @@ def generate_resume_async():
             except (TypeError, ValueError):
                 return jsonify({"message": "Invalid job_row_id"}), 400
         
-        # Create job row if not provided
+        # Reserve the daily quota slot now; it is refunded if the job fails
+        try:
+            quota_day = quota.reserve(candidate)
+        except quota.QuotaExceeded as e:
+            return jsonify({"message": str(e)}), 429
+        
+        # Create the job row (if not provided) and the tracking record in one
+        # transaction; the record doubles as the outbox entry for the publish
         if not job_row_id:
             job_row = CandidateJob(
                 candidate_id=candidate_id,
@@ -109,56 +213,45 @@ def generate_resume_async():
                 job_description=job_description
             )
             db.session.add(job_row)
-            db.session.commit()
+            db.session.flush()
             job_row_id = job_row.id
         
-        # Format candidate info
-        candidate_info = format_candidate_info(candidate)
-        
-        # Import celery task
-        from celery_tasks import generate_resume_async as celery_task
-        
-        # Create task
-        result = celery_task.apply_async(
-            kwargs={
-                'task_id': None,  # Will be set by bind=True
-                'job_desc': job_description,
-                'candidate_info': candidate_info,
-                'file_type': file_type,
-                'candidate_id': candidate_id,
-                'job_row_id': job_row_id
-            }
-        )
-        
-        # Create job tracking record
         job_record = ResumeGenerationJob(
-            id=result.id,
+            id=str(uuid.uuid4()),
             candidate_id=candidate_id,
             job_row_id=job_row_id,
             file_type=file_type,
+            pdf_renderer=pdf_renderer,
+            mode=mode,
+            quota_day=quota_day,
             status='PENDING',
             progress=0
         )
+        if mode == 'interactive':
+            route_resume_job(job_record, candidate)
         db.session.add(job_record)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            quota.refund(candidate_id, quota_day)
+            raise
         
-        # Update task with actual task_id
-        celery_task.apply_async(
-            task_id=result.id,
-            kwargs={
-                'task_id': result.id,
-                'job_desc': job_description,
-                'candidate_info': candidate_info,
-                'file_type': file_type,
-                'candidate_id': candidate_id,
-                'job_row_id': job_row_id
-            }
-        )
+        # Publish exactly one Celery message; if the broker is unreachable the
+        # job stays in the outbox and the dispatch_pending_jobs beat task
+        # publishes it later. Deferred jobs wait for the next batch submission.
+        if mode == 'interactive':
+            try:
+                publish_resume_job(job_record, candidate=candidate, job_description=job_description)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Warning: Failed to enqueue resume job {job_record.id}: {e}")
         
         return jsonify({
-            "job_id": result.id,
+            "job_id": job_record.id,
             "status": "PENDING",
-            "message": "Resume generation started",
+            "mode": mode,
+            "message": "Resume generation started" if mode == 'interactive' else "Resume generation scheduled",
             "job_row_id": job_row_id
         }), 202
         
@@ -166,6 +259,209 @@ def generate_resume_async():
         return jsonify({"message": f"Error: {str(e)}"}), 500
 
 
+@bp.post("/generate-batch")
+@jwt_required()
+def generate_resume_batch():
+    """
+    Generate resumes for many job rows of one candidate as a Celery group
+    
+    Request body:
+    {
+        "candidate_id": 123,
+        "job_row_ids": [456, 457],  # optional; default: every row without a resume
+        "file_type": "word",  # or "pdf"
+        "pdf_renderer": "native",  # optional: "libreoffice" or "native"
+        "mode": "interactive"  # optional: "deferred" = OpenAI Batch API, within 24h
+    }
+    
+    The candidate is loaded, formatted and quota-checked once for the whole
+    batch. Rows without a job description or with a job already in progress
+    are skipped. Candidates the caller cannot access are a 404.
+    
+    Response (202):
+    {
+        "batch_id": "uuid",
+        "jobs": [{"job_id": "task-uuid", "job_row_id": 456}, ...],
+        "skipped": [{"job_row_id": 457, "reason": "in_progress"}, ...]
+    }
+    
+    Progress: GET /batch-status/<batch_id>
+    """
+    try:
+        data = request.get_json() or {}
+        candidate_id = data.get("candidate_id")
+        job_row_ids = data.get("job_row_ids")
+        file_type = (data.get("file_type") or "word").lower()
+        
+        if not candidate_id:
+            return jsonify({"message": "Missing required fields"}), 400
+        
+        mode, error = _parse_mode(data)
+        if error:
+            return error
+        
+        if file_type not in ['word', 'pdf']:
+            return jsonify({"message": "Invalid file_type. Use 'word' or 'pdf'"}), 400
+
+        pdf_renderer = None
+        if file_type == 'pdf':
+            try:
+                pdf_renderer = resolve_pdf_renderer(data.get("pdf_renderer"))
+            except ValueError as e:
+                return jsonify({"message": str(e)}), 400
+        
+        try:
+            candidate_id = int(candidate_id)
+            if job_row_ids is not None:
+                job_row_ids = list(dict.fromkeys(int(i) for i in job_row_ids))
+        except (TypeError, ValueError):
+            return jsonify({"message": "Invalid candidate_id or job_row_ids"}), 400
+
+        # Only candidates the caller may work on; others look nonexistent
+        candidate = db.session.get(Candidate, candidate_id) if caller_can_access(candidate_id) else None
+        if candidate is None:
+            return jsonify({"message": "Candidate not found"}), 404
+
+        rows_query = CandidateJob.query.filter(CandidateJob.candidate_id == candidate_id)
+        if job_row_ids is None:
+            rows_query = rows_query.filter(CandidateJob.resume_content.is_(None))
+        else:
+            rows_query = rows_query.filter(CandidateJob.id.in_(job_row_ids))
+        rows = rows_query.order_by(CandidateJob.created_at.asc(), CandidateJob.id.asc()).all()
+
+        skipped = []
+        if job_row_ids is not None:
+            found = {row.id for row in rows}
+            skipped += [{"job_row_id": i, "reason": "not_found"} for i in job_row_ids if i not in found]
+
+        in_progress = {
+            row_id for (row_id,) in db.session.query(ResumeGenerationJob.job_row_id).filter(
+                ResumeGenerationJob.job_row_id.in_([row.id for row in rows]),
+                ResumeGenerationJob.status.in_(ACTIVE_STATUSES),
+            )
+        } if rows else set()
+
+        selected = []
+        for row in rows:
+            if not (row.job_description or "").strip():
+                skipped.append({"job_row_id": row.id, "reason": "no_job_description"})
+            elif row.id in in_progress:
+                skipped.append({"job_row_id": row.id, "reason": "in_progress"})
+            else:
+                selected.append(row)
+
+        if not selected:
+            return jsonify({"message": "No job rows to generate", "skipped": skipped}), 400
+        if len(selected) > BATCH_MAX_JOBS:
+            return jsonify({"message": f"Too many job rows in one batch (max {BATCH_MAX_JOBS})"}), 400
+
+        # One all-or-nothing reservation for the whole batch
+        try:
+            quota_day = quota.reserve(candidate, len(selected))
+        except quota.QuotaExceeded as e:
+            message = str(e) if e.remaining == 0 else (
+                f"Your daily resume limit allows {e.remaining} more resume(s) today; "
+                f"this batch has {len(selected)}."
+            )
+            return jsonify({"message": message, "remaining": e.remaining}), 429
+
+        # All tracking records in one transaction (the outbox for the publish)
+        batch_id = str(uuid.uuid4())
+        jobs = []
+        for row in selected:
+            job_record = ResumeGenerationJob(
+                id=str(uuid.uuid4()),
+                candidate_id=candidate_id,
+                job_row_id=row.id,
+                file_type=file_type,
+                pdf_renderer=pdf_renderer,
+                batch_id=batch_id,
+                mode=mode,
+                quota_day=quota_day,
+                status='PENDING',
+                progress=0
+            )
+            db.session.add(job_record)
+            if mode == 'interactive':
+                route_resume_job(job_record, candidate, bulk=True)
+            jobs.append((job_record, row.job_description))
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            quota.refund(candidate_id, quota_day, len(jobs))
+            raise
+        
+        # One group publish with the candidate formatted once; on broker
+        # failure the jobs stay in the outbox for dispatch_pending_jobs.
+        # Deferred jobs wait for the next OpenAI batch submission instead.
+        if mode == 'interactive':
+            from celery import group
+            candidate_info = format_candidate_info(candidate)
+            try:
+                group(resume_job_signature(job, candidate_info, desc) for job, desc in jobs).apply_async()
+                dispatched_at = datetime.utcnow()
+                for job, _ in jobs:
+                    job.dispatched_at = dispatched_at
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Warning: Failed to enqueue resume batch {batch_id}: {e}")
+        
+        return jsonify({
+            "batch_id": batch_id,
+            "status": "PENDING",
+            "mode": mode,
+            "message": f"Resume generation {'started' if mode == 'interactive' else 'scheduled'} for {len(jobs)} job(s)",
+            "jobs": [{"job_id": job.id, "job_row_id": job.job_row_id} for job, _ in jobs],
+            "skipped": skipped
+        }), 202
+        
+    except Exception as e:
+        return jsonify({"message": f"Error: {str(e)}"}), 500
+
+
+@bp.get("/batch-status/<batch_id>")
+@jwt_required()
+def get_batch_status(batch_id):
+    """
+    Aggregate status of a /generate-batch request
+    
+    Response:
+    {
+        "batch_id": "uuid",
+        "total": 12,
+        "finished": 5,
+        "progress": 48,  # mean job progress, finished jobs count as 100
+        "done": false,
+        "counts": {"PENDING": 4, "PROCESSING": 3, "SUCCESS": 5},
+        "jobs": [ ...same objects as /job-status... ]
+    }
+    """
+    jobs = (
+        ResumeGenerationJob.query
+        .filter(ResumeGenerationJob.batch_id == batch_id)
+        .order_by(ResumeGenerationJob.created_at.asc())
+        .all()
+    )
+    # A batch belongs to one candidate; other callers get the same 404
+    if not jobs or not caller_can_access(jobs[0].candidate_id):
+        return jsonify({"message": "Batch not found"}), 404
+    
+    counts = Counter(job.status for job in jobs)
+    finished = sum(counts[status] for status in TERMINAL_STATUSES)
+    progress = sum(100 if job.status in TERMINAL_STATUSES else (job.progress or 0) for job in jobs)
+    return jsonify({
+        "batch_id": batch_id,
+        "total": len(jobs),
+        "finished": finished,
+        "progress": round(progress / len(jobs)),
+        "done": finished == len(jobs),
+        "counts": dict(counts),
+        "jobs": [job.to_dict() for job in jobs]
+    }), 200
+
+
 @bp.get("/job-status/<job_id>")
 @jwt_required()
 def get_job_status(job_id):
@@ -187,6 +483,10 @@ def get_job_status(job_id):
     return jsonify(job.to_dict()), 200
 
 
+# GET /job-stream/<job_id> (Server-Sent Events) is served by the asyncio
+# handler in app/async_endpoints.py so an open stream holds no WSGI thread
+
+
 @bp.get("/download/<job_id>")
 @jwt_required()
 def download_resume(job_id):
@@ -202,7 +502,33 @@ def download_resume(job_id):
             "message": f"Resume not ready. Current status: {job.status}"
         }), 400
     
-    # Get result from Celery
+    # Determine mimetype
+    if job.file_type == 'word':
+        mimetype = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+    else:
+        mimetype = 'application/pdf'
+    
+    if is_artifact_key(job.result_url):
+        store = get_artifact_store()
+        if not store.exists(job.result_url):
+            return jsonify({"message": "File data not found"}), 404
+        
+        job_row = db.session.get(CandidateJob, job.job_row_id) if job.job_row_id else None
+        download_name = resume_download_name(job_row.resume_content if job_row else "", job.file_type)
+        
+        # Stream from the store with ETag / If-None-Match and Range support
+        local_path = store.local_path(job.result_url)
+        return send_file(
+            local_path or store.open(job.result_url),
+            as_attachment=True,
+            download_name=download_name,
+            mimetype=mimetype,
+            conditional=True,
+            etag=job.result_url.split(".")[0],
+            max_age=3600
+        )
+    
+    # Legacy jobs: file data was returned through the Celery result backend
     from celery_config import celery_app
     result = celery_app.AsyncResult(job_id)
     
@@ -219,12 +545,6 @@ def download_resume(job_id):
     buffer = BytesIO(file_data)
     buffer.seek(0)
     
-    # Determine mimetype
-    if job.file_type == 'word':
-        mimetype = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-    else:
-        mimetype = 'application/pdf'
-    
     return send_file(
         buffer,
         as_attachment=True,
@@ -270,6 +590,8 @@ def cancel_job(job_id):
         job.status = 'CANCELLED'
         job.error_message = 'Cancelled by user'
         db.session.commit()
+        quota.refund_job(job_id)
+        job_events.publish_progress(job_id, job.to_dict())
     
     return jsonify({"message": "Job cancelled"}), 200
 
@@ -0,0 +1,300 @@
+# backend/app/resume_model.py
+"""
+Parsed structure of a generated resume.
+
+parse_resume() walks the cleaned LLM text once (name, contact line, then
+sections) and returns a ResumeDocument. The document is stored as JSON on
+CandidateJob.resume_document next to resume_content, and every renderer
+(DOCX, PDF, HTML preview, plain text) consumes it, so re-renders and format
+conversions do not parse the text again.
+"""
+import re
+import json
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+
+# Bump when the parser or the dataclasses change; stored documents with an
+# older version are re-parsed from resume_content
+MODEL_VERSION = 1
+
+# ---- Section detection ----
+SECTION_TITLES = {
+    "professional summary",
+    "summary",
+    "technical skills",
+    "skills",
+    "professional experience",
+    "experience",
+    "work experience",
+    "work history",
+    "education",
+    "certifications",
+    "projects",
+    "additional qualifications",
+    "additional information",
+    "references",
+}
+
+SECTION_KINDS = {
+    "professional summary": "summary",
+    "summary": "summary",
+    "skills": "skills",
+    "technical skills": "skills",
+    "work experience": "experience",
+    "professional experience": "experience",
+    "certifications": "certifications",
+    "education": "education",
+}
+
+
+def is_contact_line(line: str) -> bool:
+    if not line:
+        return False
+    l = line.lower()
+    return (
+        "email" in l
+        or "@" in l
+        or "phone" in l
+        or re.search(r"\b\d{10}\b", l) is not None
+        or re.search(r"\+\d", l) is not None
+    )
+
+
+def is_section_title(line: str) -> bool:
+    if not line:
+        return False
+    raw = line.strip().rstrip(":")
+    return raw.lower() in SECTION_TITLES
+
+
+@dataclass
+class SkillCategory:
+    name: str
+    skills: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ExperienceEntry:
+    """One line of the experience section, classified.
+
+    kind: "company" | "role" | "heading" | "bullet" | "technologies" | "text"
+    """
+    kind: str
+    text: str
+    label: Optional[str] = None     # "Technologies Used" for technologies
+    spaced: bool = False            # company lines after the first one
+    title: Optional[str] = None     # role lines: "Senior Engineer"
+    start: Optional[str] = None     # role lines: "Jan 2020"
+    end: Optional[str] = None       # role lines: "Present"
+
+
+@dataclass
+class Section:
+    kind: str                       # summary | skills | experience | certifications | education | other
+    title: str
+    bullets: List[str] = field(default_factory=list)
+    skills: List[SkillCategory] = field(default_factory=list)
+    entries: List[ExperienceEntry] = field(default_factory=list)
+    lines: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ResumeDocument:
+    name: Optional[str] = None
+    contact: List[str] = field(default_factory=list)   # "Email: ...", "Mobile: ...", "Location: ..."
+    sections: List[Section] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {"version": MODEL_VERSION, **asdict(self)}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResumeDocument":
+        sections = []
+        for s in data.get("sections", []):
+            sections.append(Section(
+                kind=s["kind"],
+                title=s["title"],
+                bullets=list(s.get("bullets", [])),
+                skills=[SkillCategory(**c) for c in s.get("skills", [])],
+                entries=[ExperienceEntry(**e) for e in s.get("entries", [])],
+                lines=list(s.get("lines", [])),
+            ))
+        return cls(name=data.get("name"), contact=list(data.get("contact", [])), sections=sections)
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> Optional["ResumeDocument"]:
+        """Stored document, or None if missing, malformed or from an older parser."""
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+            if data.get("version") != MODEL_VERSION:
+                return None
+            return cls.from_dict(data)
+        except (ValueError, TypeError, KeyError):
+            return None
+
+
+# ---- Parsing ----
+def _parse_contact(lines, idx):
+    contact_email, contact_phone, contact_location = "", "", ""
+    while idx < len(lines) and is_contact_line(lines[idx]):
+        line = lines[idx]
+        email_match = re.search(r"[\w\.-]+@[\w\.-]+", line)
+        if email_match:
+            contact_email = email_match.group(0)
+        phone_match = re.search(r"(\+?\d[\d\s\-]{8,}\d)", line)
+        if phone_match:
+            contact_phone = phone_match.group(0).strip()
+        loc_match = re.search(r"Location\s*[:\-]?\s*(.*)", line, re.IGNORECASE)
+        if loc_match:
+            contact_location = loc_match.group(1).strip()
+        idx += 1
+
+    pieces = []
+    if contact_email:
+        pieces.append(f"Email: {contact_email}")
+    if contact_phone:
+        pieces.append(f"Mobile: {contact_phone}")
+    if contact_location:
+        pieces.append(f"Location: {contact_location}")
+    return pieces, idx
+
+
+def _parse_skills(section, lines, idx):
+    category = None
+    skills = []
+    while idx < len(lines) and not is_section_title(lines[idx]):
+        line = lines[idx].strip()
+        if not line:
+            idx += 1
+            continue
+
+        # Case 1: Inline list under an existing category
+        if category and not line.startswith("-") and "," in line:
+            skills = [s.strip() for s in line.split(",") if s.strip()]
+            section.skills.append(SkillCategory(category, skills))
+            category, skills = None, []
+
+        # Case 2: New category line
+        elif not line.startswith("-"):
+            if category and skills:
+                section.skills.append(SkillCategory(category, skills))
+            category = line
+            skills = []
+
+        # Case 3: Bulleted skill
+        else:
+            skills.append(line.lstrip("- ").strip())
+        idx += 1
+
+    # Flush last category
+    if category and skills:
+        section.skills.append(SkillCategory(category, skills))
+    return idx
+
+
+def _parse_experience(section, lines, idx):
+    company_seen = False
+    while idx < len(lines) and not is_section_title(lines[idx]):
+        line = lines[idx]
+
+        # Company – Location OR Role – Dates
+        if " – " in line and ":" not in line:
+            if " to " in line:  # role line
+                title, _, dates = line.partition(" – ")
+                start, _, end = dates.partition(" to ")
+                section.entries.append(ExperienceEntry(
+                    "role", line, title=title.strip(), start=start.strip(), end=end.strip()
+                ))
+            else:  # company line
+                section.entries.append(ExperienceEntry("company", line, spaced=company_seen))
+                company_seen = True
+
+        elif " – " in line and ":" in line:  # job + bullets in same line
+            job_title, rest = line.split(":", 1)
+            section.entries.append(ExperienceEntry("heading", job_title.strip()))
+            for part in re.split(r'\.\s+|,\s+', rest):
+                if part.strip():
+                    section.entries.append(ExperienceEntry("bullet", part.strip()))
+
+        elif line.startswith("Technologies Used"):
+            heading, _, techs = line.partition(":")
+            section.entries.append(ExperienceEntry("technologies", techs.strip(), label=heading.strip()))
+
+        elif line.startswith("- "):  # standard bullets
+            section.entries.append(ExperienceEntry("bullet", line[2:].strip()))
+        else:
+            section.entries.append(ExperienceEntry("text", line))
+        idx += 1
+    return idx
+
+
+def _parse_summary(section, lines, idx):
+    while idx < len(lines) and not is_section_title(lines[idx]):
+        line = lines[idx].strip()
+        if line:
+            section.bullets.append(line[2:].strip() if line.startswith("- ") else line)
+        idx += 1
+    return idx
+
+
+def _parse_certifications(section, lines, idx):
+    while idx < len(lines) and not is_section_title(lines[idx]):
+        line = lines[idx].lstrip("- ").strip()
+        if line:
+            section.bullets.append(line)
+        idx += 1
+    return idx
+
+
+def _parse_education(section, lines, idx):
+    while idx < len(lines) and not is_section_title(lines[idx]):
+        section.lines.append(lines[idx])
+        idx += 1
+    return idx
+
+
+_SECTION_PARSERS = {
+    "summary": _parse_summary,
+    "skills": _parse_skills,
+    "experience": _parse_experience,
+    "certifications": _parse_certifications,
+    "education": _parse_education,
+}
+
+
+def parse_resume(content: str) -> ResumeDocument:
+    doc = ResumeDocument()
+    lines = [ln.strip("• ").strip() for ln in content.splitlines() if ln and str(ln).strip()]
+    idx = 0
+
+    if idx < len(lines):
+        doc.name = lines[idx]
+        idx += 1
+    doc.contact, idx = _parse_contact(lines, idx)
+
+    while idx < len(lines):
+        if is_section_title(lines[idx]):
+            key = lines[idx].strip().rstrip(":").lower()
+            kind = SECTION_KINDS.get(key, "other")
+            section = Section(kind=kind, title=lines[idx].upper().rstrip(":"))
+            doc.sections.append(section)
+            idx += 1
+            parser = _SECTION_PARSERS.get(kind)
+            if parser:
+                idx = parser(section, lines, idx)
+        else:
+            idx += 1
+    return doc
+
+
+def as_resume(content) -> ResumeDocument:
+    """Accept either resume text or an already parsed ResumeDocument."""
+    if isinstance(content, ResumeDocument):
+        return content
+    return parse_resume(content or "")
+
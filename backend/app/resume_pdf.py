@@ -0,0 +1,115 @@
+# backend/app/resume_pdf.py
+"""
+Native PDF rendering with reportlab.
+
+Draws the parsed ResumeDocument straight to PDF, following the Word layout
+(0.5in margins, centered 20pt name, ruled section titles, bulleted
+experience), without building a DOCX or starting LibreOffice.
+"""
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import HRFlowable, ListFlowable, ListItem, Paragraph, SimpleDocTemplate, Spacer
+
+from app.resume_model import ResumeDocument, as_resume
+
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+
+STYLES = {
+    "normal": ParagraphStyle("normal", fontName=FONT, fontSize=11, leading=13.5, alignment=TA_JUSTIFY),
+    "name": ParagraphStyle("name", fontName=FONT_BOLD, fontSize=20, leading=24, alignment=TA_CENTER),
+    "contact": ParagraphStyle("contact", fontName=FONT, fontSize=11, leading=13.5, alignment=TA_CENTER),
+    "section": ParagraphStyle("section", fontName=FONT_BOLD, fontSize=12, leading=14.5, spaceBefore=12),
+    "company": ParagraphStyle("company", fontName=FONT_BOLD, fontSize=11, leading=13.5),
+    "role": ParagraphStyle("role", fontName=FONT_BOLD, fontSize=10, leading=12.5),
+    "heading": ParagraphStyle("heading", fontName=FONT_BOLD, fontSize=11, leading=13.5),
+}
+
+
+def _para(text, style="normal", **overrides):
+    st = STYLES[style]
+    if overrides:
+        st = ParagraphStyle(f"{style}_x", parent=st, **overrides)
+    return Paragraph(escape(text), st)
+
+
+def _labelled(label, text, **overrides):
+    st = STYLES["normal"]
+    if overrides:
+        st = ParagraphStyle("labelled", parent=st, **overrides)
+    return Paragraph(f"<b>{escape(label)}:</b> {escape(text)}", st)
+
+
+def _bullets(texts, indent=True):
+    items = [ListItem(_para(t), leftIndent=0.25 * inch + 12 if indent else 12, value="•") for t in texts]
+    return ListFlowable(items, bulletType="bullet", start="•", bulletFontName=FONT, bulletFontSize=9,
+                        leftIndent=0.25 * inch + 12 if indent else 12)
+
+
+def _section_flowables(section):
+    out = []
+    if section.kind in ("summary", "certifications"):
+        if section.bullets:
+            out.append(_bullets(section.bullets, indent=section.kind == "summary"))
+    elif section.kind == "skills":
+        out.extend(_labelled(c.name, ", ".join(c.skills)) for c in section.skills)
+    elif section.kind == "education":
+        out.extend(_para(line) for line in section.lines)
+    elif section.kind == "experience":
+        pending = []
+        for entry in section.entries:
+            if entry.kind == "bullet":
+                pending.append(entry.text)
+                continue
+            if pending:
+                out.append(_bullets(pending))
+                pending = []
+            if entry.kind == "company":
+                out.append(_para(entry.text, "company", spaceBefore=10 if entry.spaced else 0))
+            elif entry.kind == "role":
+                out.append(_para(entry.text, "role"))
+            elif entry.kind == "heading":
+                out.append(_para(entry.text, "heading"))
+            elif entry.kind == "technologies":
+                out.append(_labelled(entry.label, entry.text, spaceAfter=10))
+            else:
+                out.append(_para(entry.text))
+        if pending:
+            out.append(_bullets(pending))
+    return out
+
+
+def build_flowables(resume: ResumeDocument):
+    story = []
+    if resume.name is not None:
+        story.append(_para(resume.name, "name"))
+    if resume.contact:
+        story.append(_para("  |  ".join(resume.contact), "contact"))
+    for section in resume.sections:
+        story.append(_para(section.title, "section"))
+        story.append(HRFlowable(width="100%", thickness=0.75, color="black", spaceBefore=1, spaceAfter=4))
+        story.extend(_section_flowables(section))
+    return story or [Spacer(1, 1)]
+
+
+def render_pdf(content) -> bytes:
+    """Render resume text or a parsed ResumeDocument to PDF bytes."""
+    resume = as_resume(content)
+    buffer = BytesIO()
+    margin = 0.5 * inch
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        leftMargin=margin,
+        rightMargin=margin,
+        topMargin=margin,
+        bottomMargin=margin,
+        title=resume.name or "Resume",
+    )
+    doc.build(build_flowables(resume))
+    return buffer.getvalue()
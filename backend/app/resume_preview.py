@@ -0,0 +1,94 @@
+# backend/app/resume_preview.py
+"""
+HTML preview and plain-text renderings of a ResumeDocument.
+
+Both are cheap enough to produce on every request, so they are not stored in
+the artifact store.
+"""
+from html import escape
+
+from app.resume_model import as_resume
+
+PREVIEW_FORMATS = {"html": "text/html", "text": "text/plain"}
+
+
+def _html_section(section):
+    out = [f"<h2>{escape(section.title)}</h2>"]
+    if section.kind in ("summary", "certifications") and section.bullets:
+        out.append("<ul>" + "".join(f"<li>{escape(b)}</li>" for b in section.bullets) + "</ul>")
+    elif section.kind == "skills":
+        out.extend(
+            f"<p><strong>{escape(c.name)}:</strong> {escape(', '.join(c.skills))}</p>"
+            for c in section.skills
+        )
+    elif section.kind == "education":
+        out.extend(f"<p>{escape(line)}</p>" for line in section.lines)
+    elif section.kind == "experience":
+        bullets = []
+        for entry in section.entries:
+            if entry.kind == "bullet":
+                bullets.append(f"<li>{escape(entry.text)}</li>")
+                continue
+            if bullets:
+                out.append("<ul>" + "".join(bullets) + "</ul>")
+                bullets = []
+            if entry.kind == "company":
+                out.append(f'<h3 class="company">{escape(entry.text)}</h3>')
+            elif entry.kind == "role":
+                dates = " to ".join(d for d in (entry.start, entry.end) if d)
+                out.append(
+                    f'<p class="role"><strong>{escape(entry.title or entry.text)}</strong>'
+                    + (f' <span class="dates">{escape(dates)}</span>' if dates else "")
+                    + "</p>"
+                )
+            elif entry.kind == "heading":
+                out.append(f"<p><strong>{escape(entry.text)}</strong></p>")
+            elif entry.kind == "technologies":
+                out.append(f"<p><strong>{escape(entry.label)}:</strong> {escape(entry.text)}</p>")
+            else:
+                out.append(f"<p>{escape(entry.text)}</p>")
+        if bullets:
+            out.append("<ul>" + "".join(bullets) + "</ul>")
+    return "\n".join(out)
+
+
+def render_html(content) -> str:
+    """HTML fragment (no <html>/<body>) for in-app preview."""
+    resume = as_resume(content)
+    parts = ['<article class="resume">']
+    if resume.name:
+        parts.append(f"<h1>{escape(resume.name)}</h1>")
+    if resume.contact:
+        parts.append(f'<p class="contact">{escape("  |  ".join(resume.contact))}</p>')
+    parts.extend(f"<section>{_html_section(s)}</section>" for s in resume.sections)
+    parts.append("</article>")
+    return "\n".join(parts)
+
+
+def render_text(content) -> str:
+    """Normalized plain text, e.g. for pasting into application forms."""
+    resume = as_resume(content)
+    lines = []
+    if resume.name:
+        lines.append(resume.name)
+    if resume.contact:
+        lines.append(" | ".join(resume.contact))
+    for section in resume.sections:
+        lines += ["", section.title]
+        if section.kind == "skills":
+            lines += [f"{c.name}: {', '.join(c.skills)}" for c in section.skills]
+        elif section.kind == "education":
+            lines += section.lines
+        elif section.kind == "experience":
+            for entry in section.entries:
+                if entry.kind == "bullet":
+                    lines.append(f"- {entry.text}")
+                elif entry.kind == "technologies":
+                    lines.append(f"{entry.label}: {entry.text}")
+                else:
+                    if entry.kind == "company" and entry.spaced:
+                        lines.append("")
+                    lines.append(entry.text)
+        else:
+            lines += [f"- {b}" for b in section.bullets]
+    return "\n".join(lines).strip() + "\n"
@@ -0,0 +1,368 @@
+# backend/app/resume_prompts.py
+"""
+Prompts for resume generation, shared by the sync endpoints and the Celery task.
+
+When candidate_info is in the structured form the frontend sends ("Name:",
+"Email:", ... then "Technical Skills:", "Work Experience:", "Education:",
+"Certifications:" blocks), each resume section is generated by its own call
+whose prompt holds only the inputs that section depends on. Since LLM
+outputs are cached by prompt (app/llm_cache.py), a new job description only
+regenerates the JD-tailored sections, and a candidate edit only the sections
+reading the edited field. The header is built without the model.
+
+Free-form candidate_info falls back to the original two calls: everything
+except work experience, and the work experience section on its own.
+"""
+import re
+
+RESUME_MODEL = "gpt-4o-mini"
+RESUME_TEMPERATURE = 0.3
+
+MAIN_SECTIONS_SYSTEM = "You write polished, ATS-friendly resumes."
+WORK_EXPERIENCE_SYSTEM = "You write only the Work Experience section for ATS resumes."
+
+
+def main_sections_prompt(job_desc: str, candidate_info: str, work_exp_str: str) -> str:
+    return f"""
+        You are a professional resume writer. Using the Job Description and Candidate Information provided below, generate a clean, ATS-optimized resume that strictly follows the section order and formatting rules listed here:
+
+        ⚠️ IMPORTANT: Output must contain the **resume only** — do not include explanations, disclaimers, notes, or extra text outside of the resume.
+
+        SECTION ORDER:
+
+        1. **PROFESSIONAL SUMMARY** – Generate **6 to 8 bullet points**.  
+            - The **first bullet point** must always mention the candidate's **total years of professional experience**. If this information is present in the JOB DESCRIPTION, use the role mentioned there when framing the experience.  
+                WORK EXPERIENCE: {work_exp_str}  
+            - Represent the total experience as **"X+ years of experience"** (e.g., *5+ years*, *6+ years*).  
+            - Each bullet point must be **at least 2 lines long**, providing rich, detailed information. Avoid short or generic bullets.  
+            - The **remaining bullet points** (6–8 total) should comprehensively highlight the candidate’s **key skills, achievements, career milestones, and qualifications** that align closely with the given Job Description.  
+            - Each bullet must **start with "- "** (a hyphen followed by a space).  
+  
+        2. **SKILLS** – Based on the Job Description and Candidate Information:
+
+            1. Identify the **most relevant role/position** (e.g., .NET Developer, Java Backend Engineer, Salesforce Developer, Data Engineer, DevOps Engineer).
+            2. Create a **resume-ready Skills section** with **10–12 subsections**, tailored to that role and the JD.
+
+            ⚠️ RULES:
+            - Subsections must be **category-based** and recruiter-friendly (e.g., Programming Languages, Frameworks & Libraries, Databases, Cloud Platforms, DevOps & CI/CD, Testing & QA, Security & Compliance, Monitoring & Observability, Collaboration Tools).
+            - Use concise, ATS-optimized, professional wording for subsection titles.
+            - Fill each subsection with **8–20 related technologies/tools**, directly matching the JD and candidate info.
+            - Where possible, **expand categories with specific services or tools** (e.g., list AWS services like EC2, S3, Glue, Lambda, CloudWatch — not just "AWS").
+            - Always mirror exact JD keywords (e.g., if JD says "GCP, Spark, BigQuery, Kafka" → those must appear under correct categories).
+            - Include versions where impactful (e.g., Java 11/17, .NET 6/7, Spring Boot 3.x, Hadoop 3.x).
+            - Do not invent irrelevant categories or mix unrelated technologies into the wrong subsection.
+            - Always include these **mandatory baseline categories**, even if not explicitly in the JD:
+                - Programming Languages  
+                - Operating Systems  
+                - Cloud Platforms
+                - DevOps & CI/CD Tools  
+                - Development Tools                   
+
+            Example subsections (adjust dynamically per JD):  
+            - Programming Languages  
+            - Frameworks & Libraries  
+            - Databases & Data Warehousing  
+            - Big Data & Streaming  
+            - Cloud Platforms  
+            - DevOps & CI/CD Tools  
+            - Testing & QA  
+            - Security & Compliance  
+            - Monitoring & Observability  
+            - Collaboration Tools  
+            - Documentation Tools  
+            - Operating Systems  
+
+            ⚠️ Ensure each subsection is **fully loaded with at least 8 skills** and contains **16–20 skills where possible**.
+            ⚠️ All technologies listed here must also appear in the **Technologies Used** lines under the WORK EXPERIENCE section.
+
+
+
+        3. **CERTIFICATIONS**
+
+        4. **EDUCATION** 
+            Format the education section clearly and consistently using the structure shown below. 
+
+            Example Format:
+                MS in Computer Science
+                University of XYZ, USA | GPA: 3.8/4.0
+                B.Tech in Computer Science Engineering
+                JNTU Hyderabad | Percentage: 85%
+
+            Make sure the formatting follows this structure exactly:
+            [Degree] in [Field of Study]
+            [University Name] | [GPA or Percentage]
+
+            Do not include additional details like thesis titles, coursework, or graduation years unless specifically asked.
+        
+        ⚠️ IMPORTANT: Do NOT generate the WORK EXPERIENCE section. It will be added separately.
+
+        FORMATTING RULES:
+        - Display the candidate's **Name** at the top.
+        - Center **Email**, **Phone Number**, and **Candidate Location** on the same line directly below the name, using the format:  
+        Email: | Mobile: | Location:
+        - Use 0.5-inch page margins.
+        - Add a tab space before each bullet point.
+        - Do not use markdown or bullet characters like "-", "*", or "•".
+        - The **SKILLS** section must always follow the defined categories above—never as a plain list.
+        - Always ensure the final resume spans at least 2 full pages of Word or PDF output.
+
+        JOB DESCRIPTION:
+        {job_desc}
+
+        CANDIDATE INFORMATION:
+        {candidate_info}
+        """
+
+
+def work_experience_prompt(job_desc: str, candidate_info: str) -> str:
+    return f"""
+        Generate ONLY the WORK EXPERIENCE section for this resume.
+
+        3. **WORK EXPERIENCE** – Merge **Work History** and **Work Experience** into a unified section. For each job role:
+            - ⚠️ IMPORTANT: Use WORK EXPERIENCE from the CANDIDATE INFORMATION only
+            - Include the Job Title, Company Name (bold), Job Location, and timeline using the format:
+                [Company Name] – [Job Location]  
+                [Job Title] – [Start Month Year] to [End Month Year]
+
+        - Add 10 to 15 high-impact bullet points per role. Each bullet point must:
+        - Each bullet point must be exactly 2 lines long, with rich and specific details — including technologies used, metrics, project outcomes, team collaboration, challenges faced, and business impact.
+        - "When generating points for each company, first identify the industry it operates in, and then tailor the points to be relevant to that specific industry projects.
+        - Start with a strong action verb (e.g., Spearheaded, Engineered, Optimized, Automated, Delivered).
+        - Focus on achievements, measurable outcomes, and business value rather than just responsibilities.
+        - Include quantifiable results wherever possible (e.g., improved ETL performance by 35%, reduced deployment time by 40%, cut costs by 20% annually).
+        - Highlight leadership, innovation, automation, and cross-functional collaboration.
+        - Showcase modern practices (e.g., Cloud Migration, DevOps, CI/CD automation, Data Engineering, AI/ML, Security, Scalability).
+        - Be specific, technical, and results-driven — not generic.
+        
+
+        - ⚠️ Validate technology usage against the job timeline:
+        - ONLY include technologies, tools, frameworks, or platforms that were **publicly available and in practical use** during the given employment period.
+        - Example: Do NOT include Generative AI, Azure OpenAI, MS Fabric, or other technologies launched post-2021 in roles dated 2020 or earlier.
+        - Ensure all technologies and practices mentioned are **realistically applicable** based on release year and industry adoption timeline.
+
+        - Total bullet points should follow this logic:
+        - For 1 company: 15 to 20 bullet points.
+        - For 2 companies: 15 to 20 bullet points each (total: 30-40 points).
+        - For 3 companies: 10 to 15 bullet points each (total: 30-45 points).
+        - For 4 companies: 10 to 15 bullet points each (total: 40-60 points).
+        - For 5 companies: 10 to 15 bullet points each (total: 60-70 points).
+        - For 6 companies: 10 to 15 bullet points each (total: 70-80 points).
+        - For 7 companies: 10 to 15 bullet points each (total: 70-80 points).
+
+        - No filler or repetition: Each bullet point must offer unique, concrete contributions or achievements.
+
+        - Write in professional resume tone, use strong action verbs, and focus on clarity, impact, and relevance to technical or engineering roles.
+
+        - End each job section with the line:  
+        Technologies Used: tech1, tech2, ..., tech15  
+            ⚠️ Ensure each role includes 10 to 15 technologies mapped directly from the SKILLS section.  
+            ⚠️ Across all roles, the union of technologies must comprehensively cover the entire SKILLS section.
+
+        JOB DESCRIPTION:
+        {job_desc}
+
+        CANDIDATE INFORMATION:
+        {candidate_info}
+        """
+
+
+def main_sections_messages(job_desc: str, candidate_info: str, work_exp_str: str) -> list:
+    return [
+        {"role": "system", "content": MAIN_SECTIONS_SYSTEM},
+        {"role": "user", "content": main_sections_prompt(job_desc, candidate_info, work_exp_str)},
+    ]
+
+
+def work_experience_messages(job_desc: str, candidate_info: str) -> list:
+    return [
+        {"role": "system", "content": WORK_EXPERIENCE_SYSTEM},
+        {"role": "user", "content": work_experience_prompt(job_desc, candidate_info)},
+    ]
+
+
+# ---- Section-level generation ----
+RESUME_SECTION_TITLES = {
+    "summary": "PROFESSIONAL SUMMARY",
+    "skills": "SKILLS",
+    "certifications": "CERTIFICATIONS",
+    "education": "EDUCATION",
+    "experience": "WORK EXPERIENCE",
+}
+RESUME_SECTION_ORDER = ("summary", "skills", "certifications", "education", "experience")
+
+_HEADER_FIELDS = {"name": "name", "email": "email", "phone": "phone", "location": "location"}
+_BLOCK_FIELDS = {
+    "technical skills": "technical_skills",
+    "work experience": "work_experience",
+    "education": "education",
+    "certifications": "certifications",
+}
+_LABEL_RE = re.compile(r"^\s*([A-Za-z ]+):\s*(.*)$")
+
+
+def split_candidate_info(candidate_info: str):
+    """
+    Split the structured candidate_info into its fields.
+
+    Returns None when the text is not in that form (no "Name:" line or no
+    "Work Experience:" block), in which case callers use the two-call prompts.
+    """
+    fields = {key: "" for key in list(_HEADER_FIELDS.values()) + list(_BLOCK_FIELDS.values())}
+    block = None
+    lines = {key: [] for key in _BLOCK_FIELDS.values()}
+    for line in (candidate_info or "").replace("\r\n", "\n").split("\n"):
+        match = _LABEL_RE.match(line)
+        label = match.group(1).strip().lower() if match else None
+        if label in _BLOCK_FIELDS and not match.group(2).strip():
+            block = _BLOCK_FIELDS[label]
+        elif block is None and label in _HEADER_FIELDS:
+            value = match.group(2).strip()
+            fields[_HEADER_FIELDS[label]] = "" if value == "N/A" else value
+        elif block is not None:
+            lines[block].append(line)
+    for key, block_lines in lines.items():
+        fields[key] = "\n".join(block_lines).strip()
+    if not fields["name"] or not fields["work_experience"]:
+        return None
+    return fields
+
+
+def resume_header(fields: dict) -> str:
+    """Name line and the centered contact line, in the layout the LLM used to produce."""
+    contact = [
+        f"{label}: {fields[key]}"
+        for label, key in (("Email", "email"), ("Mobile", "phone"), ("Location", "location"))
+        if fields.get(key)
+    ]
+    return "\n".join(filter(None, [fields.get("name", ""), " | ".join(contact)]))
+
+
+def _section_only(title: str) -> str:
+    return f"""
+        ⚠️ IMPORTANT: Output ONLY the {title} section, starting with the line "{title}". Do not include the candidate's name, contact details, any other section, explanations or notes. Do not use markdown.
+        """
+
+
+def summary_prompt(job_desc: str, work_exp_str: str, technical_skills: str) -> str:
+    return f"""
+        You are a professional resume writer. Using the Job Description and the candidate's Technical Skills provided below, write the PROFESSIONAL SUMMARY of an ATS-optimized resume.
+        {_section_only("PROFESSIONAL SUMMARY")}
+        PROFESSIONAL SUMMARY – Generate **6 to 8 bullet points**.
+            - The **first bullet point** must always mention the candidate's **total years of professional experience**. If this information is present in the JOB DESCRIPTION, use the role mentioned there when framing the experience.
+                WORK EXPERIENCE: {work_exp_str}
+            - Represent the total experience as **"X+ years of experience"** (e.g., *5+ years*, *6+ years*).
+            - Each bullet point must be **at least 2 lines long**, providing rich, detailed information. Avoid short or generic bullets.
+            - The **remaining bullet points** (6–8 total) should comprehensively highlight the candidate’s **key skills, strengths, and qualifications** that align closely with the given Job Description.
+            - Each bullet must **start with "- "** (a hyphen followed by a space).
+
+        JOB DESCRIPTION:
+        {job_desc}
+
+        TECHNICAL SKILLS:
+        {technical_skills}
+        """
+
+
+def skills_prompt(job_desc: str, technical_skills: str) -> str:
+    return f"""
+        You are a professional resume writer. Using the Job Description and the candidate's Technical Skills provided below, write the SKILLS section of an ATS-optimized resume.
+        {_section_only("SKILLS")}
+        1. Identify the **most relevant role/position** (e.g., .NET Developer, Java Backend Engineer, Salesforce Developer, Data Engineer, DevOps Engineer).
+        2. Create a **resume-ready Skills section** with **10–12 subsections**, tailored to that role and the JD.
+
+        ⚠️ RULES:
+        - Write each subsection on its own line as "Category: skill1, skill2, ...".
+        - Subsections must be **category-based** and recruiter-friendly (e.g., Programming Languages, Frameworks & Libraries, Databases, Cloud Platforms, DevOps & CI/CD, Testing & QA, Security & Compliance, Monitoring & Observability, Collaboration Tools).
+        - Use concise, ATS-optimized, professional wording for subsection titles.
+        - Fill each subsection with **8–20 related technologies/tools**, directly matching the JD and candidate info.
+        - Where possible, **expand categories with specific services or tools** (e.g., list AWS services like EC2, S3, Glue, Lambda, CloudWatch — not just "AWS").
+        - Always mirror exact JD keywords (e.g., if JD says "GCP, Spark, BigQuery, Kafka" → those must appear under correct categories).
+        - Include versions where impactful (e.g., Java 11/17, .NET 6/7, Spring Boot 3.x, Hadoop 3.x).
+        - Do not invent irrelevant categories or mix unrelated technologies into the wrong subsection.
+        - Always include these **mandatory baseline categories**, even if not explicitly in the JD:
+            - Programming Languages
+            - Operating Systems
+            - Cloud Platforms
+            - DevOps & CI/CD Tools
+            - Development Tools
+
+        ⚠️ Ensure each subsection is **fully loaded with at least 8 skills** and contains **16–20 skills where possible**.
+
+        JOB DESCRIPTION:
+        {job_desc}
+
+        TECHNICAL SKILLS:
+        {technical_skills}
+        """
+
+
+def certifications_prompt(certifications: str) -> str:
+    return f"""
+        You are a professional resume writer. Format the candidate's certifications as the CERTIFICATIONS section of an ATS-optimized resume.
+        {_section_only("CERTIFICATIONS")}
+        - One certification per line, each starting with "- " (a hyphen followed by a space).
+        - Use the official certification name; keep the issuer and year when given. Do not invent certifications.
+
+        CERTIFICATIONS:
+        {certifications}
+        """
+
+
+def education_prompt(education: str) -> str:
+    return f"""
+        You are a professional resume writer. Format the candidate's education as the EDUCATION section of an ATS-optimized resume.
+        {_section_only("EDUCATION")}
+        Format the education section clearly and consistently using the structure shown below.
+
+        Example Format:
+            MS in Computer Science
+            University of XYZ, USA | GPA: 3.8/4.0
+            B.Tech in Computer Science Engineering
+            JNTU Hyderabad | Percentage: 85%
+
+        Make sure the formatting follows this structure exactly:
+        [Degree] in [Field of Study]
+        [University Name] | [GPA or Percentage]
+
+        Do not include additional details like thesis titles, coursework, or graduation years unless specifically asked.
+
+        EDUCATION:
+        {education}
+        """
+
+
+def _messages(system: str, prompt: str) -> list:
+    return [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+
+
+def resume_section_messages(job_desc: str, candidate_info: str, work_exp_str: str) -> dict:
+    """
+    Ordered {section: messages} for one resume.
+
+    Sections are "summary", "skills", "certifications", "education" and
+    "experience" for structured candidate_info (certifications/education are
+    skipped when empty), or "main" and "experience" otherwise. Each section
+    prompt carries only the fields it uses: the work history goes to the
+    experience prompt alone, and certifications/education skip the job
+    description.
+    """
+    fields = split_candidate_info(candidate_info)
+    if fields is None:
+        return {
+            "main": main_sections_messages(job_desc, candidate_info, work_exp_str),
+            "experience": work_experience_messages(job_desc, candidate_info),
+        }
+
+    skills, work = fields["technical_skills"], fields["work_experience"]
+    sections = {
+        "summary": _messages(MAIN_SECTIONS_SYSTEM, summary_prompt(job_desc, work_exp_str, skills)),
+        "skills": _messages(MAIN_SECTIONS_SYSTEM, skills_prompt(job_desc, skills)),
+    }
+    if fields["certifications"]:
+        sections["certifications"] = _messages(MAIN_SECTIONS_SYSTEM, certifications_prompt(fields["certifications"]))
+    if fields["education"]:
+        sections["education"] = _messages(MAIN_SECTIONS_SYSTEM, education_prompt(fields["education"]))
+    # The experience prompt only needs the skills and work history blocks
+    experience_info = f"Technical Skills:\n{skills}\n\nWork Experience:\n{work}"
+    sections["experience"] = work_experience_messages(job_desc, experience_info)
+    return sections
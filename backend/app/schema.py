@@ -0,0 +1,41 @@
+# backend/app/schema.py
+"""
+Schema capability registry.
+
+Some tables only exist once the matching migration has run (e.g. the
+candidate/user assignment table). Instead of asking the database catalog on
+every request, the table list is probed once per process and cached here.
+Call capabilities.refresh() after running migrations.
+"""
+import threading
+from sqlalchemy import inspect
+from .models import db
+
+
+class SchemaCapabilities:
+    def __init__(self):
+        self._tables = None
+        self._lock = threading.Lock()
+
+    def _table_names(self):
+        if self._tables is None:
+            with self._lock:
+                if self._tables is None:
+                    self._tables = frozenset(inspect(db.engine).get_table_names())
+        return self._tables
+
+    def has_table(self, name: str) -> bool:
+        return name in self._table_names()
+
+    @property
+    def has_assignments(self) -> bool:
+        """True when the candidate_assigned_users table exists."""
+        return self.has_table("candidate_assigned_users")
+
+    def refresh(self):
+        """Forget the cached probe; the next check re-reads the catalog."""
+        with self._lock:
+            self._tables = None
+
+
+capabilities = SchemaCapabilities()
@@ -0,0 +1,39 @@
+"""
+ASGI entry point.
+
+The OpenAI-bound endpoints (resume generation, AI field mapping) are served
+by asyncio handlers in app/async_endpoints.py, as is the resume job progress
+stream (Server-Sent Events); every other /api route is the
+unchanged Flask app, mounted behind them.
+
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+"""
+import os
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount
+
+from app import create_app
+from app.async_endpoints import build_routes
+
+flask_app = create_app()
+
+# Same policy flask-cors applies to the Flask routes
+cors = Middleware(
+    CORSMiddleware,
+    allow_origins=flask_app.config["CORS_ALLOWED_ORIGINS"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+    expose_headers=["Content-Type", "Authorization"],
+    allow_credentials=True,
+    max_age=3600,
+)
+
+app = Starlette(routes=[
+    *build_routes(flask_app, middleware=[cors]),
+    # Threads serving the Flask routes in each worker process
+    Mount("/", app=WSGIMiddleware(flask_app, workers=int(os.getenv("WSGI_THREADS", "10")))),
+])
@@ -0,0 +1,394 @@
+"""
+Deferred resume generation through the OpenAI Batch API
+
+Jobs created with mode="deferred" are not sent to the interactive
+generate_resume_async task. Instead:
+
+  submit_deferred_resumes  collects PENDING deferred jobs, writes one
+                           chat-completion request per distinct uncached
+                           section prompt (a candidate's education prompt is
+                           sent once for all their jobs) into a JSONL file,
+                           uploads it and creates one OpenAI batch (half the
+                           per-token price, no per-minute task rate limit)
+  poll_deferred_resumes    checks submitted batches; once a batch completes,
+                           its outputs go into the LLM section cache and each
+                           job gets its own finalize_deferred_resume task on
+                           priority_low, which assembles, renders and saves it
+                           exactly like an interactive one
+
+Both run on Celery beat (see celery_config.py) and as
+`flask resume_async submit-deferred` / `flask resume_async poll-deferred`.
+
+Runs may overlap (a slow poll and the next beat tick, or the CLI next to
+beat), so jobs are claimed with conditional UPDATEs before any work: submit
+tags its jobs with a claim token in llm_batch_id, and poll moves a job to
+FINALIZE_PROGRESS before failing or finalizing it. Only the run whose UPDATE
+matched acts on a job. A claim older than DEFERRED_CLAIM_TIMEOUT_SECONDS
+(the run or its finalize task died) can be taken again.
+"""
+import io
+import json
+import os
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, update
+
+from celery_config import celery_app, QUEUE_LOW, RESUME_DEFAULT_PRIORITY
+from celery_tasks import (
+    FINISHED_STATUSES,
+    call_openai_with_retry,
+    finish_resume_job,
+    update_job_progress,
+    worker_app_context,
+)
+from app import llm_cache
+from app.candidateresumebuilder import assemble_resume, extract_total_experience
+from app.openai_client import get_openai_client
+from app.resume_prompts import RESUME_MODEL, RESUME_TEMPERATURE, resume_section_messages
+
+DEFERRED_BATCH_MAX_JOBS = int(os.getenv("DEFERRED_BATCH_MAX_JOBS", "500"))
+DEFERRED_CLAIM_TIMEOUT_SECONDS = int(os.getenv("DEFERRED_CLAIM_TIMEOUT_SECONDS", "1800"))
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+
+# OpenAI batch statuses
+BATCH_RUNNING = ("validating", "in_progress", "finalizing", "cancelling")
+BATCH_FAILED = ("failed", "cancelled")
+
+# Job progress while its batch runs: SUBMITTED_PROGRESS .. SUBMITTED_PROGRESS + RUNNING_PROGRESS
+SUBMITTED_PROGRESS = 10
+RUNNING_PROGRESS = 70
+# Set when a poll claims a job for finalizing; running progress stays below it
+FINALIZE_PROGRESS = 85
+
+# llm_batch_id of jobs a submit run has claimed but not yet sent
+CLAIM_PREFIX = "claim:"
+
+
+def _job_sections(job, candidates):
+    """(candidate_info, {section: messages}) for a job, or raise ValueError"""
+    from app.models import db, Candidate, CandidateJob
+    from app.resume_async import format_candidate_info
+
+    if job.candidate_id not in candidates:
+        candidate = db.session.get(Candidate, job.candidate_id)
+        candidates[job.candidate_id] = format_candidate_info(candidate) if candidate else None
+    candidate_info = candidates[job.candidate_id]
+    job_row = db.session.get(CandidateJob, job.job_row_id) if job.job_row_id else None
+    if candidate_info is None or job_row is None or not (job_row.job_description or "").strip():
+        raise ValueError("Candidate or job description no longer exists")
+
+    work_exp_str = extract_total_experience(candidate_info)
+    return candidate_info, resume_section_messages(job_row.job_description, candidate_info, work_exp_str)
+
+
+def _fail(job_id, message):
+    update_job_progress(job_id, 'FAILURE', 0, error_message=message)
+
+
+def finalize_deferred_job(job, results, candidates=None):
+    """
+    Assemble, render and store a deferred job
+
+    `results` maps LLM cache keys (the batch custom_ids) to completion text.
+    Sections not in it (already cached at submit time, or with a prompt that
+    changed since) come from the LLM cache, falling back to a regular
+    completion.
+    """
+    try:
+        candidate_info, sections = _job_sections(job, candidates if candidates is not None else {})
+        client = None
+        outputs = {}
+        for name, messages in sections.items():
+            key = llm_cache.cache_key(RESUME_MODEL, RESUME_TEMPERATURE, messages)
+            if key in results:
+                outputs[name] = results[key]
+                continue
+            client = client or get_openai_client()
+            outputs[name] = llm_cache.cached_completion(
+                RESUME_MODEL, RESUME_TEMPERATURE, messages,
+                lambda: call_openai_with_retry(client, messages)
+            )
+
+        merged_text = assemble_resume(candidate_info, outputs)
+        if not merged_text:
+            raise Exception("Resume generation failed: Empty response")
+        update_job_progress(job.id, 'PROCESSING', FINALIZE_PROGRESS)
+        finish_resume_job(job.id, job.candidate_id, job.job_row_id, merged_text, job.file_type, job.pdf_renderer)
+    except Exception as e:
+        traceback.print_exc()
+        _fail(job.id, f"{str(e)}\n{traceback.format_exc()}")
+
+
+@celery_app.task(name='batch_tasks.finalize_deferred_resume')
+def finalize_deferred_resume(job_id, results=None):
+    """Finalize one claimed deferred job; `results` holds its batch outputs by cache key"""
+    from app.models import db, ResumeGenerationJob
+
+    with worker_app_context():
+        job = db.session.get(ResumeGenerationJob, job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return {'status': 'SKIPPED'}
+        finalize_deferred_job(job, results or {})
+        return {'status': 'DONE'}
+
+
+def _publish_finalize(job, results=None):
+    finalize_deferred_resume.apply_async(
+        args=[job.id, results or {}],
+        queue=QUEUE_LOW,
+        priority=RESUME_DEFAULT_PRIORITY if job.priority is None else job.priority,
+    )
+
+
+def _claim_cutoff():
+    return datetime.utcnow() - timedelta(seconds=DEFERRED_CLAIM_TIMEOUT_SECONDS)
+
+
+def _claim_pending(limit):
+    """Claim up to `limit` submittable deferred jobs for this run; returns them"""
+    from app.models import db, ResumeGenerationJob as Job
+
+    claimable = and_(
+        Job.mode == 'deferred',
+        Job.status == 'PENDING',
+        or_(
+            Job.llm_batch_id.is_(None),
+            and_(Job.llm_batch_id.startswith(CLAIM_PREFIX), Job.dispatched_at < _claim_cutoff()),
+        ),
+    )
+    ids = [
+        job_id for (job_id,) in db.session.query(Job.id)
+        .filter(claimable).order_by(Job.created_at.asc()).limit(limit)
+    ]
+    if not ids:
+        return []
+
+    token = f"{CLAIM_PREFIX}{uuid.uuid4().hex}"
+    db.session.execute(
+        update(Job)
+        .where(Job.id.in_(ids), claimable)
+        .values(llm_batch_id=token, dispatched_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return Job.query.filter(Job.llm_batch_id == token).order_by(Job.created_at.asc()).all()
+
+
+def _set_batch(jobs, token, batch_id, status):
+    """Move claimed jobs from the claim token to `batch_id` (None releases them)"""
+    from app.models import db, ResumeGenerationJob as Job
+
+    if not jobs:
+        return
+    db.session.execute(
+        update(Job)
+        .where(Job.id.in_([job.id for job in jobs]), Job.llm_batch_id == token)
+        .values(
+            llm_batch_id=batch_id,
+            status=status,
+            dispatched_at=datetime.utcnow() if batch_id else None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+@celery_app.task(name='batch_tasks.submit_deferred_resumes')
+def submit_deferred_resumes(limit=DEFERRED_BATCH_MAX_JOBS):
+    """Submit PENDING deferred jobs as one OpenAI batch; returns the batch id (or None)"""
+    with worker_app_context():
+        jobs = _claim_pending(limit)
+        if not jobs:
+            return None
+        token = jobs[0].llm_batch_id
+
+        # custom_id is the section's LLM cache key, so identical prompts
+        # across jobs are requested once
+        requests, batched, ready, candidates = {}, [], [], {}
+        for job in jobs:
+            try:
+                _, sections = _job_sections(job, candidates)
+            except ValueError as e:
+                _fail(job.id, str(e))
+                continue
+            pending = 0
+            for messages in sections.values():
+                key, cached = llm_cache.lookup(RESUME_MODEL, RESUME_TEMPERATURE, messages)
+                if cached is not None:
+                    continue
+                pending += 1
+                requests.setdefault(key, json.dumps({
+                    "custom_id": key,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": {"model": RESUME_MODEL, "temperature": RESUME_TEMPERATURE, "messages": messages},
+                }))
+            (batched if pending else ready).append(job)
+
+        batch_id = None
+        if requests:
+            try:
+                client = get_openai_client()
+                upload = client.files.create(
+                    file=("resume_batch.jsonl", io.BytesIO("\n".join(requests.values()).encode("utf-8"))),
+                    purpose="batch",
+                )
+                batch = client.batches.create(
+                    input_file_id=upload.id,
+                    endpoint=BATCH_ENDPOINT,
+                    completion_window=BATCH_COMPLETION_WINDOW,
+                    metadata={"kind": "resume_generation", "jobs": str(len(batched))},
+                )
+            except Exception:
+                # Leave the jobs for the next run
+                _set_batch(batched + ready, token, None, 'PENDING')
+                raise
+            batch_id = batch.id
+            _set_batch(batched, token, batch_id, 'PROCESSING')
+            for job in batched:
+                update_job_progress(job.id, 'PROCESSING', SUBMITTED_PROGRESS)
+
+        # Every section already cached: nothing to wait for. Leaving the claim
+        # token would make poll look the "batch" up, so clear it
+        _set_batch(ready, token, None, 'PROCESSING')
+        for job in ready:
+            update_job_progress(job.id, 'PROCESSING', SUBMITTED_PROGRESS)
+            _publish_finalize(job)
+
+        print(f"Submitted {len(batched)} deferred job(s) in batch {batch_id}; {len(ready)} served from cache")
+        return batch_id
+
+
+def _read_jsonl(client, file_id):
+    if not file_id:
+        return []
+    text = client.files.content(file_id).text
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _collect_results(client, batch):
+    """
+    Read a finished batch into ({cache key: text}, {cache key: error}).
+
+    Successful outputs are also written to the LLM cache.
+    """
+    results, errors = {}, {}
+    lines = _read_jsonl(client, batch.output_file_id) + _read_jsonl(client, getattr(batch, "error_file_id", None))
+    for line in lines:
+        key = line["custom_id"]
+        response = line.get("response") or {}
+        if line.get("error") or response.get("status_code") != 200:
+            error = line.get("error") or (response.get("body") or {}).get("error") or {}
+            errors[key] = f"OpenAI batch error: {error.get('message', error)}"
+            continue
+        results[key] = response["body"]["choices"][0]["message"]["content"] or ""
+        llm_cache.store(key, results[key])
+    return results, errors
+
+
+def _job_results(job, results, errors, candidates):
+    """(this job's outputs by cache key, first batch error among its prompts or None)"""
+    try:
+        _, sections = _job_sections(job, candidates)
+    except ValueError as e:
+        return {}, str(e)
+    outputs = {}
+    for messages in sections.values():
+        key = llm_cache.cache_key(RESUME_MODEL, RESUME_TEMPERATURE, messages)
+        if key in errors:
+            return {}, errors[key]
+        if key in results:
+            outputs[key] = results[key]
+    return outputs, None
+
+
+def _claimable_for_finalize():
+    """Submitted jobs no poll has claimed yet, or whose claim went stale"""
+    from app.models import ResumeGenerationJob as Job
+
+    return and_(
+        Job.mode == 'deferred',
+        Job.status == 'PROCESSING',
+        or_(Job.progress < FINALIZE_PROGRESS, Job.dispatched_at < _claim_cutoff()),
+    )
+
+
+def _claim_for_finalize(job_id, batch_id):
+    """Take a job of `batch_id` for this poll; False when another run has it"""
+    from app.models import db, ResumeGenerationJob as Job
+
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.llm_batch_id == batch_id, _claimable_for_finalize())
+        .values(progress=FINALIZE_PROGRESS, dispatched_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+@celery_app.task(name='batch_tasks.poll_deferred_resumes')
+def poll_deferred_resumes():
+    """Advance every submitted deferred job whose OpenAI batch has changed state"""
+    from app.models import db, ResumeGenerationJob as Job
+
+    with worker_app_context():
+        batch_ids = [
+            batch_id for (batch_id,) in db.session.query(Job.llm_batch_id).filter(
+                _claimable_for_finalize(),
+                Job.llm_batch_id.isnot(None),
+                ~Job.llm_batch_id.startswith(CLAIM_PREFIX),
+            ).distinct()
+        ]
+        if not batch_ids:
+            return {}
+
+        client = get_openai_client()
+        states = {}
+        for batch_id in batch_ids:
+            try:
+                batch = client.batches.retrieve(batch_id)
+            except Exception as e:
+                print(f"Warning: Failed to check OpenAI batch {batch_id}: {e}")
+                continue
+            states[batch_id] = batch.status
+            jobs = Job.query.filter(Job.llm_batch_id == batch_id, _claimable_for_finalize()).all()
+
+            if batch.status in BATCH_RUNNING:
+                counts = batch.request_counts
+                if counts and counts.total:
+                    progress = SUBMITTED_PROGRESS + RUNNING_PROGRESS * counts.completed // counts.total
+                    for job in jobs:
+                        if job.progress != progress:
+                            update_job_progress(job.id, 'PROCESSING', progress)
+                continue
+
+            if batch.status in BATCH_FAILED:
+                for job in jobs:
+                    if _claim_for_finalize(job.id, batch_id):
+                        _fail(job.id, f"OpenAI batch {batch_id} {batch.status}")
+                continue
+
+            # completed, or expired with partial output: keep what finished
+            # (it is in the LLM cache now)
+            results, errors = _collect_results(client, batch)
+            candidates = {}
+            for job in jobs:
+                if not _claim_for_finalize(job.id, batch_id):
+                    continue
+                outputs, error = _job_results(job, results, errors, candidates)
+                if error:
+                    _fail(job.id, error)
+                elif batch.status == "expired":
+                    # Submit the job again; finished sections are served from the cache
+                    db.session.execute(
+                        update(Job).where(Job.id == job.id)
+                        .values(llm_batch_id=None, status='PENDING', progress=0, dispatched_at=None)
+                    )
+                    db.session.commit()
+                else:
+                    _publish_finalize(job, outputs)
+        return states
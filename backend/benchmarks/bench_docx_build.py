@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for DOCX construction (create_resume_word + save).
+
+Uses the same synthetic 3-page, 60-bullet resume as bench_pdf_render.py.
+
+Usage (from the backend directory):
+    python benchmarks/bench_docx_build.py
+    python benchmarks/bench_docx_build.py --iterations 200 --bullets 60
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pdf_render import sample_resume  # noqa: E402
+
+
+def _stats(label, timings):
+    timings = sorted(timings)
+    print(f"{label:<14} {statistics.mean(timings):>9.2f} {timings[len(timings) // 2]:>9.2f} "
+          f"{timings[min(len(timings) - 1, int(len(timings) * 0.95))]:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--bullets", type=int, default=60)
+    args = parser.parse_args()
+
+    from app.candidateresumebuilder import create_resume_word
+    from app.resume_model import parse_resume
+
+    resume = parse_resume(sample_resume(args.bullets))
+    create_resume_word(resume).save(BytesIO())  # warm-up (template build, imports)
+
+    build, save, size = [], [], 0
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        doc = create_resume_word(resume)
+        built = time.perf_counter()
+        buffer = BytesIO()
+        doc.save(buffer)
+        done = time.perf_counter()
+        build.append((built - start) * 1000)
+        save.append((done - built) * 1000)
+        size = buffer.tell()
+
+    print(f"{args.iterations} iterations, {args.bullets} bullets, {size} bytes")
+    print(f"{'stage':<14} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    _stats("build", build)
+    _stats("save", save)
+    _stats("total", [b + s for b, s in zip(build, save)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Password verification cost at each hash setting.
+
+For every method, times check_password_hash on a single thread (logins/sec
+per core) and then with --workers threads at once, the way the login pool in
+app/passwords.py runs them, to show how far hashing scales across cores.
+
+Usage (from the backend directory):
+    python benchmarks/bench_password_hash.py
+    python benchmarks/bench_password_hash.py --methods scrypt:16384:8:1 pbkdf2:sha256:310000 --iterations 50 --workers 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DEFAULT_METHODS = [
+    "scrypt:32768:8:1",
+    "scrypt:16384:8:1",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:310000",
+    "pbkdf2:sha256:100000",
+]
+
+
+def _verify_ms(stored, password):
+    from werkzeug.security import check_password_hash
+
+    start = time.perf_counter()
+    if not check_password_hash(stored, password):
+        raise SystemExit("verification failed")
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    from app.passwords import hash_password
+
+    password = "correct horse battery staple"
+    print(f"{args.iterations} verifications per method, {args.workers} worker(s), {os.cpu_count()} CPU(s)")
+    print(f"{'method':<24} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'/s/core':>9} {'/s pool':>9}")
+    for method in args.methods:
+        stored = hash_password(password, method=method)
+        _verify_ms(stored, password)  # warm-up
+
+        timings = sorted(_verify_ms(stored, password) for _ in range(args.iterations))
+
+        total = args.iterations * args.workers
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            start = time.perf_counter()
+            list(pool.map(lambda _: _verify_ms(stored, password), range(total)))
+            pooled = total / (time.perf_counter() - start)
+
+        mean = statistics.mean(timings)
+        print(f"{method:<24} {mean:>9.2f} {timings[len(timings) // 2]:>9.2f} "
+              f"{timings[min(len(timings) - 1, int(len(timings) * 0.95))]:>9.2f} "
+              f"{1000 / mean:>9.1f} {pooled:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+PDF rendering benchmark: native (reportlab) vs DOCX -> LibreOffice.
+
+Each renderer runs in its own child process so peak RSS is measured
+separately. LibreOffice memory is reported from the converter processes the
+child waited on (one-shot mode); with OFFICE_SERVERS/OFFICE_POOL_SIZE set,
+the listeners live outside the child and only client-side RSS is counted.
+
+Usage (from the backend directory):
+    python benchmarks/bench_pdf_render.py
+    python benchmarks/bench_pdf_render.py --renderer native --iterations 50 --bullets 60
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def sample_resume(bullets=60):
+    """Synthetic resume in the cleaned LLM output format (about 3 pages at 60 bullets)."""
+    lines = [
+        "Jordan Example",
+        "Email: jordan@example.com | Phone: +1 555 010 2030 | Location: Austin, TX",
+        "PROFESSIONAL SUMMARY",
+    ]
+    lines += [f"- Delivered platform improvement {i} across distributed teams, cutting cost and latency." for i in range(6)]
+    lines += ["TECHNICAL SKILLS", "Languages", "- Python", "- Go", "- TypeScript", "Cloud", "AWS, GCP, Azure",
+              "Data", "- PostgreSQL", "- Redis"]
+    lines.append("WORK EXPERIENCE")
+    per_company = max(1, (bullets - 6) // 4)
+    for c in range(4):
+        lines.append(f"Company {c} – Remote")
+        lines.append(f"Senior Engineer – Jan {2012 + 3 * c} to Dec {2014 + 3 * c}")
+        lines += [f"- Built and shipped feature {c}.{i}, improving p95 latency by {i + 5}% for enterprise customers "
+                  f"while keeping error budgets intact." for i in range(per_company)]
+        lines.append("Technologies Used: Python, Flask, Celery, Redis, PostgreSQL")
+    lines += ["CERTIFICATIONS", "- AWS Solutions Architect", "EDUCATION", "B.S. Computer Science – UT Austin"]
+    return "\n".join(lines)
+
+
+def run_worker(renderer, iterations, bullets):
+    from app.candidateresumebuilder import create_resume_pdf
+
+    text = sample_resume(bullets)
+    create_resume_pdf(text, renderer)  # warm-up: imports, fonts, converter start
+    timings = []
+    size = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        size = len(create_resume_pdf(text, renderer).getvalue())
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(json.dumps({
+        "renderer": renderer,
+        "iterations": iterations,
+        "pdf_bytes": size,
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "self_max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children_max_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renderer", choices=["native", "libreoffice", "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--bullets", type=int, default=60)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.renderer, args.iterations, args.bullets)
+        return
+
+    renderers = ["native", "libreoffice"] if args.renderer == "all" else [args.renderer]
+    print(f"{'renderer':<12} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'RSS MB':>8} {'LO RSS MB':>10} {'bytes':>8}")
+    for renderer in renderers:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", "--renderer", renderer,
+             "--iterations", str(args.iterations), "--bullets", str(args.bullets)],
+            cwd=BACKEND_DIR, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{renderer:<12} failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{renderer:<12} {r['mean_ms']:>9.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['self_max_rss_mb']:>8.1f} {r['children_max_rss_mb']:>10.1f} {r['pdf_bytes']:>8}")
+
+
+if __name__ == "__main__":
+    main()
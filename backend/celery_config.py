@@ -8,13 +8,102 @@ from kombu import Queue
 # Redis URL from environment
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
+# Deferred (OpenAI Batch API) resume jobs: how often to submit and poll
+DEFERRED_SUBMIT_SECONDS = int(os.getenv('DEFERRED_SUBMIT_SECONDS', '900'))
+DEFERRED_POLL_SECONDS = int(os.getenv('DEFERRED_POLL_SECONDS', '300'))
+
+# ---- Resume job scheduling ----
+# Interactive single-resume requests go to priority_high; /generate-batch jobs
+# and re-published (recovered) jobs go to priority_low. Each queue gets its own
+# worker pool (see render.yaml), so bulk work never takes interactive capacity.
+# resume_generation keeps periodic tasks and messages published before routing.
+QUEUE_DEFAULT = 'resume_generation'
+QUEUE_HIGH = 'priority_high'
+QUEUE_LOW = 'priority_low'
+
+# Message priority inside a queue by subscription tier. Redis serves 0 first;
+# PROMOTED_PRIORITY is reserved for interactive jobs promoted by starvation
+# protection. Bulk jobs are aged inside priority_low and never reach it.
+PROMOTED_PRIORITY = 0
+RESUME_DEFAULT_PRIORITY = int(os.getenv('RESUME_DEFAULT_PRIORITY', '5'))
+
+
+def _tier_priorities(value):
+    """'gold:1,silver:5' -> {'gold': 1, 'silver': 5}"""
+    priorities = {}
+    for item in value.split(','):
+        tier, _, priority = item.partition(':')
+        if tier.strip() and priority.strip():
+            priorities[tier.strip().lower()] = min(9, max(PROMOTED_PRIORITY + 1, int(priority)))
+    return priorities
+
+
+RESUME_TIER_PRIORITIES = _tier_priorities(os.getenv('RESUME_TIER_PRIORITIES', 'gold:1,silver:5'))
+
+# Starvation protection: jobs not started after this many seconds are
+# re-published. Interactive jobs go to the front of priority_high; bulk jobs
+# stay in priority_low one priority step higher per wait (aging), so a batch
+# never overtakes interactive work.
+RESUME_MAX_WAIT_SECONDS = {
+    QUEUE_HIGH: int(os.getenv('RESUME_MAX_WAIT_HIGH_SECONDS', '120')),
+    QUEUE_LOW: int(os.getenv('RESUME_MAX_WAIT_LOW_SECONDS', '900')),
+}
+RESUME_PROMOTE_SECONDS = int(os.getenv('RESUME_PROMOTE_SECONDS', '60'))
+
+# Outbox relay: jobs committed but never published (broker down at request
+# time) are published by dispatch_pending_jobs every RESUME_DISPATCH_SECONDS,
+# once they are RESUME_DISPATCH_MIN_AGE_SECONDS old, so a request still
+# publishing its own job is not raced.
+RESUME_DISPATCH_SECONDS = int(os.getenv('RESUME_DISPATCH_SECONDS', '60'))
+RESUME_DISPATCH_MIN_AGE_SECONDS = int(os.getenv('RESUME_DISPATCH_MIN_AGE_SECONDS', '30'))
+
+# Optional per-worker limit on generate_resume_async starts, e.g. "10/m".
+# Celery rate limits are per worker and task, not per queue, so set it only on
+# the bulk (priority_low) worker service; the interactive pool is unthrottled.
+RESUME_TASK_RATE_LIMIT = os.getenv('RESUME_TASK_RATE_LIMIT') or None
+
+
+def resume_route(tier, bulk=False):
+    """(queue, priority) for a resume job; bulk = batch or re-published work"""
+    queue = QUEUE_LOW if bulk else QUEUE_HIGH
+    return queue, RESUME_TIER_PRIORITIES.get((tier or '').strip().lower(), RESUME_DEFAULT_PRIORITY)
+
+
+def aged_priority(priority):
+    """Next priority for a bulk job that waited too long (never PROMOTED_PRIORITY)"""
+    return max(PROMOTED_PRIORITY + 1, (RESUME_DEFAULT_PRIORITY if priority is None else priority) - 1)
+
+
+def queue_depths():
+    """Messages waiting in the Redis broker, per queue and priority"""
+    import redis
+
+    client = redis.from_url(REDIS_URL, socket_connect_timeout=2, socket_timeout=2)
+    steps = celery_app.conf.broker_transport_options['priority_steps']
+    sep = celery_app.conf.broker_transport_options['sep']
+    queues = (QUEUE_HIGH, QUEUE_LOW, QUEUE_DEFAULT)
+    pipe = client.pipeline()
+    for queue in queues:
+        for priority in steps:
+            pipe.llen(f"{queue}{sep}{priority}" if priority else queue)
+    lengths = iter(pipe.execute())
+    depths = {}
+    for queue in queues:
+        by_priority = {priority: next(lengths) for priority in steps}
+        depths[queue] = {
+            "total": sum(by_priority.values()),
+            "by_priority": {p: n for p, n in by_priority.items() if n},
+        }
+    return depths
+
+
 def make_celery(app_name=__name__):
     """Create and configure Celery instance"""
     celery = Celery(
         app_name,
         broker=REDIS_URL,
         backend=REDIS_URL,
-        include=['celery_tasks']  # Include task modules
+        include=['celery_tasks', 'batch_tasks']  # Include task modules
     )
     
     # Configuration
@@ -40,17 +129,44 @@ def make_celery(app_name=__name__):
         task_max_retries=3,
         
         # Queue settings
-        task_default_queue='resume_generation',
+        task_default_queue=QUEUE_DEFAULT,
         task_queues=(
-            Queue('resume_generation', routing_key='resume.#'),
-            Queue('priority_high', routing_key='priority.high'),
+            Queue(QUEUE_DEFAULT, routing_key='resume.#'),
+            Queue(QUEUE_HIGH, routing_key='priority.high'),
+            Queue(QUEUE_LOW, routing_key='priority.low'),
         ),
+        # Ten priority levels per queue (default is four)
+        broker_transport_options={
+            'priority_steps': list(range(10)),
+            'sep': ':',
+        },
         
-        # Rate limiting (prevent OpenAI rate limit issues)
+        # Rate limiting (prevent OpenAI rate limit issues); per worker, see
+        # RESUME_TASK_RATE_LIMIT
         task_annotations={
             'celery_tasks.generate_resume_async': {
-                'rate_limit': '10/m',  # 10 tasks per minute
+                'rate_limit': RESUME_TASK_RATE_LIMIT,
             }
+        },
+        
+        # Periodic tasks (run by `celery worker -B` or a separate `celery beat`)
+        beat_schedule={
+            'submit-deferred-resumes': {
+                'task': 'batch_tasks.submit_deferred_resumes',
+                'schedule': DEFERRED_SUBMIT_SECONDS,
+            },
+            'poll-deferred-resumes': {
+                'task': 'batch_tasks.poll_deferred_resumes',
+                'schedule': DEFERRED_POLL_SECONDS,
+            },
+            'promote-waiting-resumes': {
+                'task': 'celery_tasks.promote_waiting_jobs',
+                'schedule': RESUME_PROMOTE_SECONDS,
+            },
+            'dispatch-pending-resumes': {
+                'task': 'celery_tasks.dispatch_pending_jobs',
+                'schedule': RESUME_DISPATCH_SECONDS,
+            },
         }
     )
     
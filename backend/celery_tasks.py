@@ -2,54 +2,175 @@
 Celery tasks for async resume generation
 """
 import os
-import re
 import traceback
 import hashlib
 import json
-from datetime import datetime
-from io import BytesIO
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from celery.signals import worker_process_init
+from flask import has_app_context
+from sqlalchemy import func, select, update
 from celery_config import celery_app
-from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import redis
 
 # Redis client for caching
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
-redis_client = redis.from_url(REDIS_URL, decode_responses=False)  # Binary mode for file data
+redis_client = redis.from_url(REDIS_URL, decode_responses=True)
 
 # Import resume generation functions
 from app.candidateresumebuilder import (
-    create_resume_word,
-    create_resume_pdf,
-    clean_markdown,
-    extract_total_experience
+    extract_total_experience,
+    assemble_resume,
+    generate_sections,
+    render_resume_file,
+    resume_download_name,
+    FILE_EXTENSIONS,
 )
-from concurrent.futures import ThreadPoolExecutor
+from app.artifacts import get_artifact_store
+from app.openai_client import get_openai_client
+from app.llm_cache import cached_completion
+from app.resume_model import parse_resume
+from app.resume_prompts import (
+    RESUME_MODEL,
+    RESUME_TEMPERATURE,
+    resume_section_messages,
+)
+from app.job_events import publish_progress
+from app.quota import refund_job
 
 # OpenAI client
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 
+FINISHED_STATUSES = ('SUCCESS', 'FAILURE', 'CANCELLED')
+
+
+# ---- Worker-level Flask app ----
+# One Flask app (config, blueprints, extensions, engine pool) per worker
+# process, built once instead of on every progress update.
+_flask_app = None
+
+
+def get_flask_app():
+    """Return this process's Flask app, creating it on first use"""
+    global _flask_app
+    if _flask_app is None:
+        from app import create_app
+        _flask_app = create_app()
+    return _flask_app
+
+
+@worker_process_init.connect
+def init_worker_app(**kwargs):
+    """Build the Flask app in each prefork child and drop inherited DB connections"""
+    from app.models import db
+
+    app = get_flask_app()
+    with app.app_context():
+        db.engine.dispose()
+
+
+@contextmanager
+def worker_app_context():
+    """Reuse the active app context, or push the worker app's one"""
+    if has_app_context():
+        yield
+        return
+    with get_flask_app().app_context():
+        yield
+
+
 def update_job_progress(task_id, status, progress, error_message=None, result_url=None):
-    """Update job progress in database"""
-    from app import create_app
+    """Update job progress with a single-row UPDATE on the worker's pooled connection"""
     from app.models import db, ResumeGenerationJob
-    
-    app = create_app()
-    with app.app_context():
-        job = ResumeGenerationJob.query.get(task_id)
-        if job:
-            job.status = status
-            job.progress = progress
-            if error_message:
-                job.error_message = error_message
-            if result_url:
-                job.result_url = result_url
-            if status == 'PROCESSING' and not job.started_at:
-                job.started_at = datetime.utcnow()
-            if status in ['SUCCESS', 'FAILURE']:
-                job.completed_at = datetime.utcnow()
-            db.session.commit()
+
+    now = datetime.utcnow()
+    values = {"status": status, "progress": progress}
+    if error_message:
+        values["error_message"] = error_message
+    if result_url:
+        values["result_url"] = result_url
+    if status == 'PROCESSING':
+        values["started_at"] = func.coalesce(ResumeGenerationJob.started_at, now)
+    if status in ['SUCCESS', 'FAILURE']:
+        values["completed_at"] = now
+
+    with worker_app_context():
+        db.session.execute(
+            update(ResumeGenerationJob)
+            .where(ResumeGenerationJob.id == task_id)
+            .values(**values)
+        )
+        db.session.commit()
+        if status == 'FAILURE':
+            # A failed generation gives its daily quota slot back
+            refund_job(task_id)
+
+    # Push the transition to any open progress streams
+    event = {"id": task_id, "status": status, "progress": progress}
+    if error_message:
+        event["error_message"] = error_message
+    if result_url:
+        event["result_url"] = result_url
+    publish_progress(task_id, event)
+
+
+def get_job_status(task_id):
+    """Current status of a ResumeGenerationJob (None if the row is missing)"""
+    from app.models import db, ResumeGenerationJob
+
+    with worker_app_context():
+        return db.session.execute(
+            select(ResumeGenerationJob.status).where(ResumeGenerationJob.id == task_id)
+        ).scalar_one_or_none()
+
+
+def claim_resume_job(task_id, dispatch):
+    """
+    Mark the job PROCESSING for this delivery; False if the message is stale
+
+    A job re-published by starvation protection has a higher dispatch_count,
+    so its earlier message (still queued, or redelivered) is skipped instead
+    of generating the resume twice.
+    """
+    from app.models import db, ResumeGenerationJob
+
+    with worker_app_context():
+        result = db.session.execute(
+            update(ResumeGenerationJob)
+            .where(
+                ResumeGenerationJob.id == task_id,
+                ResumeGenerationJob.dispatch_count == dispatch,
+                ResumeGenerationJob.status.notin_(FINISHED_STATUSES),
+            )
+            .values(
+                status='PROCESSING',
+                started_at=func.coalesce(ResumeGenerationJob.started_at, datetime.utcnow()),
+            )
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+
+def save_resume_content(candidate_id, job_row_id, merged_text, artifact=None, document=None):
+    """Store the generated text, its parsed document and the artifact key on the CandidateJob row"""
+    from app.models import db, CandidateJob
+
+    if not (candidate_id and job_row_id):
+        return
+    values = {"resume_content": merged_text, "resume_generated_at": datetime.utcnow()}
+    if document is not None:
+        values["resume_document"] = document.to_json()
+    if artifact:
+        values["docx_path"] = artifact
+    with worker_app_context():
+        db.session.execute(
+            update(CandidateJob)
+            .where(CandidateJob.id == job_row_id, CandidateJob.candidate_id == candidate_id)
+            .values(**values)
+        )
+        db.session.commit()
 
 
 @retry(
@@ -57,25 +178,46 @@ def update_job_progress(task_id, status, progress, error_message=None, result_ur
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=4, max=10)
 )
-def call_openai_with_retry(client, prompt, system_message):
+def call_openai_with_retry(client, messages):
     """Call OpenAI API with retry logic"""
     resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.3,
+        model=RESUME_MODEL,
+        messages=messages,
+        temperature=RESUME_TEMPERATURE,
     )
     return resp.choices[0].message.content or ""
 
 
-def get_cache_key(job_desc, candidate_info, file_type):
+def get_cache_key(job_desc, candidate_info, file_type, pdf_renderer=None):
     """Generate cache key from job description and candidate info"""
     content = f"{job_desc}:{candidate_info}:{file_type}"
+    if file_type == 'pdf' and pdf_renderer:
+        content += f":{pdf_renderer}"
     return f"resume_cache:{hashlib.md5(content.encode()).hexdigest()}"
 
 
+def finish_resume_job(task_id, candidate_id, job_row_id, merged_text, file_type, pdf_renderer=None):
+    """
+    Render merged resume text, store the file and mark the job SUCCESS
+
+    Shared by the interactive task and deferred (Batch API) jobs. Returns
+    (artifact key, download filename).
+    """
+    # Generate the file and keep it in the artifact store (keyed by content
+    # hash) instead of shipping it through the result backend
+    resume = parse_resume(merged_text)
+    file_data = render_resume_file(resume, file_type, pdf_renderer)
+    filename = resume_download_name(merged_text, file_type)
+    artifact = get_artifact_store().put(file_data, FILE_EXTENSIONS[file_type])
+    
+    # Save resume content, parsed document and artifact key to database
+    save_resume_content(candidate_id, job_row_id, merged_text, artifact, resume)
+    
+    # Update job as SUCCESS
+    update_job_progress(task_id, 'SUCCESS', 100, result_url=artifact)
+    return artifact, filename
+
+
 @celery_app.task(bind=True, name='celery_tasks.generate_resume_async')
 def generate_resume_async(
     self,
@@ -84,7 +226,9 @@ def generate_resume_async(
     candidate_info,
     file_type,
     candidate_id,
-    job_row_id
+    job_row_id,
+    pdf_renderer=None,
+    dispatch=None
 ):
     """
     Async task to generate resume with caching
@@ -96,41 +240,40 @@ def generate_resume_async(
         file_type: 'word' or 'pdf'
         candidate_id: Candidate ID
         job_row_id: CandidateJob ID
+        pdf_renderer: 'libreoffice' or 'native' (None = PDF_RENDERER)
+        dispatch: the job's dispatch_count when published (None = unrouted message)
     """
     try:
+        # The job id is the task id; redelivery of a finished job, or of a
+        # message superseded by a later publish, is a no-op
+        task_id = task_id or self.request.id
+        if dispatch is None:
+            if get_job_status(task_id) in FINISHED_STATUSES:
+                return {'status': 'SKIPPED', 'file_type': file_type}
+        elif not claim_resume_job(task_id, dispatch):
+            return {'status': 'SKIPPED', 'file_type': file_type}
+
         # Check cache first
-        cache_key = get_cache_key(job_desc, candidate_info, file_type)
+        cache_key = get_cache_key(job_desc, candidate_info, file_type, pdf_renderer)
         cached_result = redis_client.get(cache_key)
+        cached_data = json.loads(cached_result) if cached_result else None
         
-        if cached_result:
-            # Cache hit! Return cached result immediately
+        if cached_data and get_artifact_store().exists(cached_data['artifact']):
+            # Cache hit! The rendered file is already in the artifact store
             update_job_progress(task_id, 'PROCESSING', 50)
             
-            # Decode cached data
-            import pickle
-            cached_data = pickle.loads(cached_result)
-            
             # Save to database
-            from app import create_app
-            from app.models import db, CandidateJob
-            
-            app = create_app()
-            with app.app_context():
-                if candidate_id and job_row_id:
-                    job_row = CandidateJob.query.filter_by(
-                        id=job_row_id,
-                        candidate_id=candidate_id
-                    ).first()
-                    if job_row:
-                        job_row.resume_content = cached_data['merged_text']
-                        db.session.commit()
+            save_resume_content(
+                candidate_id, job_row_id, cached_data['merged_text'], cached_data['artifact'],
+                parse_resume(cached_data['merged_text'])
+            )
             
-            update_job_progress(task_id, 'SUCCESS', 100, result_url=cached_data['filename'])
+            update_job_progress(task_id, 'SUCCESS', 100, result_url=cached_data['artifact'])
             
             return {
                 'status': 'SUCCESS',
+                'artifact': cached_data['artifact'],
                 'filename': cached_data['filename'],
-                'file_data': cached_data['file_data'],
                 'file_type': file_type,
                 'cached': True
             }
@@ -138,260 +281,66 @@ def generate_resume_async(
         # Update status to PROCESSING
         update_job_progress(task_id, 'PROCESSING', 10)
         
-        # Initialize OpenAI client
-        client = OpenAI(api_key=OPENAI_API_KEY)
+        # Shared, pooled OpenAI client for this worker process
+        client = get_openai_client()
         work_exp_str = extract_total_experience(candidate_info)
         
         # Update progress
         update_job_progress(task_id, 'PROCESSING', 20)
         
-        # Define prompt functions
-        def generate_main_sections():
-            prompt = f"""
-            You are a professional resume writer. Using the Job Description and Candidate Information provided below, generate a clean, ATS-optimized resume that strictly follows the section order and formatting rules listed here:
-
-            ⚠️ IMPORTANT: Output must contain the **resume only** — do not include explanations, disclaimers, notes, or extra text outside of the resume.
-
-            SECTION ORDER:
-
-            1. **PROFESSIONAL SUMMARY** – Generate **6 to 8 bullet points**.  
-                - The **first bullet point** must always mention the candidate's **total years of professional experience**. If this information is present in the JOB DESCRIPTION, use the role mentioned there when framing the experience.  
-                    WORK EXPERIENCE: {work_exp_str}  
-                - Represent the total experience as **"X+ years of experience"** (e.g., *5+ years*, *6+ years*).  
-                - Each bullet point must be **at least 2 lines long**, providing rich, detailed information. Avoid short or generic bullets.  
-                - The **remaining bullet points** (6–8 total) should comprehensively highlight the candidate's **key skills, achievements, career milestones, and qualifications** that align closely with the given Job Description.  
-                - Each bullet must **start with "- "** (a hyphen followed by a space).  
-  
-            2. **SKILLS** – Based on the Job Description and Candidate Information:
-
-                1. Identify the **most relevant role/position** (e.g., .NET Developer, Java Backend Engineer, Salesforce Developer, Data Engineer, DevOps Engineer).
-                2. Create a **resume-ready Skills section** with **10–12 subsections**, tailored to that role and the JD.
-
-                ⚠️ RULES:
-                - Subsections must be **category-based** and recruiter-friendly (e.g., Programming Languages, Frameworks & Libraries, Databases, Cloud Platforms, DevOps & CI/CD, Testing & QA, Security & Compliance, Monitoring & Observability, Collaboration Tools).
-                - Use concise, ATS-optimized, professional wording for subsection titles.
-                - Fill each subsection with **8–20 related technologies/tools**, directly matching the JD and candidate info.
-                - Where possible, **expand categories with specific services or tools** (e.g., list AWS services like EC2, S3, Glue, Lambda, CloudWatch — not just "AWS").
-                - Always mirror exact JD keywords (e.g., if JD says "GCP, Spark, BigQuery, Kafka" → those must appear under correct categories).
-                - Include versions where impactful (e.g., Java 11/17, .NET 6/7, Spring Boot 3.x, Hadoop 3.x).
-                - Do not invent irrelevant categories or mix unrelated technologies into the wrong subsection.
-                - Always include these **mandatory baseline categories**, even if not explicitly in the JD:
-                    - Programming Languages  
-                    - Operating Systems  
-                    - Cloud Platforms
-                    - DevOps & CI/CD Tools  
-                    - Development Tools                   
-
-                Example subsections (adjust dynamically per JD):  
-                - Programming Languages  
-                - Frameworks & Libraries  
-                - Databases & Data Warehousing  
-                - Big Data & Streaming  
-                - Cloud Platforms  
-                - DevOps & CI/CD Tools  
-                - Testing & QA  
-                - Security & Compliance  
-                - Monitoring & Observability  
-                - Collaboration Tools  
-                - Documentation Tools  
-                - Operating Systems  
-
-                ⚠️ Ensure each subsection is **fully loaded with at least 8 skills** and contains **16–20 skills where possible**.
-                ⚠️ All technologies listed here must also appear in the **Technologies Used** lines under the WORK EXPERIENCE section.
-
-
-
-            3. **CERTIFICATIONS**
-
-            4. **EDUCATION** 
-                Format the education section clearly and consistently using the structure shown below. 
-
-                Example Format:
-                    MS in Computer Science
-                    University of XYZ, USA | GPA: 3.8/4.0
-                    B.Tech in Computer Science Engineering
-                    JNTU Hyderabad | Percentage: 85%
-
-                Make sure the formatting follows this structure exactly:
-                [Degree] in [Field of Study]
-                [University Name] | [GPA or Percentage]
-
-                Do not include additional details like thesis titles, coursework, or graduation years unless specifically asked.
-            
-            ⚠️ IMPORTANT: Do NOT generate the WORK EXPERIENCE section. It will be added separately.
-
-            FORMATTING RULES:
-            - Display the candidate's **Name** at the top.
-            - Center **Email**, **Phone Number**, and **Candidate Location** on the same line directly below the name, using the format:  
-            Email: | Mobile: | Location:
-            - Use 0.5-inch page margins.
-            - Add a tab space before each bullet point.
-            - Do not use markdown or bullet characters like "-", "*", or "•".
-            - The **SKILLS** section must always follow the defined categories above—never as a plain list.
-            - Always ensure the final resume spans at least 2 full pages of Word or PDF output.
-
-            JOB DESCRIPTION:
-            {job_desc}
-
-            CANDIDATE INFORMATION:
-            {candidate_info}
-            """
-            return call_openai_with_retry(
-                client,
-                prompt,
-                "You write polished, ATS-friendly resumes."
-            )
-
-        def generate_work_experience():
-            exp_prompt = f"""
-            Generate ONLY the WORK EXPERIENCE section for this resume.
-
-            3. **WORK EXPERIENCE** – Merge **Work History** and **Work Experience** into a unified section. For each job role:
-                - ⚠️ IMPORTANT: Use WORK EXPERIENCE from the CANDIDATE INFORMATION only
-                - Include the Job Title, Company Name (bold), Job Location, and timeline using the format:
-                    [Company Name] – [Job Location]  
-                    [Job Title] – [Start Month Year] to [End Month Year]
-
-            - Add 10 to 15 high-impact bullet points per role. Each bullet point must:
-            - Each bullet point must be exactly 2 lines long, with rich and specific details — including technologies used, metrics, project outcomes, team collaboration, challenges faced, and business impact.
-            - "When generating points for each company, first identify the industry it operates in, and then tailor the points to be relevant to that specific industry projects.
-            - Start with a strong action verb (e.g., Spearheaded, Engineered, Optimized, Automated, Delivered).
-            - Focus on achievements, measurable outcomes, and business value rather than just responsibilities.
-            - Include quantifiable results wherever possible (e.g., improved ETL performance by 35%, reduced deployment time by 40%, cut costs by 20% annually).
-            - Highlight leadership, innovation, automation, and cross-functional collaboration.
-            - Showcase modern practices (e.g., Cloud Migration, DevOps, CI/CD automation, Data Engineering, AI/ML, Security, Scalability).
-            - Be specific, technical, and results-driven — not generic.
-            
-
-            - ⚠️ Validate technology usage against the job timeline:
-            - ONLY include technologies, tools, frameworks, or platforms that were **publicly available and in practical use** during the given employment period.
-            - Example: Do NOT include Generative AI, Azure OpenAI, MS Fabric, or other technologies launched post-2021 in roles dated 2020 or earlier.
-            - Ensure all technologies and practices mentioned are **realistically applicable** based on release year and industry adoption timeline.
-
-            - Total bullet points should follow this logic:
-            - For 1 company: 15 to 20 bullet points.
-            - For 2 companies: 15 to 20 bullet points each (total: 30-40 points).
-            - For 3 companies: 10 to 15 bullet points each (total: 30-45 points).
-            - For 4 companies: 10 to 15 bullet points each (total: 40-60 points).
-            - For 5 companies: 10 to 15 bullet points each (total: 60-70 points).
-            - For 6 companies: 10 to 15 bullet points each (total: 70-80 points).
-            - For 7 companies: 10 to 15 bullet points each (total: 70-80 points).
-
-            - No filler or repetition: Each bullet point must offer unique, concrete contributions or achievements.
-
-            - Write in professional resume tone, use strong action verbs, and focus on clarity, impact, and relevance to technical or engineering roles.
-
-            - End each job section with the line:  
-            Technologies Used: tech1, tech2, ..., tech15  
-                ⚠️ Ensure each role includes 10 to 15 technologies mapped directly from the SKILLS section.  
-                ⚠️ Across all roles, the union of technologies must comprehensively cover the entire SKILLS section.
-
-            JOB DESCRIPTION:
-            {job_desc}
-
-            CANDIDATE INFORMATION:
-            {candidate_info}
-            """
-            return call_openai_with_retry(
-                client,
-                exp_prompt,
-                "You write only the Work Experience section for ATS resumes."
+        # One cached call per resume section: raw outputs are keyed by the
+        # prompt, i.e. by the inputs each section depends on, independent of
+        # file type and shared with the sync endpoints
+        def complete(messages):
+            return cached_completion(
+                RESUME_MODEL, RESUME_TEMPERATURE, messages,
+                lambda: call_openai_with_retry(client, messages)
             )
         
         # Update progress
         update_job_progress(task_id, 'PROCESSING', 30)
         
-        # Generate both sections in parallel
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            main_future = executor.submit(generate_main_sections)
-            exp_future = executor.submit(generate_work_experience)
-            raw_main = main_future.result()
-            raw_exp = exp_future.result()
+        # Generate all sections in parallel
+        outputs = generate_sections(
+            resume_section_messages(job_desc, candidate_info, work_exp_str), complete
+        )
         
         # Update progress
         update_job_progress(task_id, 'PROCESSING', 70)
         
         # Merge content
-        main_content = clean_markdown(raw_main).strip()
-        work_exp_content = clean_markdown(raw_exp).strip()
-        
-        if work_exp_content and not work_exp_content.upper().startswith("WORK EXPERIENCE"):
-            work_exp_content = "WORK EXPERIENCE\n" + work_exp_content
-        
-        merged_text = (main_content + "\n\n" + work_exp_content).strip()
+        merged_text = assemble_resume(candidate_info, outputs)
         
         if not merged_text:
             raise Exception("Resume generation failed: Empty response")
         
-        # Save resume content to database
-        from app import create_app
-        from app.models import db, CandidateJob
-        
-        app = create_app()
-        with app.app_context():
-            if candidate_id and job_row_id:
-                job_row = CandidateJob.query.filter_by(
-                    id=job_row_id,
-                    candidate_id=candidate_id
-                ).first()
-                if job_row:
-                    job_row.resume_content = merged_text
-                    db.session.commit()
-        
         # Update progress
         update_job_progress(task_id, 'PROCESSING', 85)
         
-        # Generate file
-        candidate_name = merged_text.splitlines()[0].strip()
-        safe_name = re.sub(r'[^A-Za-z0-9]+', '_', candidate_name) or "Candidate"
-        
-        if file_type == "word":
-            buffer = BytesIO()
-            doc = create_resume_word(merged_text)
-            doc.save(buffer)
-            buffer.seek(0)
-            file_data = buffer.getvalue()
-            filename = f"{safe_name}_resume.docx"
-        elif file_type == "pdf":
-            buffer = create_resume_pdf(merged_text)
-            file_data = buffer.getvalue()
-            filename = f"{safe_name}_resume.pdf"
-        else:
-            raise Exception("Invalid file_type. Use 'word' or 'pdf'.")
-        
-        # Store file data in result (base64 encoded for JSON serialization)
-        import base64
-        file_base64 = base64.b64encode(file_data).decode('utf-8')
+        artifact, filename = finish_resume_job(
+            task_id, candidate_id, job_row_id, merged_text, file_type, pdf_renderer
+        )
         
         # Cache the result for future use (TTL: 1 hour)
-        import pickle
         cache_data = {
             'merged_text': merged_text,
             'filename': filename,
-            'file_data': file_base64
+            'artifact': artifact
         }
         try:
             redis_client.setex(
                 cache_key,
                 3600,  # 1 hour TTL
-                pickle.dumps(cache_data)
+                json.dumps(cache_data)
             )
         except Exception as cache_error:
             print(f"Warning: Failed to cache result: {cache_error}")
         
-        # Update job as SUCCESS
-        update_job_progress(
-            task_id,
-            'SUCCESS',
-            100,
-            result_url=filename  # We'll store filename here
-        )
-        
         # Return result
         return {
             'status': 'SUCCESS',
+            'artifact': artifact,
             'filename': filename,
-            'file_data': file_base64,
             'file_type': file_type,
             'cached': False
         }
@@ -403,3 +352,158 @@ def generate_resume_async(
         # Raise exception to mark Celery task as failed
         raise
 
+
+
+@celery_app.task(name='celery_tasks.promote_waiting_jobs')
+def promote_waiting_jobs():
+    """
+    Starvation protection for resume jobs
+
+    A job published but not started within RESUME_MAX_WAIT_SECONDS for its
+    queue is re-published. Interactive (priority_high) jobs move to the front
+    of priority_high at PROMOTED_PRIORITY. Bulk jobs (priority_low, or no
+    recorded queue) stay in priority_low and gain one priority step per wait,
+    never reaching PROMOTED_PRIORITY, so a waiting batch cannot jump ahead of
+    interactive work. The dispatch_count bump is conditional on the job still
+    being unstarted, so a job that starts meanwhile is left alone, and its
+    old message becomes a no-op.
+    """
+    from sqlalchemy import and_, or_
+    from celery_config import QUEUE_HIGH, QUEUE_LOW, PROMOTED_PRIORITY, RESUME_MAX_WAIT_SECONDS, aged_priority
+    from app.models import db, ResumeGenerationJob
+    from app.resume_async import publish_resume_job
+
+    Job = ResumeGenerationJob
+    with worker_app_context():
+        now = datetime.utcnow()
+        high_cutoff = now - timedelta(seconds=RESUME_MAX_WAIT_SECONDS[QUEUE_HIGH])
+        low_cutoff = now - timedelta(seconds=RESUME_MAX_WAIT_SECONDS[QUEUE_LOW])
+        jobs = (
+            Job.query
+            .filter(
+                Job.mode == 'interactive',
+                Job.status == 'PENDING',
+                Job.started_at.is_(None),
+                Job.dispatched_at.isnot(None),
+                or_(
+                    and_(Job.queue == QUEUE_HIGH, Job.priority != PROMOTED_PRIORITY, Job.dispatched_at <= high_cutoff),
+                    and_(
+                        or_(
+                            Job.queue.is_(None),
+                            # Bulk jobs already at the best bulk priority have nowhere to go
+                            and_(Job.queue != QUEUE_HIGH,
+                                 or_(Job.priority.is_(None), Job.priority > PROMOTED_PRIORITY + 1)),
+                        ),
+                        Job.dispatched_at <= low_cutoff,
+                    ),
+                ),
+            )
+            .order_by(Job.dispatched_at.asc())
+            .all()
+        )
+
+        promoted = []
+        for job in jobs:
+            if job.queue == QUEUE_HIGH:
+                route = {"priority": PROMOTED_PRIORITY}
+            else:
+                route = {"queue": QUEUE_LOW, "priority": aged_priority(job.priority)}
+            result = db.session.execute(
+                update(Job)
+                .where(
+                    Job.id == job.id,
+                    Job.status == 'PENDING',
+                    Job.started_at.is_(None),
+                    Job.dispatch_count == job.dispatch_count,
+                )
+                .values(dispatch_count=job.dispatch_count + 1, **route)
+            )
+            db.session.commit()
+            if result.rowcount != 1:
+                continue
+            db.session.refresh(job)
+            try:
+                publish_resume_job(job)
+                promoted.append(job.id)
+            except Exception as e:
+                # The old message is stale now; leave the job to dispatch_pending_jobs
+                db.session.rollback()
+                job.dispatched_at = None
+                db.session.commit()
+                print(f"Warning: Failed to promote resume job {job.id}: {e}")
+
+        if promoted:
+            print(f"Re-published {len(promoted)} waiting resume job(s) at a higher priority")
+        return promoted
+
+
+@celery_app.task(name='celery_tasks.dispatch_pending_jobs')
+def dispatch_pending_jobs(min_age=None):
+    """
+    Outbox relay: publish interactive jobs that were committed but never enqueued
+
+    Only jobs at least `min_age` seconds old (RESUME_DISPATCH_MIN_AGE_SECONDS
+    by default) are taken, so a request that is still publishing its own job
+    is left alone. Each job is claimed with a conditional UPDATE that bumps
+    dispatch_count and sets dispatched_at, so overlapping relays (beat and
+    the CLI) publish it once; if the request's own publish lands after all,
+    its message carries the old dispatch_count and is skipped by the worker.
+    Recovered work is routed as bulk; starvation protection still ages it.
+    """
+    from celery_config import RESUME_DISPATCH_MIN_AGE_SECONDS, resume_route
+    from app.models import db, Candidate, ResumeGenerationJob
+    from app.resume_async import publish_resume_job
+
+    Job = ResumeGenerationJob
+    if min_age is None:
+        min_age = RESUME_DISPATCH_MIN_AGE_SECONDS
+    with worker_app_context():
+        cutoff = datetime.utcnow() - timedelta(seconds=min_age)
+        jobs = (
+            Job.query
+            .filter(
+                Job.mode == 'interactive',
+                Job.status == 'PENDING',
+                Job.dispatched_at.is_(None),
+                Job.created_at <= cutoff,
+            )
+            .order_by(Job.created_at.asc())
+            .all()
+        )
+
+        dispatched = []
+        for job in jobs:
+            candidate = db.session.get(Candidate, job.candidate_id)
+            queue, priority = resume_route(candidate.subscription_type if candidate else None, bulk=True)
+            result = db.session.execute(
+                update(Job)
+                .where(
+                    Job.id == job.id,
+                    Job.status == 'PENDING',
+                    Job.dispatched_at.is_(None),
+                    Job.dispatch_count == job.dispatch_count,
+                )
+                .values(
+                    dispatch_count=job.dispatch_count + 1,
+                    queue=queue,
+                    priority=priority,
+                    dispatched_at=datetime.utcnow(),
+                )
+            )
+            db.session.commit()
+            if result.rowcount != 1:
+                continue
+            db.session.refresh(job)
+            try:
+                publish_resume_job(job, candidate=candidate)
+                dispatched.append(job.id)
+            except Exception as e:
+                # Back to the outbox for the next run
+                db.session.rollback()
+                job.dispatched_at = None
+                db.session.commit()
+                print(f"Warning: Failed to dispatch resume job {job.id}: {e}")
+
+        if dispatched:
+            print(f"Dispatched {len(dispatched)} pending resume job(s)")
+        return dispatched
@@ -0,0 +1,39 @@
+"""add dispatched_at to resume generation jobs
+
+Revision ID: a7c1e2d3b4f5
+Revises: f1f2c3d4e5f6
+Create Date: 2025-11-08 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a7c1e2d3b4f5"
+down_revision = "f1f2c3d4e5f6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- ResumeGenerationJob: outbox marker for the Celery publish ---
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "dispatched_at" not in columns:
+            op.add_column("resume_generation_job", sa.Column("dispatched_at", sa.DateTime(), nullable=True))
+            # Rows created before this migration were already published
+            op.execute("UPDATE resume_generation_job SET dispatched_at = created_at")
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "dispatched_at" in columns:
+            op.drop_column("resume_generation_job", "dispatched_at")
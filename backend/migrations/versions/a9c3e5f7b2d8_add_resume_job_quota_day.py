@@ -0,0 +1,37 @@
+"""add quota_day to resume generation jobs
+
+Revision ID: a9c3e5f7b2d8
+Revises: f4a8d2c6b1e3
+Create Date: 2025-11-29 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a9c3e5f7b2d8"
+down_revision = "f4a8d2c6b1e3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- ResumeGenerationJob: daily quota slot held by the job ---
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "quota_day" not in columns:
+            op.add_column("resume_generation_job", sa.Column("quota_day", sa.String(length=10), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "quota_day" in columns:
+            op.drop_column("resume_generation_job", "quota_day")
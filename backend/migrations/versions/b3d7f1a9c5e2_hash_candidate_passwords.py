@@ -0,0 +1,48 @@
+"""hash plaintext candidate passwords in place
+
+Revision ID: b3d7f1a9c5e2
+Revises: a9c3e5f7b2d8
+Create Date: 2025-12-01 10:00:00.000000
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+from werkzeug.security import generate_password_hash
+
+
+# revision identifiers, used by Alembic.
+revision = "b3d7f1a9c5e2"
+down_revision = "a9c3e5f7b2d8"
+branch_labels = None
+depends_on = None
+
+HASH_PREFIXES = ("scrypt:", "pbkdf2:")
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- Candidate: password column holds plaintext until now ---
+    if "candidate" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("candidate")}
+        if "password" in columns:
+            method = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+            rows = bind.execute(sa.text(
+                "SELECT id, password FROM candidate WHERE password IS NOT NULL AND password != ''"
+            )).fetchall()
+            for cand_id, password in rows:
+                if password.startswith(HASH_PREFIXES) and password.count("$") >= 2:
+                    continue
+                bind.execute(
+                    sa.text("UPDATE candidate SET password = :password WHERE id = :id"),
+                    {"password": generate_password_hash(password, method=method), "id": cand_id},
+                )
+
+
+def downgrade():
+    # Hashes cannot be turned back into passwords; candidates keep their
+    # hashed passwords (login code from before this revision cannot check them)
+    pass
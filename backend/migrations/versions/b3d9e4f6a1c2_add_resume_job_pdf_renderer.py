@@ -0,0 +1,37 @@
+"""add pdf_renderer to resume generation jobs
+
+Revision ID: b3d9e4f6a1c2
+Revises: a7c1e2d3b4f5
+Create Date: 2025-11-10 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b3d9e4f6a1c2"
+down_revision = "a7c1e2d3b4f5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- ResumeGenerationJob: PDF renderer chosen at enqueue time ---
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "pdf_renderer" not in columns:
+            op.add_column("resume_generation_job", sa.Column("pdf_renderer", sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "pdf_renderer" in columns:
+            op.drop_column("resume_generation_job", "pdf_renderer")
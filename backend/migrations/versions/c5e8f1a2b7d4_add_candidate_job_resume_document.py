@@ -0,0 +1,38 @@
+"""add resume_document to candidate jobs
+
+Revision ID: c5e8f1a2b7d4
+Revises: b3d9e4f6a1c2
+Create Date: 2025-11-12 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c5e8f1a2b7d4"
+down_revision = "b3d9e4f6a1c2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- CandidateJob: parsed resume stored next to resume_content ---
+    # Existing rows stay NULL and are parsed on first render
+    if "candidate_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("candidate_job")}
+        if "resume_document" not in columns:
+            op.add_column("candidate_job", sa.Column("resume_document", sa.Text(), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if "candidate_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("candidate_job")}
+        if "resume_document" in columns:
+            op.drop_column("candidate_job", "resume_document")
@@ -0,0 +1,41 @@
+"""add token_version to users and candidates
+
+Revision ID: c5e9a3b7d1f4
+Revises: b3d7f1a9c5e2
+Create Date: 2025-12-02 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c5e9a3b7d1f4"
+down_revision = "b3d7f1a9c5e2"
+branch_labels = None
+depends_on = None
+
+TABLES = ("user", "candidate")
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- User / Candidate: bumped to revoke access tokens ---
+    for table in TABLES:
+        if table in inspector.get_table_names():
+            columns = {col["name"] for col in inspector.get_columns(table)}
+            if "token_version" not in columns:
+                op.add_column(table, sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table in TABLES:
+        if table in inspector.get_table_names():
+            columns = {col["name"] for col in inspector.get_columns(table)}
+            if "token_version" in columns:
+                op.drop_column(table, "token_version")
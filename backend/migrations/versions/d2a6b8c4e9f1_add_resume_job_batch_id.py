@@ -0,0 +1,43 @@
+"""add batch_id to resume generation jobs
+
+Revision ID: d2a6b8c4e9f1
+Revises: c5e8f1a2b7d4
+Create Date: 2025-11-14 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d2a6b8c4e9f1"
+down_revision = "c5e8f1a2b7d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- ResumeGenerationJob: groups the jobs of one /generate-batch request ---
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "batch_id" not in columns:
+            op.add_column("resume_generation_job", sa.Column("batch_id", sa.String(length=36), nullable=True))
+        indexes = {ix["name"] for ix in inspector.get_indexes("resume_generation_job")}
+        if "ix_resume_generation_job_batch_id" not in indexes:
+            op.create_index("ix_resume_generation_job_batch_id", "resume_generation_job", ["batch_id"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if "resume_generation_job" in inspector.get_table_names():
+        indexes = {ix["name"] for ix in inspector.get_indexes("resume_generation_job")}
+        if "ix_resume_generation_job_batch_id" in indexes:
+            op.drop_index("ix_resume_generation_job_batch_id", table_name="resume_generation_job")
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "batch_id" in columns:
+            op.drop_column("resume_generation_job", "batch_id")
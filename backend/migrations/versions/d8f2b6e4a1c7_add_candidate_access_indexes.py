@@ -0,0 +1,45 @@
+"""index candidate access by user (creator and assignments)
+
+Revision ID: d8f2b6e4a1c7
+Revises: c5e9a3b7d1f4
+Create Date: 2025-12-03 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d8f2b6e4a1c7"
+down_revision = "c5e9a3b7d1f4"
+branch_labels = None
+depends_on = None
+
+# (table, index name, columns): the assignment primary key leads with
+# candidate_id, so lookups by user need their own index
+INDEXES = [
+    ("candidate", "ix_candidate_created_by_user_id", ["created_by_user_id", "id"]),
+    ("candidate_assigned_users", "ix_candidate_assigned_users_user_id", ["user_id", "candidate_id"]),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table, name, columns in INDEXES:
+        if table in inspector.get_table_names():
+            indexes = {ix["name"] for ix in inspector.get_indexes(table)}
+            if name not in indexes:
+                op.create_index(name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table, name, _ in INDEXES:
+        if table in inspector.get_table_names():
+            indexes = {ix["name"] for ix in inspector.get_indexes(table)}
+            if name in indexes:
+                op.drop_index(name, table_name=table)
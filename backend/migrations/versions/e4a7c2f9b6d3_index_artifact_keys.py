@@ -0,0 +1,45 @@
+"""index artifact keys so downloads can be checked against their candidate
+
+Revision ID: e4a7c2f9b6d3
+Revises: d8f2b6e4a1c7
+Create Date: 2025-12-04 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e4a7c2f9b6d3"
+down_revision = "d8f2b6e4a1c7"
+branch_labels = None
+depends_on = None
+
+# (table, index name, columns): /api/resume/artifacts/<key> looks the key up
+# in both tables to find the candidate it belongs to
+INDEXES = [
+    ("candidate_job", "ix_candidate_job_docx_path", ["docx_path"]),
+    ("resume_generation_job", "ix_resume_generation_job_result_url", ["result_url"]),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table, name, columns in INDEXES:
+        if table in inspector.get_table_names():
+            indexes = {ix["name"] for ix in inspector.get_indexes(table)}
+            if name not in indexes:
+                op.create_index(name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table, name, _ in INDEXES:
+        if table in inspector.get_table_names():
+            indexes = {ix["name"] for ix in inspector.get_indexes(table)}
+            if name in indexes:
+                op.drop_index(name, table_name=table)
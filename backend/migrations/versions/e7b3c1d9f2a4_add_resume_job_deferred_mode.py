@@ -0,0 +1,51 @@
+"""add deferred (OpenAI Batch API) mode to resume generation jobs
+
+Revision ID: e7b3c1d9f2a4
+Revises: d2a6b8c4e9f1
+Create Date: 2025-11-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e7b3c1d9f2a4"
+down_revision = "d2a6b8c4e9f1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- ResumeGenerationJob: interactive vs deferred generation ---
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "mode" not in columns:
+            # Existing rows were all generated interactively
+            op.add_column(
+                "resume_generation_job",
+                sa.Column("mode", sa.String(length=20), nullable=False, server_default="interactive"),
+            )
+        if "llm_batch_id" not in columns:
+            op.add_column("resume_generation_job", sa.Column("llm_batch_id", sa.String(length=64), nullable=True))
+        indexes = {ix["name"] for ix in inspector.get_indexes("resume_generation_job")}
+        if "ix_resume_generation_job_llm_batch_id" not in indexes:
+            op.create_index("ix_resume_generation_job_llm_batch_id", "resume_generation_job", ["llm_batch_id"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if "resume_generation_job" in inspector.get_table_names():
+        indexes = {ix["name"] for ix in inspector.get_indexes("resume_generation_job")}
+        if "ix_resume_generation_job_llm_batch_id" in indexes:
+            op.drop_index("ix_resume_generation_job_llm_batch_id", table_name="resume_generation_job")
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "llm_batch_id" in columns:
+            op.drop_column("resume_generation_job", "llm_batch_id")
+        if "mode" in columns:
+            op.drop_column("resume_generation_job", "mode")
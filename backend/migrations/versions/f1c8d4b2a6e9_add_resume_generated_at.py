@@ -0,0 +1,49 @@
+"""add resume_generated_at to candidate_job
+
+Revision ID: f1c8d4b2a6e9
+Revises: e4a7c2f9b6d3
+Create Date: 2025-12-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f1c8d4b2a6e9"
+down_revision = "e4a7c2f9b6d3"
+branch_labels = None
+depends_on = None
+
+INDEX = "ix_candidate_job_resume_generated_at"
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- CandidateJob: when resume_content was last generated ---
+    if "candidate_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("candidate_job")}
+        if "resume_generated_at" not in columns:
+            op.add_column("candidate_job", sa.Column("resume_generated_at", sa.DateTime(), nullable=True))
+            # Best available value for resumes generated before this revision
+            bind.execute(sa.text(
+                "UPDATE candidate_job SET resume_generated_at = created_at WHERE resume_content IS NOT NULL"
+            ))
+        indexes = {ix["name"] for ix in inspector.get_indexes("candidate_job")}
+        if INDEX not in indexes:
+            op.create_index(INDEX, "candidate_job", ["resume_generated_at"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if "candidate_job" in inspector.get_table_names():
+        indexes = {ix["name"] for ix in inspector.get_indexes("candidate_job")}
+        if INDEX in indexes:
+            op.drop_index(INDEX, table_name="candidate_job")
+        columns = {col["name"] for col in inspector.get_columns("candidate_job")}
+        if "resume_generated_at" in columns:
+            op.drop_column("candidate_job", "resume_generated_at")
@@ -0,0 +1,45 @@
+"""add queue routing columns to resume generation jobs
+
+Revision ID: f4a8d2c6b1e3
+Revises: e7b3c1d9f2a4
+Create Date: 2025-11-22 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f4a8d2c6b1e3"
+down_revision = "e7b3c1d9f2a4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # --- ResumeGenerationJob: queue, priority and publish counter ---
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        if "queue" not in columns:
+            op.add_column("resume_generation_job", sa.Column("queue", sa.String(length=32), nullable=True))
+        if "priority" not in columns:
+            op.add_column("resume_generation_job", sa.Column("priority", sa.Integer(), nullable=True))
+        if "dispatch_count" not in columns:
+            op.add_column(
+                "resume_generation_job",
+                sa.Column("dispatch_count", sa.Integer(), nullable=False, server_default="0"),
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if "resume_generation_job" in inspector.get_table_names():
+        columns = {col["name"] for col in inspector.get_columns("resume_generation_job")}
+        for name in ("dispatch_count", "priority", "queue"):
+            if name in columns:
+                op.drop_column("resume_generation_job", name)
@@ -0,0 +1,61 @@
+"""
+Shared fixtures: a Flask app on a throwaway SQLite database, with Celery
+publishing, Redis progress events and the LLM cache kept in-process.
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_DB_DIR = tempfile.mkdtemp(prefix="resume-tests-")
+os.environ["FLASK_ENV"] = "development"
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["LLM_CACHE_BACKEND"] = "memory"
+os.environ["ARTIFACT_STORE_ROOT"] = os.path.join(_DB_DIR, "artifacts")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    from app import create_app, identity, llm_cache
+    from app.models import db
+    import celery_tasks
+
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    monkeypatch.setattr(llm_cache, "_backend", None)
+    identity.cache.clear()
+    monkeypatch.setattr(celery_tasks, "_flask_app", app)
+    monkeypatch.setattr(celery_tasks, "publish_progress", lambda *args, **kwargs: None)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user_with_candidate(app):
+    """(user, candidate) with enough profile data to build every resume section"""
+    from app.models import db, User, Candidate
+
+    user = User(name="Recruiter", email="recruiter@example.com", mobile="1", password_hash="x", role="user")
+    db.session.add(user)
+    db.session.flush()
+    candidate = Candidate(
+        first_name="Jane", last_name="Doe", email="jane@example.com", phone="2",
+        created_by_user_id=user.id, technical_skills="Python, SQL",
+        work_experience="Acme, Duration: Jan 2020 - Present", education="MS Computer Science",
+    )
+    db.session.add(candidate)
+    db.session.commit()
+    return user, candidate
@@ -0,0 +1,117 @@
+"""
+Local stand-in for the OpenAI Files and Batches endpoints used by batch_tasks.py
+
+Batches stay "in_progress" until the test calls finish(), which writes an
+output file answering every request (requests whose body contains
+FAIL_MARKER get a 400 response line instead).
+"""
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAIL_MARKER = "FAIL_THIS_REQUEST"
+
+
+class OpenAIBatchStub:
+    def __init__(self):
+        self.files = {}        # file id -> bytes
+        self.batches = {}      # batch id -> batch object
+        self.retrievals = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def requests(self, batch_id):
+        """Request lines of a batch's input file"""
+        content = self.files[self.batches[batch_id]["input_file_id"]].decode("utf-8")
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    def finish(self, batch_id, status="completed"):
+        """Answer every request of the batch and move it to `status`"""
+        lines = []
+        for request in self.requests(batch_id):
+            if FAIL_MARKER in json.dumps(request["body"]):
+                response = {"status_code": 400, "body": {"error": {"message": "bad request"}}}
+            else:
+                response = {"status_code": 200, "body": {"choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": "- Generated section"}},
+                ]}}
+            lines.append({"id": f"resp_{uuid.uuid4().hex[:8]}", "custom_id": request["custom_id"],
+                          "response": response, "error": None})
+        output_id = self._store("\n".join(json.dumps(line) for line in lines).encode("utf-8"))
+        batch = self.batches[batch_id]
+        batch.update(status=status, output_file_id=output_id)
+        batch["request_counts"]["completed"] = len(lines)
+
+    def _store(self, content):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        self.files[file_id] = content
+        return file_id
+
+    def _create_batch(self, body):
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        self.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"], "completion_window": body["completion_window"],
+            "status": "in_progress", "created_at": 0, "output_file_id": None, "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0}, "metadata": body.get("metadata"),
+        }
+        self.batches[batch_id]["request_counts"]["total"] = len(self.requests(batch_id))
+        return self.batches[batch_id]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, obj):
+                self._send(200, json.dumps(obj).encode("utf-8"))
+
+            def do_POST(self):
+                data = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.path.endswith("/files"):
+                    boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+                    part = next(p for p in data.split(b"--" + boundary) if b'name="file"' in p)
+                    content = part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+                    file_id = stub._store(content)
+                    return self._send_json({"id": file_id, "object": "file", "bytes": len(content),
+                                            "created_at": 0, "filename": "batch.jsonl",
+                                            "purpose": "batch", "status": "processed"})
+                if self.path.endswith("/batches"):
+                    return self._send_json(stub._create_batch(json.loads(data)))
+                self._send(404, b"{}")
+
+            def do_GET(self):
+                match = re.match(r".*/batches/(\w+)$", self.path)
+                if match and match.group(1) in stub.batches:
+                    stub.retrievals += 1
+                    return self._send_json(stub.batches[match.group(1)])
+                match = re.match(r".*/files/([\w-]+)/content$", self.path)
+                if match and match.group(1) in stub.files:
+                    return self._send(200, stub.files[match.group(1)], "application/octet-stream")
+                self._send(404, b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
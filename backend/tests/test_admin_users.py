@@ -0,0 +1,29 @@
+"""Admin user listing aggregates"""
+from datetime import datetime, timedelta
+
+
+def test_recent_resume_count_uses_generation_time(app, user_with_candidate):
+    from app.identity import create_token
+    from app.models import db, User, CandidateJob
+
+    creator, candidate = user_with_candidate
+    admin = User(name="Admin", email="admin@example.com", mobile="0", password_hash="x", role="admin")
+    db.session.add(admin)
+    now = datetime.utcnow()
+    db.session.add_all([
+        # Old job row, resume regenerated yesterday: counts
+        CandidateJob(candidate_id=candidate.id, job_id="old", job_description="jd", resume_content="text",
+                     created_at=now - timedelta(days=30), resume_generated_at=now - timedelta(days=1)),
+        # New job row without a resume yet: does not count
+        CandidateJob(candidate_id=candidate.id, job_id="new", job_description="jd", created_at=now),
+        # Resume generated outside the window: does not count
+        CandidateJob(candidate_id=candidate.id, job_id="stale", job_description="jd", resume_content="text",
+                     created_at=now - timedelta(days=20), resume_generated_at=now - timedelta(days=10)),
+    ])
+    db.session.commit()
+
+    response = app.test_client().get("/api/admin/users?days=7",
+                                     headers={"Authorization": f"Bearer {create_token(admin)}"})
+    assert response.status_code == 200
+    counts = {u["id"]: u["recent_resume_count"] for u in response.get_json()["users"]}
+    assert counts == {creator.id: 1, admin.id: 0}
@@ -0,0 +1,62 @@
+"""Stored resumes are only served to callers with access to their candidate"""
+import pytest
+
+
+@pytest.fixture
+def artifact(app, user_with_candidate):
+    from app.artifacts import get_artifact_store
+    from app.models import db, CandidateJob
+
+    _, candidate = user_with_candidate
+    key = get_artifact_store().put(b"%PDF-1.4 resume", "pdf")
+    db.session.add(CandidateJob(candidate_id=candidate.id, job_id="J1", job_description="jd", docx_path=key))
+    db.session.commit()
+    return key
+
+
+def _headers(account):
+    from app.identity import create_token
+
+    return {"Authorization": f"Bearer {create_token(account)}"}
+
+
+def _user(role, email):
+    from app.models import db, User
+
+    user = User(name=email, email=email, mobile=email, password_hash="x", role=role)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_download_requires_a_token(app, artifact):
+    assert app.test_client().get(f"/api/resume/artifacts/{artifact}").status_code == 401
+
+
+def test_creator_admin_and_candidate_can_download(app, artifact, user_with_candidate):
+    creator, candidate = user_with_candidate
+    client = app.test_client()
+
+    for account in (creator, _user("admin", "admin@example.com"), candidate):
+        response = client.get(f"/api/resume/artifacts/{artifact}", headers=_headers(account))
+        assert response.status_code == 200
+        assert response.data == b"%PDF-1.4 resume"
+
+
+def test_other_users_get_404(app, artifact):
+    client = app.test_client()
+    other = _user("user", "other@example.com")
+
+    assert client.get(f"/api/resume/artifacts/{artifact}", headers=_headers(other)).status_code == 404
+
+
+def test_unlinked_artifacts_are_admin_only(app, user_with_candidate):
+    from app.artifacts import get_artifact_store
+
+    creator, _ = user_with_candidate
+    key = get_artifact_store().put(b"%PDF-1.4 orphan", "pdf")
+    client = app.test_client()
+
+    assert client.get(f"/api/resume/artifacts/{key}", headers=_headers(creator)).status_code == 404
+    admin = _user("admin", "admin@example.com")
+    assert client.get(f"/api/resume/artifacts/{key}", headers=_headers(admin)).status_code == 200
@@ -0,0 +1,170 @@
+"""Deferred (OpenAI Batch API) jobs: claims keep overlapping runs from doing a job twice"""
+from datetime import datetime, timedelta
+import uuid
+
+import pytest
+
+from openai_batch_stub import FAIL_MARKER, OpenAIBatchStub
+
+
+@pytest.fixture
+def stub(app, monkeypatch):
+    from app import openai_client
+
+    stub = OpenAIBatchStub().start()
+    monkeypatch.setenv("OPENAI_BASE_URL", stub.base_url)
+    monkeypatch.setattr(openai_client, "_sync", None)
+    yield stub
+    stub.stop()
+    monkeypatch.setattr(openai_client, "_sync", None)
+
+
+@pytest.fixture
+def finalize_calls(monkeypatch):
+    """Messages published for finalize_deferred_resume, instead of sending them"""
+    import batch_tasks
+
+    calls = []
+    monkeypatch.setattr(batch_tasks.finalize_deferred_resume, "apply_async",
+                        lambda args=None, **options: calls.append((args, options)))
+    return calls
+
+
+def _deferred_jobs(candidate, descriptions):
+    from app.models import db, CandidateJob, ResumeGenerationJob
+
+    jobs = []
+    for i, description in enumerate(descriptions):
+        row = CandidateJob(candidate_id=candidate.id, job_id=f"J{i}", job_description=description)
+        db.session.add(row)
+        db.session.flush()
+        job = ResumeGenerationJob(
+            id=str(uuid.uuid4()), candidate_id=candidate.id, job_row_id=row.id,
+            status='PENDING', progress=0, file_type='pdf', pdf_renderer='native', mode='deferred',
+        )
+        db.session.add(job)
+        jobs.append(job.id)
+    db.session.commit()
+    return jobs
+
+
+def _job(job_id):
+    from app.models import db, ResumeGenerationJob
+
+    db.session.expire_all()
+    return db.session.get(ResumeGenerationJob, job_id)
+
+
+def test_submit_skips_jobs_claimed_by_another_run(stub, user_with_candidate):
+    import batch_tasks
+
+    _, candidate = user_with_candidate
+    job_ids = _deferred_jobs(candidate, ["Backend engineer", "Data engineer"])
+
+    # Another submit run holds the claim: this one has nothing to send
+    claimed = batch_tasks._claim_pending(batch_tasks.DEFERRED_BATCH_MAX_JOBS)
+    assert sorted(job.id for job in claimed) == sorted(job_ids)
+    assert batch_tasks.submit_deferred_resumes() is None
+    assert stub.batches == {}
+
+    # Once the claim is stale the jobs are picked up again, exactly once
+    for job in claimed:
+        job.dispatched_at = datetime.utcnow() - timedelta(seconds=batch_tasks.DEFERRED_CLAIM_TIMEOUT_SECONDS + 1)
+    from app.models import db
+    db.session.commit()
+    batch_id = batch_tasks.submit_deferred_resumes()
+    assert batch_id in stub.batches
+    assert batch_tasks.submit_deferred_resumes() is None
+    assert len(stub.batches) == 1
+    for job_id in job_ids:
+        job = _job(job_id)
+        assert (job.status, job.llm_batch_id, job.progress) == ('PROCESSING', batch_id, batch_tasks.SUBMITTED_PROGRESS)
+
+
+def test_submit_releases_claim_when_upload_fails(app, user_with_candidate, monkeypatch):
+    import batch_tasks
+
+    _, candidate = user_with_candidate
+    (job_id,) = _deferred_jobs(candidate, ["Backend engineer"])
+
+    def no_client():
+        raise RuntimeError("OpenAI unavailable")
+
+    monkeypatch.setattr(batch_tasks, "get_openai_client", no_client)
+    with pytest.raises(RuntimeError):
+        batch_tasks.submit_deferred_resumes()
+    job = _job(job_id)
+    assert (job.status, job.llm_batch_id, job.dispatched_at) == ('PENDING', None, None)
+
+
+def test_overlapping_polls_finalize_each_job_once(stub, finalize_calls, user_with_candidate, monkeypatch):
+    import batch_tasks
+    from celery_config import QUEUE_LOW
+
+    _, candidate = user_with_candidate
+    job_ids = _deferred_jobs(candidate, ["Backend engineer", "Data engineer"])
+    batch_id = batch_tasks.submit_deferred_resumes()
+
+    assert batch_tasks.poll_deferred_resumes() == {batch_id: "in_progress"}
+    assert finalize_calls == []
+
+    # A second poll starts while the first is reading the batch output
+    stub.finish(batch_id)
+    collect = batch_tasks._collect_results
+    overlapping = []
+
+    def collect_during_other_poll(client, batch):
+        if not overlapping:
+            overlapping.append(None)
+            overlapping[0] = batch_tasks.poll_deferred_resumes()
+        return collect(client, batch)
+
+    monkeypatch.setattr(batch_tasks, "_collect_results", collect_during_other_poll)
+    assert batch_tasks.poll_deferred_resumes() == {batch_id: "completed"}
+    assert overlapping == [{batch_id: "completed"}]
+
+    assert sorted(args[0] for args, _ in finalize_calls) == sorted(job_ids)
+    for args, options in finalize_calls:
+        assert options["queue"] == QUEUE_LOW
+        assert args[1] and all(text == "- Generated section" for text in args[1].values())
+    for job_id in job_ids:
+        assert _job(job_id).progress == batch_tasks.FINALIZE_PROGRESS
+
+    # Claimed jobs are not looked at again
+    retrievals = stub.retrievals
+    assert batch_tasks.poll_deferred_resumes() == {}
+    assert stub.retrievals == retrievals
+
+
+def test_finalize_task_stores_resume_from_batch_outputs(stub, finalize_calls, user_with_candidate):
+    import batch_tasks
+
+    _, candidate = user_with_candidate
+    (job_id,) = _deferred_jobs(candidate, ["Backend engineer"])
+    batch_id = batch_tasks.submit_deferred_resumes()
+    stub.finish(batch_id)
+    batch_tasks.poll_deferred_resumes()
+
+    (args, _), = finalize_calls
+    assert batch_tasks.finalize_deferred_resume(*args) == {'status': 'DONE'}
+    job = _job(job_id)
+    assert (job.status, job.progress) == ('SUCCESS', 100)
+    assert job.result_url
+
+    # A redelivered message does nothing
+    assert batch_tasks.finalize_deferred_resume(*args) == {'status': 'SKIPPED'}
+
+
+def test_failed_requests_fail_only_their_jobs(stub, finalize_calls, user_with_candidate):
+    import batch_tasks
+
+    _, candidate = user_with_candidate
+    ok_id, failing_id = _deferred_jobs(candidate, ["Backend engineer", f"Data engineer {FAIL_MARKER}"])
+    batch_id = batch_tasks.submit_deferred_resumes()
+    stub.finish(batch_id)
+    batch_tasks.poll_deferred_resumes()
+
+    assert [args[0] for args, _ in finalize_calls] == [ok_id]
+    failed = _job(failing_id)
+    assert failed.status == 'FAILURE'
+    assert "bad request" in failed.error_message
@@ -0,0 +1,67 @@
+"""Candidate listings run a fixed number of queries however many rows they return"""
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def admin_headers(app):
+    from app.identity import create_token
+    from app.models import db, User
+
+    admin = User(name="Admin", email="admin@example.com", mobile="0", password_hash="x", role="admin")
+    db.session.add(admin)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_token(admin)}"}
+
+
+def _seed(count, start=0):
+    """`count` candidates, each with a creator, two assigned users and two jobs"""
+    from app.models import db, User, Candidate, CandidateJob
+
+    for i in range(start, start + count):
+        creator, *assignees = [
+            User(name=f"User {i}-{n}", email=f"user{i}-{n}@example.com", mobile=f"{i}{n}",
+                 password_hash="x", role="user")
+            for n in range(3)
+        ]
+        candidate = Candidate(first_name="Cand", last_name=str(i), email=f"cand{i}@example.com",
+                              phone=str(i), creator=creator)
+        candidate.assigned_users = assignees
+        candidate.jobs = [CandidateJob(job_id=f"J{i}-{n}", job_description="jd") for n in range(2)]
+        db.session.add(candidate)
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def _count_statements(app, client, path, headers):
+    from app.models import db
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+
+def test_admin_candidate_list_query_count_is_constant(app, admin_headers):
+    client = app.test_client()
+    n = 4
+    _seed(n)
+    client.get("/api/admin/candidates", headers=admin_headers)  # caches the caller's identity
+
+    small, body = _count_statements(app, client, "/api/admin/candidates", admin_headers)
+    assert len(body["candidates"]) == n
+
+    _seed(2 * n, start=n)
+    large, body = _count_statements(app, client, "/api/admin/candidates", admin_headers)
+    assert len(body["candidates"]) == 3 * n
+    assert all(len(c["jobs"]) == 2 for c in body["candidates"])
+
+    assert large == small
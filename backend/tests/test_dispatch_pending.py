@@ -0,0 +1,71 @@
+"""Outbox relay: committed but unpublished interactive jobs are published once"""
+from datetime import datetime, timedelta
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Resume task messages, captured instead of sent to the broker"""
+    from celery.canvas import Signature
+
+    messages = []
+    monkeypatch.setattr(Signature, "apply_async", lambda self, *args, **kwargs: messages.append(self))
+    return messages
+
+
+def _outbox_job(candidate, age_seconds):
+    from app.models import db, ResumeGenerationJob
+
+    job = ResumeGenerationJob(
+        id=str(uuid.uuid4()), candidate_id=candidate.id, status='PENDING', mode='interactive',
+        file_type='word', created_at=datetime.utcnow() - timedelta(seconds=age_seconds),
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_relay_publishes_old_jobs_once(published, user_with_candidate):
+    from celery_config import QUEUE_LOW
+    from celery_tasks import dispatch_pending_jobs
+    from app.models import db, ResumeGenerationJob
+
+    _, candidate = user_with_candidate
+    old_id = _outbox_job(candidate, age_seconds=120)
+    young_id = _outbox_job(candidate, age_seconds=0)
+
+    assert dispatch_pending_jobs(min_age=30) == [old_id]
+    assert dispatch_pending_jobs(min_age=30) == []
+    assert [message.options["task_id"] for message in published] == [old_id]
+    assert published[0].options["queue"] == QUEUE_LOW
+    assert published[0].kwargs["dispatch"] == 1
+
+    db.session.expire_all()
+    assert db.session.get(ResumeGenerationJob, old_id).dispatched_at is not None
+    assert db.session.get(ResumeGenerationJob, young_id).dispatched_at is None
+
+
+def test_failed_publish_returns_job_to_outbox(user_with_candidate, monkeypatch):
+    from celery.canvas import Signature
+    from celery_tasks import dispatch_pending_jobs
+    from app.models import db, ResumeGenerationJob
+
+    def broker_down(self, *args, **kwargs):
+        raise ConnectionError("broker unreachable")
+
+    _, candidate = user_with_candidate
+    job_id = _outbox_job(candidate, age_seconds=120)
+    monkeypatch.setattr(Signature, "apply_async", broker_down)
+
+    assert dispatch_pending_jobs(min_age=30) == []
+    db.session.expire_all()
+    assert db.session.get(ResumeGenerationJob, job_id).dispatched_at is None
+
+
+def test_beat_runs_the_relay():
+    from celery_config import celery_app
+
+    tasks = {entry["task"] for entry in celery_app.conf.beat_schedule.values()}
+    assert "celery_tasks.dispatch_pending_jobs" in tasks
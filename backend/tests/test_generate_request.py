@@ -0,0 +1,38 @@
+"""Generation requests are validated before a daily quota slot is reserved"""
+
+
+def test_malformed_duration_is_a_400_without_reserving(app, user_with_candidate, monkeypatch):
+    from app import quota
+
+    _, candidate = user_with_candidate
+    reserved = []
+    monkeypatch.setattr(quota, "reserve", lambda *args, **kwargs: reserved.append(args) or "2025-01-01")
+
+    response = app.test_client().post("/api/resume/generate", json={
+        "job_desc": "Backend engineer",
+        "candidate_info": "Name: Jane Doe\nWork Experience:\nAcme, Duration: Sometime - Present\n",
+        "candidate_id": candidate.id,
+    })
+
+    assert response.status_code == 400
+    assert "duration" in response.get_json()["message"].lower()
+    assert reserved == []
+
+
+def test_quota_seed_counts_resumes_generated_today(app, user_with_candidate):
+    from datetime import datetime, timedelta
+    from app import quota
+    from app.models import db, CandidateJob
+
+    _, candidate = user_with_candidate
+    now = datetime.utcnow()
+    db.session.add_all([
+        # Row from last month, resume regenerated today: counts
+        CandidateJob(candidate_id=candidate.id, job_id="old", job_description="jd", resume_content="text",
+                     created_at=now - timedelta(days=30), resume_generated_at=now),
+        # Row added today, no resume yet: does not count
+        CandidateJob(candidate_id=candidate.id, job_id="new", job_description="jd", created_at=now),
+    ])
+    db.session.commit()
+
+    assert quota._generated_today(candidate.id) == 1
@@ -0,0 +1,98 @@
+"""Per-process identity and access caches: invalidations are never lost to a concurrent load"""
+import pytest
+
+from app import identity
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = identity.TTLCache(ttl=30, max_entries=3)
+    monkeypatch.setattr(identity, "cache", cache)
+    monkeypatch.setattr(identity, "_ensure_listener", lambda: None)
+    monkeypatch.setattr(identity, "_redis", lambda: pytest.fail("unexpected Redis use"))
+    monkeypatch.setattr(identity, "invalidate", lambda *keys: [cache.pop(key) for key in keys])
+    monkeypatch.setattr(identity, "_subscribed", identity.threading.Event())
+    identity._subscribed.set()
+    return cache
+
+
+def test_value_invalidated_during_load_is_not_stored(cache):
+    def load():
+        identity.invalidate("access:1")    # a write commits while we read
+        return frozenset({1, 2})
+
+    assert identity.cached("access:1", load) == frozenset({1, 2})
+    assert cache.get("access:1") == (False, None)
+
+    assert identity.cached("access:1", lambda: frozenset({1})) == frozenset({1})
+    assert cache.get("access:1") == (True, frozenset({1}))
+
+
+def test_clear_during_load_skips_the_store(cache):
+    def load():
+        cache.clear()
+        return "stale"
+
+    identity.cached("identity:7", load)
+    assert cache.get("identity:7") == (False, None)
+
+
+def test_forgotten_invalidations_still_block_older_loads(cache):
+    generation = cache.generation("access:1")
+    cache.pop("access:1")
+    for key in ("a", "b", "c", "d"):   # pushes access:1 out of the bounded history
+        cache.pop(key)
+    assert not cache.set("access:1", "stale", generation=generation)
+    assert cache.set("access:1", "fresh", generation=cache.generation("access:1"))
+
+
+def test_access_sets_expire_before_identities(app, cache, monkeypatch, user_with_candidate):
+    from app import access
+
+    user, candidate = user_with_candidate
+    now = [1000.0]
+    monkeypatch.setattr(identity.time, "monotonic", lambda: now[0])
+
+    assert access.can_access(user.id, candidate.id)
+    identity.get_identity(str(user.id))
+
+    now[0] += access.ACCESS_CACHE_TTL + 1
+    assert cache.get(f"access:{user.id}") == (False, None)
+    assert cache.get(f"identity:{user.id}")[0]
+
+
+def test_revocation_during_identity_load_is_not_lost(app, cache, user_with_candidate):
+    from app.models import db
+
+    user, _ = user_with_candidate
+    payload = {"sub": str(user.id), "role": "user", "ver": 0}
+    load = identity._load_identity
+
+    def load_then_revoke(subject):
+        loaded = load(subject)             # token_version 0 read ...
+        identity.revoke_tokens(user)       # ... then an admin revokes the tokens
+        db.session.commit()
+        identity.invalidate_account(user)
+        return loaded
+
+    identity._load_identity = load_then_revoke
+    try:
+        assert not identity.is_revoked(payload)
+    finally:
+        identity._load_identity = load
+    assert identity.is_revoked(payload)
+
+
+def test_entries_expire_quickly_while_invalidations_are_missed(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(identity.time, "monotonic", lambda: now[0])
+    identity._subscribed.clear()
+
+    identity.cached("identity:1", lambda: "loaded")
+    now[0] += identity.IDENTITY_CACHE_DEGRADED_TTL + 0.5
+    assert cache.get("identity:1") == (False, None)
+
+    identity._subscribed.set()
+    identity.cached("identity:1", lambda: "loaded")
+    now[0] += identity.IDENTITY_CACHE_DEGRADED_TTL + 0.5
+    assert cache.get("identity:1") == (True, "loaded")
@@ -0,0 +1,53 @@
+"""Field mapping reports OpenAI failures as a JSON 500 on both the ASGI and Flask routes"""
+import pytest
+
+
+class _FailingCompletions:
+    async def create(self, **kwargs):
+        raise RuntimeError("upstream timeout")
+
+
+class _FailingClient:
+    def __init__(self):
+        self.chat = type("Chat", (), {"completions": _FailingCompletions()})()
+
+
+@pytest.fixture
+def auth_headers(app, user_with_candidate):
+    from app.identity import create_token
+
+    user, candidate = user_with_candidate
+    return {"Authorization": f"Bearer {create_token(user)}"}, candidate.id
+
+
+def test_async_map_fields_openai_error(app, auth_headers, monkeypatch):
+    from starlette.applications import Starlette
+    from starlette.testclient import TestClient
+    from app import async_endpoints
+
+    monkeypatch.setattr(async_endpoints, "get_async_openai", lambda: _FailingClient())
+    headers, candidate_id = auth_headers
+    client = TestClient(Starlette(routes=async_endpoints.build_routes(app)))
+
+    response = client.post("/api/ai/map-fields", json={"form": {"firstName": {}}, "candidate_id": candidate_id},
+                           headers=headers)
+    assert response.status_code == 500
+    assert response.json() == {"message": "OpenAI error: upstream timeout"}
+
+
+def test_flask_map_fields_openai_error(app, auth_headers, monkeypatch):
+    from app import ai
+
+    class Completions:
+        def create(self, **kwargs):
+            raise RuntimeError("upstream timeout")
+
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": Completions()})()})()
+    monkeypatch.setattr(ai, "_client", lambda: client)
+    headers, candidate_id = auth_headers
+
+    response = app.test_client().post("/api/ai/map-fields",
+                                      json={"form": {"firstName": {}}, "candidate_id": candidate_id},
+                                      headers=headers)
+    assert response.status_code == 500
+    assert response.get_json() == {"message": "OpenAI error: upstream timeout"}
@@ -0,0 +1,59 @@
+"""/generate-batch and /batch-status only act on candidates the caller can access"""
+import pytest
+
+
+@pytest.fixture
+def job_rows(app, user_with_candidate):
+    from app.models import db, CandidateJob
+
+    _, candidate = user_with_candidate
+    db.session.add_all([
+        CandidateJob(candidate_id=candidate.id, job_id=f"J{i}", job_description=f"jd {i}") for i in range(2)
+    ])
+    db.session.commit()
+
+
+def _headers(account):
+    from app.identity import create_token
+
+    return {"Authorization": f"Bearer {create_token(account)}"}
+
+
+def _other_user():
+    from app.models import db, User
+
+    user = User(name="Other", email="other@example.com", mobile="9", password_hash="x", role="user")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _start_batch(client, candidate_id, headers):
+    return client.post("/api/resume-async/generate-batch",
+                       json={"candidate_id": candidate_id, "mode": "deferred"}, headers=headers)
+
+
+def test_batch_for_inaccessible_candidate_is_404(app, job_rows, user_with_candidate, monkeypatch):
+    from app import quota
+    from app.models import ResumeGenerationJob
+
+    _, candidate = user_with_candidate
+    monkeypatch.setattr(quota, "reserve", lambda *args, **kwargs: pytest.fail("quota spent"))
+
+    response = _start_batch(app.test_client(), candidate.id, _headers(_other_user()))
+    assert response.status_code == 404
+    assert ResumeGenerationJob.query.count() == 0
+
+
+def test_batch_status_is_404_for_other_users(app, job_rows, user_with_candidate):
+    creator, candidate = user_with_candidate
+    client = app.test_client()
+
+    response = _start_batch(client, candidate.id, _headers(creator))
+    assert response.status_code == 202
+    assert len(response.get_json()["jobs"]) == 2
+    path = f"/api/resume-async/batch-status/{response.get_json()['batch_id']}"
+
+    assert client.get(path, headers=_headers(creator)).get_json()["total"] == 2
+    assert client.get(path, headers=_headers(candidate)).status_code == 200
+    assert client.get(path, headers=_headers(_other_user())).status_code == 404
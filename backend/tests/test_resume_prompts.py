@@ -0,0 +1,74 @@
+"""Splitting candidate_info into fields and building per-section prompts"""
+from app.resume_prompts import resume_section_messages, split_candidate_info
+
+LABELLED = (
+    "Name: Jane Doe\r\n"
+    "Email: jane@example.com\r\n"
+    "Phone: N/A\r\n"
+    "Location: Austin, TX, USA\r\n"
+    "\r\n"
+    "Technical Skills:\r\n"
+    "Python, SQL\r\n"
+    "Note: AWS certified\r\n"
+    "\r\n"
+    "Work Experience:\r\n"
+    "Acme, Duration: Jan 2020 - Present\r\n"
+    "- Built the billing API\r\n"
+    "\r\n"
+    "Education:\r\n"
+    "MS Computer Science\r\n"
+)
+
+
+def test_split_labelled_candidate_info():
+    fields = split_candidate_info(LABELLED)
+
+    assert fields == {
+        "name": "Jane Doe",
+        "email": "jane@example.com",
+        "phone": "",
+        "location": "Austin, TX, USA",
+        # A "label: value" line inside a block stays part of the block
+        "technical_skills": "Python, SQL\nNote: AWS certified",
+        "work_experience": "Acme, Duration: Jan 2020 - Present\n- Built the billing API",
+        "education": "MS Computer Science",
+        "certifications": "",
+    }
+
+
+def test_split_ignores_header_labels_after_the_first_block():
+    fields = split_candidate_info("Name: Jane\nWork Experience:\nAcme\nEmail: later@example.com\n")
+
+    assert fields["email"] == ""
+    assert fields["work_experience"] == "Acme\nEmail: later@example.com"
+
+
+def test_split_falls_back_without_name_or_work_experience():
+    assert split_candidate_info(None) is None
+    assert split_candidate_info("") is None
+    assert split_candidate_info("Jane Doe, Python developer with 5 years at Acme") is None
+    assert split_candidate_info("Work Experience:\nAcme\n") is None                  # no name
+    assert split_candidate_info("Name: Jane\nTechnical Skills:\nPython\n") is None    # no work history
+    assert split_candidate_info("Name: Jane\nWork Experience:\n\n") is None           # empty block
+
+
+def test_unstructured_info_uses_the_two_call_prompts():
+    sections = resume_section_messages("Backend role", "Jane Doe, Python developer", "5 years")
+
+    assert list(sections) == ["main", "experience"]
+
+
+def test_sections_get_only_the_fields_they_use():
+    sections = resume_section_messages("Backend role at Initech", LABELLED, "6 years")
+    prompts = {name: messages[-1]["content"] for name, messages in sections.items()}
+
+    assert list(sections) == ["summary", "skills", "education", "experience"]
+    for name in ("summary", "skills"):
+        assert "Backend role at Initech" in prompts[name]
+        assert "Python, SQL" in prompts[name]
+        assert "Built the billing API" not in prompts[name]
+        assert "MS Computer Science" not in prompts[name]
+    assert "6 years" in prompts["summary"]
+    assert "Backend role at Initech" not in prompts["education"]
+    assert "Built the billing API" in prompts["experience"]
+    assert "jane@example.com" not in "".join(prompts.values())
@@ -387,7 +387,9 @@ export const adminUpdateCandidate = (id, payload) => api(`/admin/candidates/${id
 export const adminDeleteCandidate = (id) => api(`/admin/candidates/${id}`, { method:"DELETE" });
 
 // User candidates
-export const listMyCandidates = () => api("/candidates");
+// params (optional): { limit, cursor, fields: "summary" } for keyset-paginated pages
+export const listMyCandidates = (params) =>
+  api(params ? `/candidates?${new URLSearchParams(params)}` : "/candidates");
 export const createCandidate = (payload) => api("/candidates", { method:"POST", body: payload });
 export const updateCandidate = (id, payload) => api(`/candidates/${id}`, { method:"PUT", body: payload });
 export const deleteCandidate = (id) => api(`/candidates/${id}`, { method:"DELETE" });
@@ -431,6 +433,120 @@ export const generateResumeAsync = (payload) =>
 export const getJobStatus = (jobId) => 
   api(`/resume-async/job-status/${jobId}`);
 
+// payload: { candidate_id, job_row_ids?, file_type?, pdf_renderer? }
+// Without job_row_ids every job row lacking a resume is generated
+export const generateResumeBatch = (payload) => 
+  api("/resume-async/generate-batch", { method: "POST", body: payload });
+
+export const getBatchStatus = (batchId) => 
+  api(`/resume-async/batch-status/${batchId}`);
+
+// Read a text/event-stream response body, calling onFrame(event, data) for
+// every frame. Unnamed frames are reported as "message".
+const readEventStream = async (res, onFrame) => {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      let event = "message";
+      const dataLines = [];
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+      }
+      if (dataLines.length) {
+        onFrame(event, JSON.parse(dataLines.join("\n")));
+      }
+    }
+  }
+};
+
+// Resume job progress as Server-Sent Events. Read with fetch (not EventSource)
+// so the Authorization header is sent. Calls onEvent for every status snapshot
+// and resolves with the last one when the server closes the stream.
+export const streamJobStatus = async (jobId, onEvent) => {
+  const headers = { Accept: "text/event-stream" };
+  const token = getToken();
+  if (token) {
+    headers["Authorization"] = `Bearer ${token}`;
+  }
+
+  const res = await fetch(`${API}/resume-async/job-stream/${jobId}`, {
+    method: "GET",
+    headers,
+    credentials: "include"
+  });
+  if (!res.ok || !res.body) {
+    throw new Error(`Progress stream unavailable (${res.status})`);
+  }
+
+  let last = null;
+  await readEventStream(res, (_event, data) => {
+    last = data;
+    onEvent(data);
+  });
+  return last;
+};
+
+// Resume generation (sync, streamed). onDelta receives ({ section, text })
+// as the model writes; resolves with the "done" payload ({ artifact,
+// filename, file_type, resume_text }) once the file has been built.
+export const generateResumeStream = async (payload, onDelta) => {
+  const headers = { "Content-Type": "application/json", Accept: "text/event-stream" };
+  const token = getToken();
+  if (token) {
+    headers["Authorization"] = `Bearer ${token}`;
+  }
+
+  const res = await fetch(`${API}/resume/generate-stream`, {
+    method: "POST",
+    headers,
+    credentials: "include",
+    body: JSON.stringify(payload)
+  });
+  if (!res.ok || !res.body) {
+    const data = await res.json().catch(() => ({}));
+    throw new Error(data.message || res.statusText);
+  }
+
+  let result = null;
+  let error = null;
+  await readEventStream(res, (event, data) => {
+    if (event === "delta") onDelta?.(data);
+    else if (event === "done") result = data;
+    else if (event === "error") error = data.message;
+  });
+  if (error || !result) {
+    throw new Error(error || "Resume stream ended unexpectedly");
+  }
+  return result;
+};
+
+export const downloadResumeArtifact = async (artifact) => {
+  const headers = {};
+  const token = getToken();
+  if (token) {
+    headers["Authorization"] = `Bearer ${token}`;
+  }
+
+  const res = await fetch(`${API}/resume/artifacts/${artifact}`, {
+    method: "GET",
+    headers,
+    credentials: "include"
+  });
+  if (!res.ok) {
+    throw new Error(`Download failed (${res.status})`);
+  }
+  return res.blob();
+};
+
 export const downloadResumeAsync = async (jobId) => {
   const headers = {};
   const token = getToken();
@@ -7,9 +7,12 @@ import {
   Dialog, DialogTitle, DialogContent, DialogActions, Avatar, Alert, Chip, Grid, Tooltip, IconButton
 } from "@mui/material";
 import { ArrowBack, Person, Email, Phone, Work, Add, Download, Visibility as ViewIcon, Edit as EditIcon, Delete as DeleteIcon } from "@mui/icons-material";
-import { getCandidate, addCandidateJob, updateCandidateJob, deleteCandidateJob, generateResume, generateResumeAsync, getJobStatus, downloadResumeAsync } from "../api";
+import { getCandidate, addCandidateJob, updateCandidateJob, deleteCandidateJob, generateResumeStream, downloadResumeArtifact, generateResumeAsync, getJobStatus, streamJobStatus, downloadResumeAsync } from "../api";
 import { fullName } from "../utils/display";
 
+// Resume order of the sections streamed by /api/resume/generate-stream
+const STREAM_SECTION_ORDER = ["header", "main", "summary", "skills", "certifications", "education", "experience"];
+
 export default function CandidateDetail() {
   const { id } = useParams();
   const [cand, setCand] = useState(null);
@@ -19,6 +22,7 @@ export default function CandidateDetail() {
   const [generating, setGenerating] = useState(false);
   const [jobProgress, setJobProgress] = useState({});  // Track progress for each job
   const [useAsync, setUseAsync] = useState(false);  // Toggle between async and sync (default: sync for reliability)
+  const [streamPreview, setStreamPreview] = useState({});  // Live text per section while a sync resume streams
   
   // Filter states for job applications
   const [dateFilter, setDateFilter] = useState("");  // Filter by date
@@ -76,7 +80,66 @@ export default function CandidateDetail() {
     return info;
   };
 
-  // Poll job status until complete
+  // Apply a job status snapshot to the UI; returns true once the job is finished
+  const handleJobStatus = async (statusData, jobTaskId, jobRowId) => {
+    // Update progress in UI
+    setJobProgress(prev => ({
+      ...prev,
+      [jobRowId]: {
+        status: statusData.status,
+        progress: statusData.progress,
+        error: statusData.error_message
+      }
+    }));
+
+    if (statusData.status === 'SUCCESS') {
+      // Download the resume automatically
+      const blob = await downloadResumeAsync(jobTaskId);
+      const url = window.URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = `${cand.first_name}_${cand.last_name}_Resume.docx`;
+      document.body.appendChild(a);
+      a.click();
+      window.URL.revokeObjectURL(url);
+      document.body.removeChild(a);
+
+      // Clean up progress indicator
+      setTimeout(() => {
+        setJobProgress(prev => {
+          const newProgress = { ...prev };
+          delete newProgress[jobRowId];
+          return newProgress;
+        });
+      }, 3000);
+
+      await load();  // Reload candidate data
+      return true;
+    } else if (statusData.status === 'FAILURE' || statusData.status === 'CANCELLED') {
+      setErr(statusData.error_message || 'Resume generation failed');
+      return true;
+    }
+    return false;
+  };
+
+  // Follow job progress over the server-sent event stream
+  const watchJobStatus = async (jobTaskId, jobRowId) => {
+    try {
+      let pending = Promise.resolve(false);
+      const last = await streamJobStatus(jobTaskId, (statusData) => {
+        pending = pending.then(() => handleJobStatus(statusData, jobTaskId, jobRowId));
+      });
+      await pending;
+      if (last && ['SUCCESS', 'FAILURE', 'CANCELLED'].includes(last.status)) {
+        return;
+      }
+    } catch (e) {
+      console.warn('Progress stream unavailable, falling back to polling:', e);
+    }
+    pollJobStatus(jobTaskId, jobRowId);
+  };
+
+  // Poll job status until complete (fallback when streaming is unavailable)
   const pollJobStatus = async (jobTaskId, jobRowId) => {
     const maxAttempts = 60;  // 60 attempts * 2s = 2 minutes max
     let attempts = 0;
@@ -84,51 +147,15 @@ export default function CandidateDetail() {
     const poll = async () => {
       try {
         const statusData = await getJobStatus(jobTaskId);
-        
-        // Update progress in UI
-        setJobProgress(prev => ({
-          ...prev,
-          [jobRowId]: {
-            status: statusData.status,
-            progress: statusData.progress,
-            error: statusData.error_message
-          }
-        }));
-        
-        if (statusData.status === 'SUCCESS') {
-          // Download the resume automatically
-          const blob = await downloadResumeAsync(jobTaskId);
-          const url = window.URL.createObjectURL(blob);
-          const a = document.createElement('a');
-          a.href = url;
-          a.download = `${cand.first_name}_${cand.last_name}_Resume.docx`;
-          document.body.appendChild(a);
-          a.click();
-          window.URL.revokeObjectURL(url);
-          document.body.removeChild(a);
-          
-          // Clean up progress indicator
-          setTimeout(() => {
-            setJobProgress(prev => {
-              const newProgress = { ...prev };
-              delete newProgress[jobRowId];
-              return newProgress;
-            });
-          }, 3000);
-          
-          await load();  // Reload candidate data
+        if (await handleJobStatus(statusData, jobTaskId, jobRowId)) {
           return true;
-        } else if (statusData.status === 'FAILURE') {
-          setErr(statusData.error_message || 'Resume generation failed');
+        }
+        attempts++;
+        if (attempts < maxAttempts) {
+          setTimeout(() => poll(), 2000);  // Poll every 2 seconds
+        } else {
+          setErr('Resume generation timed out');
           return true;
-        } else if (statusData.status === 'PROCESSING' || statusData.status === 'PENDING') {
-          attempts++;
-          if (attempts < maxAttempts) {
-            setTimeout(() => poll(), 2000);  // Poll every 2 seconds
-          } else {
-            setErr('Resume generation timed out');
-            return true;
-          }
         }
       } catch (e) {
         console.error('Error polling job status:', e);
@@ -166,8 +193,8 @@ export default function CandidateDetail() {
           }
         }));
         
-        // Start polling for status
-        pollJobStatus(response.job_id, jobRowId);
+        // Follow progress (streams, falls back to polling)
+        watchJobStatus(response.job_id, jobRowId);
         
         setJobId(""); 
         setJobDesc("");
@@ -175,12 +202,17 @@ export default function CandidateDetail() {
         await load();
         
       } else {
-        // SYNC MODE: Wait for generation to complete (may take 30-60 seconds)
+        // SYNC MODE: Stream the resume text as it is written, then download the file
         const response = await addCandidateJob(id, { job_id: jobId, job_description: jobDesc });
         jobRowId = response.id;
         
         const candidateInfo = formatCandidateInfo(cand);
-        const blob = await generateResume(jobDesc, candidateInfo, "word", id, jobRowId);
+        setStreamPreview({});
+        const result = await generateResumeStream(
+          { job_desc: jobDesc, candidate_info: candidateInfo, file_type: "word", candidate_id: id, job_row_id: jobRowId },
+          ({ section, text }) => setStreamPreview(prev => ({ ...prev, [section]: (prev[section] || "") + text }))
+        );
+        const blob = await downloadResumeArtifact(result.artifact);
         
         const url = window.URL.createObjectURL(blob);
         const a = document.createElement('a');
@@ -210,6 +242,7 @@ export default function CandidateDetail() {
     } finally {
       if (!useAsync) {
         setGenerating(false);
+        setStreamPreview({});
       }
     }
   };
@@ -503,6 +536,24 @@ ${job.resume_content}`;
               placeholder="Paste the Job Description"
             />
           </Box>
+
+          {generating && Object.keys(streamPreview).length > 0 && (
+            <Box
+              sx={{
+                mt: 0.8,
+                p: 1,
+                maxHeight: 240,
+                overflowY: "auto",
+                bgcolor: "#fafafa",
+                border: "1px solid #e0e0e0",
+                borderRadius: 1,
+                fontSize: "0.75rem",
+                whiteSpace: "pre-wrap"
+              }}
+            >
+              {STREAM_SECTION_ORDER.filter(section => streamPreview[section]).map(section => streamPreview[section]).join("\n\n")}
+            </Box>
+          )}
         </Box>
       </Paper>
 